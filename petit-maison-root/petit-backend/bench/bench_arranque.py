@@ -0,0 +1,79 @@
+"""
+Presupuesto de tiempo de import y arranque de la API.
+
+Mide, cada vez en un intérprete nuevo:
+  - import:           `import src.api.endpoints` (no debe tocar la base)
+  - arranque nuevo:   lifespan completo sobre una base vacía (todas las migraciones)
+  - arranque al día:  lifespan sobre una base ya migrada (lo que paga cada worker)
+
+Sale con código 1 si alguna mediana supera su presupuesto.
+
+Uso (desde petit-backend):
+    python -m bench.bench_arranque [--repeticiones 5] [--import-ms 1500] [--arranque-ms 300]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Cada medición corre en un proceso aparte para no reusar módulos ya importados
+IMPORTAR = """
+import time
+inicio = time.perf_counter()
+import src.api.endpoints
+print((time.perf_counter() - inicio) * 1000)
+"""
+
+ARRANCAR = """
+import asyncio, time
+from src.api.endpoints import app
+async def arrancar():
+    inicio = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        print((time.perf_counter() - inicio) * 1000)
+asyncio.run(arrancar())
+"""
+
+
+def medir(codigo: str, base: str) -> float:
+    """Corre `codigo` en un intérprete nuevo sobre `base` y devuelve los ms que imprime"""
+    entorno = {**os.environ, "PETIT_DATABASE_URL": f"sqlite:///{base}", "PETIT_LOG_LEVEL": "WARNING"}
+    salida = subprocess.run(
+        [sys.executable, "-c", codigo], env=entorno, check=True, capture_output=True, text=True
+    ).stdout
+    return float(salida.split()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--import-ms", type=float, default=1500)
+    parser.add_argument("--arranque-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    directorio = tempfile.mkdtemp(prefix="petit-bench-")
+    bases_nuevas = iter(os.path.join(directorio, f"nueva{i}.db") for i in range(args.repeticiones))
+    migrada = os.path.join(directorio, "migrada.db")
+    medir(ARRANCAR, migrada)
+
+    casos = {
+        "import": (lambda: medir(IMPORTAR, migrada), args.import_ms),
+        "arranque nuevo": (lambda: medir(ARRANCAR, next(bases_nuevas)), None),
+        "arranque al día": (lambda: medir(ARRANCAR, migrada), args.arranque_ms),
+    }
+    excedidos = []
+    print(f"mediana de {args.repeticiones} procesos")
+    for nombre, (funcion, presupuesto) in casos.items():
+        ms = statistics.median(funcion() for _ in range(args.repeticiones))
+        estado = "" if presupuesto is None else f" | presupuesto {presupuesto:.0f} ms"
+        if presupuesto is not None and ms > presupuesto:
+            excedidos.append(nombre)
+            estado += " EXCEDIDO"
+        print(f"  {nombre:16} {ms:8.1f} ms{estado}")
+    sys.exit(1 if excedidos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Escenario de carga HTTP concurrente contra la app FastAPI.
+
+`--concurrencia` clientes virtuales hacen requests sin pausa durante
+`--segundos`, eligiendo la operación según MEZCLA. Por defecto la app corre
+en el mismo proceso (httpx + ASGITransport, sin red); con `--url` se mide un
+servidor ya levantado. Las reservas van a días posteriores a los datos
+generados y se borran al terminar; un 409 (horario ocupado) cuenta como
+respuesta válida, no como error.
+
+Uso (desde petit-backend):
+    python -m bench.bench_carga [--concurrencia 16] [--segundos 20] [--url http://localhost:8000]
+                                [--salida carga.json] [opciones de bench.datos_salon]
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+from . import datos_salon
+from .bench_micro import TERMINOS, limpiar
+from .medicion import guardar, resumir, usar_base
+
+# Operación -> peso (proporción aproximada de una recepción atendiendo el teléfono)
+MEZCLA = {
+    "GET /turnos/agenda/{fecha}": 40,
+    "GET /clientes/buscar/{termino}": 25,
+    "GET /turnos/disponibilidad/{fecha}": 15,
+    "POST /turnos/": 15,
+    "GET /turnos/cliente/{cliente_id}": 5,
+}
+
+
+def operaciones(p: dict, azar: random.Random) -> dict:
+    """Arma cada operación: nombre -> función que devuelve (método, url, json)"""
+    inicio = date.fromisoformat(p["fecha_inicio"])
+    fin = date.fromisoformat(p["fecha_fin"])
+
+    def fecha():
+        return (inicio + timedelta(days=azar.randrange((fin - inicio).days))).isoformat()
+
+    def servicio():
+        return azar.randrange(p["servicios"]) + 1
+
+    def cliente():
+        return int(p["clientes"] * azar.random() ** 2) + 1
+
+    def reservar():
+        # Días libres después de los datos; la grilla chica hace que algunos choquen (409)
+        dia = fin + timedelta(days=1 + azar.randrange(60))
+        minutos = azar.randrange(0, 10 * 60, 30)
+        return "POST", "/turnos/", {
+            "cliente_id": cliente(), "servicio_id": servicio(), "fecha": dia.isoformat(),
+            "hora_inicio": f"{9 + minutos // 60:02d}:{minutos % 60:02d}",
+        }
+
+    return {
+        "GET /turnos/agenda/{fecha}": lambda: ("GET", f"/turnos/agenda/{fecha()}", None),
+        "GET /clientes/buscar/{termino}": lambda: ("GET", f"/clientes/buscar/{azar.choice(TERMINOS)}", None),
+        "GET /turnos/disponibilidad/{fecha}": lambda: (
+            "GET", f"/turnos/disponibilidad/{fecha()}?servicio_id={servicio()}", None
+        ),
+        "POST /turnos/": reservar,
+        "GET /turnos/cliente/{cliente_id}": lambda: ("GET", f"/turnos/cliente/{cliente()}", None),
+    }
+
+
+async def cliente_virtual(http, p: dict, semilla: int, hasta: float,
+                          latencias: dict, estados: dict) -> None:
+    """Hace requests sin pausa hasta `hasta`, anotando latencia y código por operación"""
+    azar = random.Random(semilla)
+    ops = operaciones(p, azar)
+    nombres, pesos = list(MEZCLA), list(MEZCLA.values())
+    while time.perf_counter() < hasta:
+        nombre = azar.choices(nombres, pesos)[0]
+        metodo, url, cuerpo = ops[nombre]()
+        t0 = time.perf_counter()
+        respuesta = await http.request(metodo, url, json=cuerpo)
+        latencias[nombre].append((time.perf_counter() - t0) * 1000)
+        estados[nombre][respuesta.status_code] += 1
+
+
+async def correr(p: dict, concurrencia: int, segundos: float, url: str | None) -> dict:
+    """Corre el escenario y devuelve los resultados por operación y el total"""
+    import httpx
+
+    latencias: dict[str, list[float]] = defaultdict(list)
+    estados: dict[str, Counter] = defaultdict(Counter)
+
+    async def con_cliente(http):
+        hasta = time.perf_counter() + segundos
+        inicio = time.perf_counter()
+        await asyncio.gather(*(
+            cliente_virtual(http, p, p["semilla"] + i, hasta, latencias, estados)
+            for i in range(concurrencia)
+        ))
+        return time.perf_counter() - inicio
+
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=60) as http:
+            duracion = await con_cliente(http)
+    else:
+        from src.api.app import crear_app
+        app = crear_app()
+        async with app.router.lifespan_context(app):
+            transporte = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=60) as http:
+                duracion = await con_cliente(http)
+
+    resultados = {}
+    for nombre in MEZCLA:
+        if latencias[nombre]:
+            resultados[nombre] = {
+                **resumir(latencias[nombre], duracion),
+                "estados": {str(k): v for k, v in sorted(estados[nombre].items())},
+            }
+    errores = sum(v for c in estados.values() for k, v in c.items() if k >= 500 or k in (400, 404, 422))
+    resultados["total"] = {
+        **resumir([l for ls in latencias.values() for l in ls], duracion), "errores": errores
+    }
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--segundos", type=float, default=20)
+    parser.add_argument("--url", default=None, help="Servidor ya levantado (por defecto, en proceso)")
+    parser.add_argument("--salida", type=Path, default=None)
+    datos_salon.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    usar_base(args.base)
+    p = datos_salon.preparar_desde_args(args)
+    limpiar(p)
+    try:
+        resultados = asyncio.run(correr(p, args.concurrencia, args.segundos, args.url))
+    finally:
+        limpiar(p)
+
+    guardar("carga", {**p, "concurrencia": args.concurrencia, "segundos": args.segundos,
+                      "url": args.url or "en proceso"}, resultados, args.salida)
+    print(f"  errores: {resultados['total']['errores']}")
+
+
+if __name__ == "__main__":
+    main()
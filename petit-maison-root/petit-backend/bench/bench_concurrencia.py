@@ -0,0 +1,183 @@
+"""
+Prueba de estrés de concurrencia: reservas simultáneas y ediciones en carrera.
+
+1. `--reservas` POST /turnos/ salen a la vez, repartidos en `--procesos`
+   procesos (cada uno con su app y su índice en memoria, contra la misma
+   base), sobre una grilla chica de días posteriores a los datos: casi todos
+   chocan. Al final se revisa en la base que no haya dos turnos que ocupen
+   lugar superpuestos.
+2. `--ediciones` PUT simultáneos a un mismo turno con la misma `version`:
+   el compare-and-swap tiene que dejar pasar exactamente uno (el resto, 409).
+
+Sale con código 1 si hay superposiciones, si el compare-and-swap falla o si
+algún request da 5xx. Las reservas se borran al terminar.
+
+Uso (desde petit-backend):
+    python -m bench.bench_concurrencia [--reservas 400] [--procesos 4] [--ediciones 50]
+                                       [--salida concurrencia.json] [opciones de bench.datos_salon]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+from . import datos_salon
+from .bench_micro import limpiar
+from .medicion import guardar, resumir, usar_base
+
+DIAS = 3                  # Días de la grilla de reservas
+ESPERA_LARGADA = 3.0      # Segundos para que todos los procesos arranquen su app antes de disparar
+
+
+def reservas(p: dict, cantidad: int, azar: random.Random) -> list[tuple]:
+    """Pedidos de reserva sobre DIAS días y media mañana, cada 15 minutos"""
+    fin = date.fromisoformat(p["fecha_fin"])
+    pedidos = []
+    for _ in range(cantidad):
+        dia = fin + timedelta(days=1 + azar.randrange(DIAS))
+        minutos = azar.randrange(0, 4 * 60, 15)
+        pedidos.append(("POST", "/turnos/", {
+            "cliente_id": azar.randrange(p["clientes"]) + 1,
+            "servicio_id": azar.randrange(p["servicios"]) + 1,
+            "fecha": dia.isoformat(), "hora_inicio": f"{9 + minutos // 60:02d}:{minutos % 60:02d}",
+        }))
+    return pedidos
+
+
+def disparar(base: Path, grupos: list[list[tuple]]) -> list[tuple[int, float]]:
+    """Manda cada grupo de pedidos desde su propio proceso, todos a la vez"""
+    largada = time.time() + ESPERA_LARGADA
+    contexto = multiprocessing.get_context("spawn")  # Sin fork: cada proceso abre sus propias conexiones
+    with contexto.Pool(len(grupos)) as pool:
+        resultados = pool.starmap(_proceso, [(str(base), grupo, largada) for grupo in grupos])
+    return [r for grupo in resultados for r in grupo]
+
+
+def _proceso(base: str, pedidos: list[tuple], largada: float) -> list[tuple[int, float]]:
+    usar_base(Path(base))
+    return asyncio.run(_enviar(pedidos, largada))
+
+
+async def _enviar(pedidos: list[tuple], largada: float) -> list[tuple[int, float]]:
+    """Espera la largada y manda todos los pedidos concurrentemente: (código, ms) de cada uno"""
+    import httpx
+    from src.api.app import crear_app
+
+    app = crear_app()
+    async with app.router.lifespan_context(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=120) as http:
+            async def uno(metodo, url, cuerpo):
+                t0 = time.perf_counter()
+                respuesta = await http.request(metodo, url, json=cuerpo)
+                return respuesta.status_code, (time.perf_counter() - t0) * 1000
+
+            await asyncio.sleep(max(0.0, largada - time.time()))
+            return await asyncio.gather(*(uno(*pedido) for pedido in pedidos))
+
+
+def superposiciones(p: dict) -> list[tuple[int, int]]:
+    """Pares de turnos que ocupan lugar y se superponen, en los días de la prueba"""
+    from src.db.base import SessionLocal
+    from src.db.indice_agenda import ESTADOS_OCUPAN, a_minutos
+    from src.db.servicio_repository import ServicioDB
+    from src.db.turno_repository import TurnoDB
+
+    with SessionLocal() as db:
+        filas = db.query(TurnoDB.id, TurnoDB.fecha, TurnoDB.hora_inicio, ServicioDB.duracion_min).join(
+            ServicioDB, TurnoDB.servicio_id == ServicioDB.id
+        ).filter(
+            TurnoDB.fecha > date.fromisoformat(p["fecha_fin"]), TurnoDB.estado.in_(ESTADOS_OCUPAN)
+        ).all()
+
+    por_dia = defaultdict(list)
+    for id, fecha, hora, duracion in filas:
+        por_dia[fecha].append((a_minutos(hora), a_minutos(hora) + duracion, id))
+    choques = []
+    for intervalos in por_dia.values():
+        intervalos.sort()
+        for (_, fin_a, id_a), (inicio_b, _, id_b) in zip(intervalos, intervalos[1:]):
+            if inicio_b < fin_a:
+                choques.append((id_a, id_b))
+    return choques
+
+
+def turno_para_editar(p: dict) -> tuple[int, int]:
+    """Crea un turno lejos de la grilla de reservas y devuelve (id, version)"""
+    from src.db.base import SessionLocal
+    from src.db.turno_repository import TurnoRepository
+    from src.dto.turno import TurnoCreate
+
+    fecha = date.fromisoformat(p["fecha_fin"]) + timedelta(days=DIAS + 30)
+    with SessionLocal() as db:
+        turno = TurnoRepository(db).crear(TurnoCreate(
+            cliente_id=1, servicio_id=1, fecha=fecha, hora_inicio="10:00", notas="bench"
+        ))
+        return turno.id, turno.version
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservas", type=int, default=400)
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--ediciones", type=int, default=50)
+    parser.add_argument("--salida", type=Path, default=None)
+    datos_salon.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    usar_base(args.base)
+    p = datos_salon.preparar_desde_args(args)
+    azar = random.Random(p["semilla"])
+    procesos = max(1, args.procesos)
+
+    limpiar(p)
+    try:
+        inicio = time.perf_counter()
+        pedidos = reservas(p, args.reservas, azar)
+        reservados = disparar(args.base, [pedidos[i::procesos] for i in range(procesos)])
+        duracion_reservas = time.perf_counter() - inicio
+        choques = superposiciones(p)
+
+        id, version = turno_para_editar(p)
+        inicio = time.perf_counter()
+        ediciones = [("PUT", f"/turnos/{id}", {"notas": f"bench {i}", "version": version})
+                     for i in range(args.ediciones)]
+        editados = disparar(args.base, [ediciones[i::procesos] for i in range(procesos)])
+        duracion_ediciones = time.perf_counter() - inicio
+    finally:
+        limpiar(p)
+
+    resultados = {}
+    for caso, respuestas, segundos in (("POST /turnos/ simultáneos", reservados, duracion_reservas),
+                                       ("PUT /turnos/{id} misma versión", editados, duracion_ediciones)):
+        resultados[caso] = {
+            **resumir([ms for _, ms in respuestas], segundos),
+            "estados": {str(k): v for k, v in sorted(Counter(c for c, _ in respuestas).items())},
+        }
+    estados_ediciones = Counter(c for c, _ in editados)
+    resultados["superposiciones"] = {**resumir([], 0), "n": len(choques), "pares": choques}
+
+    guardar("concurrencia", {**p, "reservas": args.reservas, "procesos": procesos,
+                             "ediciones": args.ediciones}, resultados, args.salida)
+    for caso in ("POST /turnos/ simultáneos", "PUT /turnos/{id} misma versión"):
+        print(f"  {caso}: {resultados[caso]['estados']}")
+    print(f"  superposiciones: {len(choques)}")
+
+    errores_5xx = sum(1 for c, _ in reservados + editados if c >= 500)
+    cas_ok = estados_ediciones[200] == 1 and estados_ediciones[409] == args.ediciones - 1
+    if choques or errores_5xx or not cas_ok:
+        print("  FALLA: " + ", ".join(
+            texto for falla, texto in ((choques, "turnos superpuestos"), (errores_5xx, "respuestas 5xx"),
+                                       (not cas_ok, "el compare-and-swap no dejó pasar exactamente una edición"))
+            if falla
+        ))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark del camino de lectura de listados de turnos.
+
+Compara el camino anterior (entidades ORM -> dict -> validación con
+TurnoDetailOut -> JSON) con el actual (diez columnas como tuplas -> orjson)
+sobre una agenda y un historial con miles de filas, en una base temporal.
+
+Uso (desde petit-backend):
+    python -m bench.bench_lectura_turnos [--filas 5000] [--repeticiones 20]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, time as hora, timedelta
+
+# La base temporal se elige antes de importar la configuración de la app
+_DIR = tempfile.mkdtemp(prefix="petit-bench-")
+os.environ.setdefault("PETIT_DATABASE_URL", f"sqlite:///{_DIR}/bench.db")
+
+import orjson
+from pydantic import TypeAdapter
+
+from src.db.base import engine, SessionLocal
+from src.db.esquema import migrar
+from src.db.cliente_repository import ClienteDB
+from src.db.servicio_repository import ServicioDB
+from src.db.turno_repository import TurnoDB, TurnoRepository
+from src.dto.turno import TurnoDetailOut
+
+FECHA = date(2026, 3, 2)
+VALIDADOR = TypeAdapter(list[TurnoDetailOut])
+
+
+def poblar(filas: int) -> None:
+    """Carga una agenda de `filas` turnos en FECHA y un historial de `filas` turnos del cliente 1"""
+    migrar(engine)
+    with SessionLocal() as db:
+        db.add_all(ServicioDB(nombre=f"Servicio {i}", duracion_min=30, precio=1000 + i, activo=True)
+                   for i in range(20))
+        db.add_all(ClienteDB(nombre=f"Cliente {i}", telefono=f"11{i:06d}") for i in range(filas))
+        db.flush()
+        db.execute(TurnoDB.__table__.insert(), [
+            {"cliente_id": i + 1, "servicio_id": i % 20 + 1, "fecha": FECHA,
+             "hora_inicio": hora(i // 60 % 24, i % 60), "estado": "pendiente"}
+            for i in range(filas)
+        ] + [
+            {"cliente_id": 1, "servicio_id": i % 20 + 1, "fecha": FECHA - timedelta(days=i + 1),
+             "hora_inicio": hora(10, 0), "estado": "completado"}
+            for i in range(filas)
+        ])
+        db.commit()
+
+
+def camino_anterior(db, filtro, orden) -> bytes:
+    """Entidades completas, copia a dict y validación por ítem (como antes)"""
+    turnos = db.query(TurnoDB, ClienteDB, ServicioDB).join(
+        ClienteDB, TurnoDB.cliente_id == ClienteDB.id
+    ).join(
+        ServicioDB, TurnoDB.servicio_id == ServicioDB.id
+    ).filter(filtro).order_by(*orden).all()
+    detalles = [{
+        "id": t.id, "fecha": t.fecha, "hora_inicio": t.hora_inicio, "estado": t.estado,
+        "notas": t.notas, "cliente_nombre": c.nombre, "cliente_telefono": c.telefono,
+        "servicio_nombre": s.nombre, "servicio_duracion_min": s.duracion_min,
+        "servicio_precio": s.precio,
+    } for t, c, s in turnos]
+    db.expunge_all()
+    return VALIDADOR.dump_json(VALIDADOR.validate_python(detalles))
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Mediana en milisegundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    poblar(args.filas)
+    casos = {
+        "agenda del día": (
+            lambda db: camino_anterior(db, TurnoDB.fecha == FECHA, [TurnoDB.hora_inicio]),
+            lambda db: orjson.dumps(TurnoRepository(db).listar_por_fecha(FECHA)),
+        ),
+        "historial cliente": (
+            lambda db: camino_anterior(db, TurnoDB.cliente_id == 1,
+                                       [TurnoDB.fecha.desc(), TurnoDB.hora_inicio.desc()]),
+            lambda db: orjson.dumps(TurnoRepository(db).listar_por_cliente(1)),
+        ),
+    }
+    print(f"{args.filas} filas, mediana de {args.repeticiones} repeticiones")
+    with SessionLocal() as db:
+        for nombre, (anterior, actual) in casos.items():
+            ms_anterior = medir(lambda: anterior(db), args.repeticiones)
+            ms_actual = medir(lambda: actual(db), args.repeticiones)
+            print(f"  {nombre:18} anterior {ms_anterior:8.1f} ms | actual {ms_actual:8.1f} ms"
+                  f" | x{ms_anterior / ms_actual:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Micro-benchmarks de los métodos de cada repositorio sobre la base sintética.
+
+Cada caso abre una sesión nueva por llamada (como un request) y elige sus
+argumentos con una semilla fija, así las corridas son repetibles. Las
+escrituras reservan en días posteriores a los datos generados y se borran
+al terminar.
+
+Uso (desde petit-backend):
+    python -m bench.bench_micro [--repeticiones 200] [--calentamiento 20] [--filtro turnos]
+                                [--salida micro.json] [opciones de bench.datos_salon]
+"""
+import argparse
+import random
+from datetime import date, time, timedelta
+from pathlib import Path
+
+from . import datos_salon
+from .medicion import cronometrar, guardar, usar_base
+
+# Términos de búsqueda: prefijos, medio de palabra, sin acentos y teléfono
+TERMINOS = ["mar", "gonz", "nunez", "lucia perez", "ez", "1155", "sofia", "rodrig"]
+# Horarios sin superposición posible entre servicios de hasta 90 minutos
+HORAS_LIBRES = [time(9 + m // 60, m % 60) for m in range(0, 10 * 60 + 1, 90)]
+
+
+def casos(p: dict) -> dict:
+    """Arma los casos: nombre -> función que recibe una sesión"""
+    from src.db.cliente_repository import ClienteRepository
+    from src.db.servicio_repository import ServicioRepository
+    from src.db.turno_repository import TurnoRepository
+    from src.db.reporte_repository import ReporteRepository
+    from src.dto.turno import TurnoCreate, TurnoUpdate
+
+    azar = random.Random(p["semilla"])
+    inicio = date.fromisoformat(p["fecha_inicio"])
+    fin = date.fromisoformat(p["fecha_fin"])
+    dias = (fin - inicio).days
+
+    def fecha():
+        return inicio + timedelta(days=azar.randrange(dias))
+
+    def cliente():
+        return int(p["clientes"] * azar.random() ** 2) + 1
+
+    reservas = iter(range(10**9))
+
+    def reservar(db):
+        # Días vacíos después de los datos: la reserva nunca choca
+        i = next(reservas)
+        return TurnoRepository(db).crear(TurnoCreate(
+            cliente_id=cliente(), servicio_id=azar.randrange(p["servicios"]) + 1,
+            fecha=fin + timedelta(days=1 + i // len(HORAS_LIBRES)),
+            hora_inicio=HORAS_LIBRES[i % len(HORAS_LIBRES)]
+        ))
+
+    def turno_id():
+        return azar.randrange(p["turnos"]) + 1
+
+    return {
+        "clientes.por_id": lambda db: ClienteRepository(db).por_id(azar.randrange(p["clientes"]) + 1),
+        "clientes.listar": lambda db: ClienteRepository(db).listar(50),
+        "clientes.buscar": lambda db: ClienteRepository(db).buscar(azar.choice(TERMINOS)),
+        "servicios.listar": lambda db: ServicioRepository(db).listar(True, 50),
+        "servicios.por_id": lambda db: ServicioRepository(db).por_id(azar.randrange(p["servicios"]) + 1),
+        "turnos.por_id": lambda db: TurnoRepository(db).por_id(turno_id()),
+        "turnos.listar_por_fecha": lambda db: TurnoRepository(db).listar_por_fecha(fecha()),
+        "turnos.listar_por_rango(7d)": lambda db: (
+            lambda d: TurnoRepository(db).listar_por_rango(d, d + timedelta(days=6))
+        )(fecha()),
+        "turnos.listar_por_cliente": lambda db: TurnoRepository(db).listar_por_cliente(cliente()),
+        "turnos.resumen_cliente": lambda db: TurnoRepository(db).resumen_cliente(cliente()),
+        "turnos.disponibilidad": lambda db: TurnoRepository(db).disponibilidad(
+            fecha(), azar.randrange(p["servicios"]) + 1
+        ),
+        "turnos.crear": reservar,
+        "turnos.actualizar(notas)": lambda db: TurnoRepository(db).actualizar(
+            turno_id(), TurnoUpdate(notas="bench")
+        ),
+        "reportes.ingresos(30d)": lambda db: (
+            lambda d: ReporteRepository(db).ingresos(d, d + timedelta(days=29))
+        )(fecha()),
+        "reportes.asistencia(365d)": lambda db: ReporteRepository(db).asistencia(
+            fin - timedelta(days=364), fin
+        ),
+    }
+
+
+def limpiar(p: dict) -> None:
+    """Borra las reservas hechas por el benchmark"""
+    from src.db.base import engine
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM turnos WHERE fecha > ?", (p["fecha_fin"],))
+        conn.exec_driver_sql("UPDATE turnos SET notas = NULL WHERE notas = 'bench'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--calentamiento", type=int, default=20)
+    parser.add_argument("--filtro", default="", help="Solo los casos que contienen este texto")
+    parser.add_argument("--salida", type=Path, default=None)
+    datos_salon.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    usar_base(args.base)
+    p = datos_salon.preparar_desde_args(args)
+    from src.db.base import SessionLocal
+
+    limpiar(p)
+    resultados = {}
+    try:
+        for nombre, funcion in casos(p).items():
+            if args.filtro not in nombre:
+                continue
+
+            def llamar():
+                with SessionLocal() as db:
+                    funcion(db)
+            resultados[nombre] = cronometrar(llamar, args.repeticiones, args.calentamiento)
+    finally:
+        limpiar(p)
+
+    guardar("micro", {**p, "repeticiones": args.repeticiones, "calentamiento": args.calentamiento},
+            resultados, args.salida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compara dos archivos de resultados (de bench_micro o bench_carga).
+
+Muestra p50/p95/p99 y ops/s de cada caso en ambos y marca como regresión
+los casos cuyo p95 empeoró más que `--umbral` (en %). Sale con código 1 si
+hay regresiones, para poder usarlo en un script de CI.
+
+Uso (desde petit-backend):
+    python -m bench.comparar antes.json despues.json [--umbral 10]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def variacion(antes: float, despues: float) -> float:
+    """Diferencia porcentual (positiva = más alto)"""
+    return (despues - antes) / antes * 100 if antes else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("antes", type=Path)
+    parser.add_argument("despues", type=Path)
+    parser.add_argument("--umbral", type=float, default=10.0, help="%% de empeoramiento del p95 tolerado")
+    args = parser.parse_args()
+
+    antes, despues = (json.loads(ruta.read_text()) for ruta in (args.antes, args.despues))
+    if antes["tipo"] != despues["tipo"]:
+        sys.exit(f"No se pueden comparar resultados '{antes['tipo']}' con '{despues['tipo']}'")
+
+    print(f"{antes['tipo']}: {antes['commit']} -> {despues['commit']}")
+    print(f"  {'caso':34} {'p50 ms':>24} {'p95 ms':>24} {'p99 ms':>24} {'ops/s':>24}")
+    regresiones = []
+    for caso, a in antes["resultados"].items():
+        d = despues["resultados"].get(caso)
+        if d is None:
+            print(f"  {caso:34} (no está en {args.despues.name})")
+            continue
+        columnas = " ".join(
+            f"{a[k]:.2f} -> {d[k]:.2f} ({variacion(a[k], d[k]):+.0f}%)".rjust(24)
+            for k in ("p50_ms", "p95_ms", "p99_ms", "ops_s")
+        )
+        marca = ""
+        if variacion(a["p95_ms"], d["p95_ms"]) > args.umbral:
+            regresiones.append(caso)
+            marca = "  REGRESIÓN"
+        print(f"  {caso:34} {columnas}{marca}")
+
+    if regresiones:
+        print(f"{len(regresiones)} regresiones de p95 mayores a {args.umbral:.0f}%")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
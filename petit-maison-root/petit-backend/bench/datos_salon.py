@@ -0,0 +1,149 @@
+"""
+Generador de datos sintéticos de un salón: clientes, servicios y años de turnos.
+
+Los datos salen de una semilla fija, así dos corridas con los mismos
+parámetros generan la misma base. La base se reutiliza mientras los
+parámetros no cambien (se guardan al lado, en <base>.json).
+
+Los turnos históricos se reparten en la grilla de 15 minutos sin validar
+superposiciones (como si el salón tuviera varias mesas): sirven para medir
+lecturas con agendas cargadas. Las reservas de los benchmarks van a días
+posteriores a FECHA_FIN, que quedan libres.
+
+Uso (desde petit-backend):
+    python -m bench.datos_salon [--base RUTA] [--clientes 50000] [--servicios 20]
+                                [--turnos 2000000] [--anios 5] [--regenerar]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from .medicion import BASE_DEFECTO, usar_base
+
+SEMILLA = 20260301
+HOY = date(2026, 3, 1)        # Antes de HOY los turnos están cerrados, después abiertos
+FECHA_FIN = date(2026, 3, 31)
+TANDA = 50_000
+
+NOMBRES = ["Ana", "María", "Lucía", "Sofía", "Valentina", "Camila", "Martina", "Julieta",
+           "Florencia", "Agustina", "Carla", "Paula", "Romina", "Natalia", "Laura", "Rocío",
+           "Micaela", "Daniela", "Gabriela", "Victoria", "Juan", "Martín", "Lucas", "Diego"]
+APELLIDOS = ["González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez",
+             "Pérez", "García", "Sánchez", "Romero", "Sosa", "Álvarez", "Torres", "Ruiz",
+             "Ramírez", "Flores", "Benítez", "Acosta", "Medina", "Herrera", "Suárez", "Núñez"]
+SERVICIOS = ["Manicura", "Pedicura", "Esmaltado semipermanente", "Kapping", "Uñas esculpidas",
+             "Service de esculpidas", "Nail art", "Spa de manos", "Spa de pies", "Retiro",
+             "Soft gel", "Polygel", "Francesita", "Baño de acrílico", "Limado y forma",
+             "Parafina", "Belleza de pies", "Manicura rusa", "Decoración 3D", "Reconstrucción"]
+
+# Reparto de estados de los turnos pasados y futuros
+ESTADOS_PASADO = (["completado"] * 82 + ["cancelado"] * 10 + ["no_asistio"] * 6 + ["confirmado"] * 2)
+ESTADOS_FUTURO = ["pendiente"] * 60 + ["confirmado"] * 35 + ["cancelado"] * 5
+
+
+def _ruta_parametros(base: Path) -> Path:
+    return base.with_name(base.name + ".json")
+
+
+def preparar(base: Path, clientes: int = 50_000, servicios: int = 20, turnos: int = 2_000_000,
+             anios: int = 5, regenerar: bool = False) -> dict:
+    """Devuelve los parámetros de la base, generándola si falta o si cambiaron"""
+    parametros = {
+        "clientes": clientes, "servicios": servicios, "turnos": turnos, "anios": anios,
+        "semilla": SEMILLA, "hoy": HOY.isoformat(), "fecha_fin": FECHA_FIN.isoformat(),
+        "fecha_inicio": (FECHA_FIN - timedelta(days=365 * anios)).isoformat(),
+    }
+    guardados = _ruta_parametros(base)
+    if not regenerar and base.exists() and guardados.exists():
+        if json.loads(guardados.read_text()) == parametros:
+            return parametros
+
+    for archivo in (base, base.with_name(base.name + "-wal"), base.with_name(base.name + "-shm"), guardados):
+        archivo.unlink(missing_ok=True)
+    inicio = time.perf_counter()
+    _generar(parametros)
+    print(f"Base generada en {time.perf_counter() - inicio:.1f} s: {base}")
+    guardados.write_text(json.dumps(parametros))
+    return parametros
+
+
+def _generar(p: dict) -> None:
+    """Llena la base con los datos de `p` (la app ya tiene que apuntar a ella)"""
+    from src.db.base import engine
+    from src.db.esquema import migrar
+    from src.db import busqueda_clientes, resumen_diario, versiones
+
+    azar = random.Random(p["semilla"])
+    migrar(engine)
+    with engine.begin() as conn:
+        # Sin triggers la carga es mucho más rápida; el resumen se arma al final de una vez
+        for nombre in (*resumen_diario.TRIGGERS, *versiones.TRIGGERS_AGENDA):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nombre}")
+
+        precios = [round(azar.uniform(8, 40)) * 500 for _ in range(p["servicios"])]
+        conn.exec_driver_sql(
+            "INSERT INTO servicios (nombre, duracion_min, precio, activo) VALUES (?, ?, ?, 1)",
+            [(SERVICIOS[i % len(SERVICIOS)] + ("" if i < len(SERVICIOS) else f" {i}"),
+              azar.choice([30, 45, 60, 90]), precios[i]) for i in range(p["servicios"])]
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO clientes (nombre, telefono, email, created_at) VALUES (?, ?, ?, '2021-01-01 00:00:00')",
+            [(f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)}", f"11{azar.randrange(10**8):08d}",
+              f"cliente{i}@example.com" if azar.random() < 0.4 else None) for i in range(p["clientes"])]
+        )
+        busqueda_clientes.reconstruir(conn)
+
+        dias = [d for d in _dias(date.fromisoformat(p["fecha_inicio"]), FECHA_FIN) if d.weekday() != 6]
+        horas = [f"{9 + m // 60:02d}:{m % 60:02d}:00.000000" for m in range(0, 11 * 60, 15)]
+        for desde in range(0, p["turnos"], TANDA):
+            filas = []
+            for _ in range(min(TANDA, p["turnos"] - desde)):
+                dia = azar.choice(dias)
+                servicio = azar.randrange(p["servicios"])
+                # Pocos clientes concentran muchos turnos (clientas habituales)
+                cliente = int(p["clientes"] * azar.random() ** 2) + 1
+                estado = azar.choice(ESTADOS_PASADO if dia < HOY else ESTADOS_FUTURO)
+                filas.append((cliente, servicio + 1, dia.isoformat(), azar.choice(horas), estado,
+                              precios[servicio], f"{dia.isoformat()} 08:00:00"))
+            conn.exec_driver_sql(
+                "INSERT INTO turnos (cliente_id, servicio_id, fecha, hora_inicio, estado, precio, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", filas
+            )
+
+        # Con el resumen vacío, crear_triggers lo reconstruye desde turnos
+        resumen_diario.crear_triggers(conn)
+        versiones.crear_triggers_agenda(conn)
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _dias(desde: date, hasta: date) -> list[date]:
+    return [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+    usar_base(args.base)
+    print(json.dumps(preparar_desde_args(args), indent=2))
+
+
+def agregar_argumentos(parser: argparse.ArgumentParser) -> None:
+    """Argumentos del generador, compartidos por los benchmarks que lo usan"""
+    parser.add_argument("--base", type=Path, default=BASE_DEFECTO)
+    parser.add_argument("--clientes", type=int, default=50_000)
+    parser.add_argument("--servicios", type=int, default=20)
+    parser.add_argument("--turnos", type=int, default=2_000_000)
+    parser.add_argument("--anios", type=int, default=5)
+    parser.add_argument("--regenerar", action="store_true")
+
+
+def preparar_desde_args(args: argparse.Namespace) -> dict:
+    return preparar(args.base, args.clientes, args.servicios, args.turnos, args.anios, args.regenerar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Utilidades comunes de los benchmarks: elegir la base, juntar latencias y
+guardar resultados en JSON comparables entre commits (ver bench.comparar).
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+BASE_DEFECTO = Path(tempfile.gettempdir()) / "petit-bench-salon.db"
+
+
+def usar_base(ruta: Path) -> None:
+    """Apunta la app a `ruta`; hay que llamarla antes de importar src.db.base"""
+    if "src.db.base" in sys.modules:
+        raise RuntimeError("usar_base() tiene que llamarse antes de importar la app")
+    os.environ["PETIT_DATABASE_URL"] = f"sqlite:///{ruta}"
+    os.environ.setdefault("PETIT_LOG_LEVEL", "WARNING")
+
+
+def resumir(latencias_ms: list[float], segundos: float) -> dict:
+    """p50/p95/p99 en ms y operaciones por segundo"""
+    if len(latencias_ms) < 2:
+        valor = latencias_ms[0] if latencias_ms else 0.0
+        return {"n": len(latencias_ms), "p50_ms": valor, "p95_ms": valor, "p99_ms": valor, "ops_s": 0.0}
+    cuantiles = statistics.quantiles(latencias_ms, n=100, method="inclusive")
+    return {
+        "n": len(latencias_ms),
+        "p50_ms": round(cuantiles[49], 3),
+        "p95_ms": round(cuantiles[94], 3),
+        "p99_ms": round(cuantiles[98], 3),
+        "ops_s": round(len(latencias_ms) / segundos, 1) if segundos else 0.0,
+    }
+
+
+def cronometrar(funcion: Callable[[], object], repeticiones: int, calentamiento: int) -> dict:
+    """Corre `funcion` en serie y resume sus latencias"""
+    for _ in range(calentamiento):
+        funcion()
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        latencias.append((time.perf_counter() - t0) * 1000)
+    return resumir(latencias, time.perf_counter() - inicio)
+
+
+def _commit() -> str:
+    """Commit actual (con '+' si hay cambios sin commitear)"""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True).stdout.strip()
+        sucio = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return sha + ("+" if sucio else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def guardar(tipo: str, parametros: dict, resultados: dict, salida: Path | None) -> dict:
+    """Arma el documento de resultados, lo imprime como tabla y lo guarda si hay `salida`"""
+    documento = {
+        "tipo": tipo,
+        "commit": _commit(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": parametros,
+        "resultados": resultados,
+    }
+    print(f"{tipo} @ {documento['commit']}")
+    print(f"  {'caso':34} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9}")
+    for caso, r in resultados.items():
+        print(f"  {caso:34} {r['n']:7d} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} {r['ops_s']:9.1f}")
+    if salida:
+        salida.write_text(json.dumps(documento, indent=2, ensure_ascii=False))
+        print(f"Resultados en {salida}")
+    return documento
@@ -0,0 +1,62 @@
+"""
+Fábrica de la aplicación.
+Importar este módulo no abre la base: las migraciones y el log de la
+configuración corren en el arranque (lifespan). Los routers de cada recurso
+se importan recién al armar la app, y se puede pedir solo un subconjunto
+(p. ej. un worker que solo atiende turnos).
+"""
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from importlib import import_module
+from typing import Iterable
+
+from fastapi import FastAPI
+
+from .metricas import MiddlewareMetricas, instrumentar_sql
+from .salones import MiddlewareSalon
+
+# Recursos disponibles: cada uno es un módulo en api/routers con un `router`
+RECURSOS = ("usuarios", "clientes", "servicios", "turnos", "reportes", "metricas")
+
+logger = logging.getLogger("petit.api")
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """Arranque: migra el esquema de la base principal (las de los salones se
+    migran al primer uso), deja la configuración de la base en el log
+    y, con PETIT_RECORDATORIOS_CADA_MIN, arranca el programador de recordatorios"""
+    from ..db.base import engine, registrar_configuracion
+    from ..db.esquema import migrar
+    from ..services import recordatorios
+
+    version = migrar(engine)
+    registrar_configuracion(engine)
+    logger.info("Esquema en versión %d", version)
+
+    programador = None
+    if recordatorios.CADA_MINUTOS > 0:
+        enviador = recordatorios.crear_enviador(recordatorios.ENVIADOR)
+        programador = asyncio.create_task(recordatorios.programar(enviador, recordatorios.CADA_MINUTOS))
+    yield
+    if programador is not None:
+        programador.cancel()
+
+
+def crear_app(recursos: Iterable[str] = RECURSOS) -> FastAPI:
+    """Arma la app con los routers de `recursos`"""
+    logging.basicConfig(level=os.getenv("PETIT_LOG_LEVEL", "INFO"))
+    app = FastAPI(
+        title="Petit Maison API", description="Sistema de gestión de turnos para manicura",
+        lifespan=ciclo_de_vida
+    )
+    instrumentar_sql()
+    app.add_middleware(MiddlewareSalon)
+    app.add_middleware(MiddlewareMetricas)
+    for recurso in recursos:
+        if recurso not in RECURSOS:
+            raise ValueError(f"Recurso desconocido: {recurso}")
+        app.include_router(import_module(f".routers.{recurso}", __package__).router)
+    return app
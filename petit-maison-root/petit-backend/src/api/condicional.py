@@ -0,0 +1,44 @@
+"""
+GET condicionales: ETag fuerte a partir de contadores de versión.
+El ETag se calcula sin tocar las filas (una lectura por clave en `versiones`),
+así un If-None-Match que coincide se contesta 304 sin consultar ni serializar.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+from ..db.base import salon_actual
+
+# Los clientes tienen que revalidar siempre, pero pueden guardar la copia
+CACHE_CONTROL = "private, no-cache"
+# La misma URL cambia según el salón (ver api/salones)
+VARY = "X-Salon"
+
+
+def etag(*partes: object) -> str:
+    """ETag fuerte (opaco) para una combinación de versiones del salón actual"""
+    # Cada salón cuenta sus versiones desde cero: sin el salón, dos bases distintas darían el mismo ETag
+    partes = (salon_actual.get() or "", *partes)
+    digest = hashlib.blake2b(":".join(map(str, partes)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def no_modificado(request: Request, valor: str) -> bool:
+    """Indica si el If-None-Match del request incluye `valor` (comparación débil, RFC 9110)"""
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return False
+    if cabecera.strip() == "*":
+        return True
+    candidatos = (c.strip().removeprefix("W/") for c in cabecera.split(","))
+    return valor in candidatos
+
+
+def cabeceras(valor: str) -> dict[str, str]:
+    """Cabeceras de caché de una respuesta con ETag"""
+    return {"ETag": valor, "Cache-Control": CACHE_CONTROL, "Vary": VARY}
+
+
+def respuesta_304(valor: str) -> Response:
+    """304 Not Modified, sin cuerpo"""
+    return Response(status_code=304, headers=cabeceras(valor))
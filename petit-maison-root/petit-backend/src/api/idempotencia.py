@@ -0,0 +1,151 @@
+"""
+Idempotency-Key para los POST que crean filas (turnos, clientes).
+Con la cabecera, el primer request se ejecuta y su respuesta queda guardada
+(ver idempotencia_repository); un reintento con la misma clave recibe esa
+misma respuesta, con Idempotent-Replayed: true, sin pasar por el servicio ni
+los repositorios. Los errores 4xx también se guardan (el reintento daría lo
+mismo); un 5xx suelta la clave para que el reintento se ejecute.
+
+Los duplicados simultáneos no compiten con el primero: dentro del proceso
+esperan su resultado en memoria, y si el primero está en otro proceso
+consultan la base con espera creciente, hasta ESPERA_SEGUNDOS (después, 409).
+Una clave reusada con otro cuerpo u otra ruta es un 422.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional, TypeVar
+
+import orjson
+from fastapi import HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.base import salon_actual, reintentar_si_bloqueada_async
+from ..db.idempotencia_repository import IdempotenciaRepository, LISTO
+from .metricas import Contador, registrar
+
+T = TypeVar("T")
+
+ESPERA_SEGUNDOS = float(os.getenv("PETIT_IDEMPOTENCIA_ESPERA", 10))
+PAUSA_INICIAL = 0.05
+PAUSA_MAXIMA = 0.5
+LARGO_CLAVE = 255
+
+EN_CURSO = "Hay un request en curso con la misma Idempotency-Key"
+
+IDEMPOTENCIA = registrar(Contador(
+    "petit_idempotencia_total", "Requests con Idempotency-Key por resultado", ("resultado",)
+))
+
+
+class Guardada(NamedTuple):
+    """Respuesta guardada de una clave"""
+    huella: str
+    codigo: int
+    cuerpo: bytes
+
+
+# Claves en ejecución en este proceso (por salón): los duplicados esperan este resultado
+_en_curso: dict[tuple[Optional[str], str], asyncio.Future] = {}
+
+
+async def idempotente(request: Request, db: AsyncSession, clave: Optional[str], datos: BaseModel,
+                      modelo: type[BaseModel], ejecutar: Callable[[], Awaitable[object]]):
+    """Ejecuta `ejecutar` una sola vez por Idempotency-Key; sin clave, lo ejecuta siempre"""
+    if clave is None:
+        return await ejecutar()
+    if not 0 < len(clave) <= LARGO_CLAVE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key inválida")
+
+    huella = hashlib.blake2b(
+        f"{request.method} {request.url.path}\n{datos.model_dump_json()}".encode(), digest_size=16
+    ).hexdigest()
+    llave = (salon_actual.get(), clave)
+    primero = _en_curso.get(llave)
+    if primero is not None:
+        # Duplicado dentro del proceso: espera al primero sin ir a la base
+        try:
+            guardada = await asyncio.wait_for(asyncio.shield(primero), ESPERA_SEGUNDOS)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=EN_CURSO)
+        if guardada is None:
+            # El primero falló sin respuesta: este se ejecuta (o espera al que siga)
+            return await idempotente(request, db, clave, datos, modelo, ejecutar)
+        IDEMPOTENCIA.incrementar("esperada")
+        return _responder(guardada, huella, repetida=True)
+
+    futuro = asyncio.get_running_loop().create_future()
+    _en_curso[llave] = futuro
+    guardada = None
+    try:
+        guardada = await _reservar(db, clave, huella)
+        if guardada is not None:
+            IDEMPOTENCIA.incrementar("repetida")
+            return _responder(guardada, huella, repetida=True)
+        try:
+            guardada = await _ejecutar(db, huella, modelo, ejecutar)
+        except BaseException:
+            await _en_base(db, lambda repo: repo.liberar(clave))
+            raise
+        await _en_base(db, lambda repo: repo.completar(clave, guardada.codigo, guardada.cuerpo))
+        IDEMPOTENCIA.incrementar("nueva")
+        return _responder(guardada, huella, repetida=False)
+    finally:
+        del _en_curso[llave]
+        futuro.set_result(guardada)
+
+
+async def _reservar(db: AsyncSession, clave: str, huella: str) -> Optional[Guardada]:
+    """Reserva la clave (None) o devuelve la respuesta guardada; si otro proceso la está ejecutando, espera"""
+    limite = time.monotonic() + ESPERA_SEGUNDOS
+    pausa = PAUSA_INICIAL
+    while True:
+        fila = await _en_base(db, lambda repo: repo.reservar(clave, huella))
+        if fila is None:
+            return None
+        if fila.estado == LISTO:
+            return Guardada(fila.huella, fila.codigo, fila.cuerpo)
+        if fila.huella != huella:
+            _otro_request()
+        if time.monotonic() + pausa > limite:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=EN_CURSO)
+        await asyncio.sleep(pausa)
+        pausa = min(pausa * 2, PAUSA_MAXIMA)
+
+
+async def _ejecutar(db: AsyncSession, huella: str, modelo: type[BaseModel],
+                    ejecutar: Callable[[], Awaitable[object]]) -> Guardada:
+    """Ejecuta el request y arma la respuesta a guardar (los 5xx no se guardan)"""
+    try:
+        resultado = await ejecutar()
+    except HTTPException as error:
+        if error.status_code >= 500:
+            raise
+        await db.rollback()
+        return Guardada(huella, error.status_code, orjson.dumps({"detail": error.detail}))
+    return Guardada(huella, status.HTTP_200_OK, modelo.model_validate(resultado).model_dump_json().encode())
+
+
+async def _en_base(db: AsyncSession, operacion: Callable[[IdempotenciaRepository], T]) -> T:
+    """Corre una operación sobre las claves guardadas (reintenta si la base está bloqueada)"""
+    return await reintentar_si_bloqueada_async(
+        db, lambda: db.run_sync(lambda session: operacion(IdempotenciaRepository(session)))
+    )
+
+
+def _responder(guardada: Guardada, huella: str, repetida: bool) -> Response:
+    if guardada.huella != huella:
+        _otro_request()
+    return Response(
+        content=guardada.cuerpo, status_code=guardada.codigo, media_type="application/json",
+        headers={"Idempotent-Replayed": "true"} if repetida else None,
+    )
+
+
+def _otro_request() -> None:
+    raise HTTPException(
+        status_code=422,  # El nombre de la constante cambió entre versiones de Starlette
+        detail="La Idempotency-Key ya se usó con otro request",
+    )
@@ -0,0 +1,229 @@
+"""
+Instrumentación de requests y SQL.
+
+- Los eventos before/after_cursor_execute (registrados en la clase Engine, así
+  cubren el motor sync, el async y cualquier otro) cuentan y cronometran cada
+  sentencia y la suman al request en curso (contextvar).
+- MiddlewareMetricas mide cada request y lo registra por ruta (la plantilla,
+  p. ej. /turnos/agenda/{fecha}, no la URL) en histogramas que /metrics
+  expone en formato de texto de Prometheus.
+- Las sentencias más lentas que PETIT_SQL_LENTA_MS se loguean con la forma de
+  sus parámetros (tipos y cantidad, nunca los valores).
+- Con PETIT_SERVER_TIMING=1 cada respuesta lleva un header Server-Timing con
+  el desglose sql/app, visible en las herramientas del navegador.
+"""
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import Engine, event
+
+logger = logging.getLogger("petit.sql")
+
+SQL_LENTA_MS = float(os.getenv("PETIT_SQL_LENTA_MS", 100))
+SERVER_TIMING = os.getenv("PETIT_SERVER_TIMING", "0").lower() in ("1", "true", "si")
+
+# Límites de los buckets (segundos y cantidad de sentencias)
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+class Histograma:
+    """Histograma con etiquetas, en el formato de exposición de Prometheus"""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...], buckets: tuple[float, ...]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        # valores de etiquetas -> [conteo por bucket..., +Inf], suma
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = Lock()
+
+    def observar(self, valor: float, *etiquetas: str) -> None:
+        with self._lock:
+            conteos, suma = self._series.setdefault(etiquetas, ([0] * (len(self.buckets) + 1), [0.0]))
+            conteos[bisect_left(self.buckets, valor)] += 1
+            suma[0] += valor
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = [(k, list(c), s[0]) for k, (c, s) in sorted(self._series.items())]
+        for valores, conteos, suma in series:
+            base = ",".join(f'{e}="{_escapar(v)}"' for e, v in zip(self.etiquetas, valores))
+            acumulado = 0
+            for limite, conteo in zip((*self.buckets, "+Inf"), conteos):
+                acumulado += conteo
+                le = 'le="' + (limite if limite == "+Inf" else _numero(limite)) + '"'
+                lineas.append(f"{self.nombre}_bucket{{{_unir(base, le)}}} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{{{base}}} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{{{base}}} {acumulado}")
+        return lineas
+
+
+class Contador:
+    """Contador con etiquetas, en el formato de exposición de Prometheus"""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores: dict[tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def incrementar(self, *etiquetas: str, valor: float = 1) -> None:
+        with self._lock:
+            self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            valores = sorted(self._valores.items())
+        for etiquetas, valor in valores:
+            base = ",".join(f'{e}="{_escapar(v)}"' for e, v in zip(self.etiquetas, etiquetas))
+            lineas.append(f"{self.nombre}{{{base}}} {_numero(valor)}")
+        return lineas
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _unir(*partes: str) -> str:
+    return ",".join(p for p in partes if p)
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+DURACION_REQUEST = Histograma(
+    "petit_http_request_duracion_segundos", "Duración total del request",
+    ("metodo", "ruta", "codigo"), BUCKETS_SEGUNDOS
+)
+CONSULTAS_REQUEST = Histograma(
+    "petit_http_request_consultas_sql", "Sentencias SQL ejecutadas por request",
+    ("metodo", "ruta"), BUCKETS_CONSULTAS
+)
+SQL_REQUEST = Histograma(
+    "petit_http_request_sql_segundos", "Tiempo en SQL por request",
+    ("metodo", "ruta"), BUCKETS_SEGUNDOS
+)
+DURACION_SQL = Histograma(
+    "petit_sql_duracion_segundos", "Duración de cada sentencia SQL",
+    ("operacion",), BUCKETS_SEGUNDOS
+)
+SQL_LENTAS = Contador(
+    "petit_sql_lentas_total", "Sentencias más lentas que PETIT_SQL_LENTA_MS", ("operacion",)
+)
+METRICAS = [DURACION_REQUEST, CONSULTAS_REQUEST, SQL_REQUEST, DURACION_SQL, SQL_LENTAS]
+
+
+def registrar(metrica: Histograma | Contador) -> Histograma | Contador:
+    """Agrega una métrica de otro módulo a las que expone /metrics"""
+    METRICAS.append(metrica)
+    return metrica
+
+
+@dataclass
+class MedicionRequest:
+    """Lo que acumula un request mientras corre"""
+    consultas: int = 0
+    segundos_sql: float = 0.0
+
+
+_medicion: ContextVar[Optional[MedicionRequest]] = ContextVar("petit_medicion", default=None)
+
+
+def forma_parametros(parametros) -> str:
+    """Describe los parámetros sin sus valores: '(int, str)', '3 x {id: int}'"""
+    if isinstance(parametros, list):
+        if not parametros:
+            return "[]"
+        return f"{len(parametros)} x {forma_parametros(parametros[0])}"
+    if isinstance(parametros, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parametros.items()) + "}"
+    if isinstance(parametros, (tuple, set)):
+        return "(" + ", ".join(type(v).__name__ for v in parametros) + ")"
+    return type(parametros).__name__
+
+
+def _antes(conn, cursor, sentencia, parametros, contexto, executemany):
+    conn.info["petit_inicio"] = time.perf_counter()
+
+
+def _despues(conn, cursor, sentencia, parametros, contexto, executemany):
+    inicio = conn.info.pop("petit_inicio", None)
+    if inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    operacion = sentencia.lstrip().split(None, 1)[0].upper() if sentencia.strip() else "?"
+    DURACION_SQL.observar(segundos, operacion)
+
+    medicion = _medicion.get()
+    if medicion is not None:
+        medicion.consultas += 1
+        medicion.segundos_sql += segundos
+
+    if segundos * 1000 >= SQL_LENTA_MS:
+        SQL_LENTAS.incrementar(operacion)
+        logger.warning(
+            "SQL lenta (%.1f ms): %s | parámetros: %s",
+            segundos * 1000, " ".join(sentencia.split())[:500], forma_parametros(parametros)
+        )
+
+
+def instrumentar_sql() -> None:
+    """Registra los eventos en todos los motores (idempotente)"""
+    if not event.contains(Engine, "before_cursor_execute", _antes):
+        event.listen(Engine, "before_cursor_execute", _antes)
+        event.listen(Engine, "after_cursor_execute", _despues)
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: mide cada request y junta sus sentencias SQL"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        medicion = MedicionRequest()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        codigo = 500
+
+        async def enviar(mensaje):
+            nonlocal codigo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+                if SERVER_TIMING:
+                    app_ms = (time.perf_counter() - inicio - medicion.segundos_sql) * 1000
+                    valor = (f'sql;dur={medicion.segundos_sql * 1000:.2f};desc="{medicion.consultas} consultas", '
+                             f"app;dur={app_ms:.2f}")
+                    mensaje["headers"] = [*mensaje.get("headers", []), (b"server-timing", valor.encode())]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicion.reset(token)
+            ruta = getattr(scope.get("route"), "path", "sin_ruta")
+            metodo = scope["method"]
+            DURACION_REQUEST.observar(time.perf_counter() - inicio, metodo, ruta, str(codigo))
+            CONSULTAS_REQUEST.observar(medicion.consultas, metodo, ruta)
+            SQL_REQUEST.observar(medicion.segundos_sql, metodo, ruta)
+
+
+def exponer() -> str:
+    """Todas las métricas en formato de texto de Prometheus"""
+    return "\n".join(linea for metrica in METRICAS for linea in metrica.exponer()) + "\n"
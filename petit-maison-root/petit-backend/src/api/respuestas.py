@@ -0,0 +1,18 @@
+"""
+Respuestas JSON serializadas con orjson.
+Los listados de turnos ya salen del repositorio como diccionarios con los
+tipos finales: devolverlos en RespuestaJSON evita que FastAPI los valide de
+nuevo contra el response_model (que queda solo para la documentación).
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+
+class RespuestaJSON(Response):
+    """Respuesta application/json renderizada con orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
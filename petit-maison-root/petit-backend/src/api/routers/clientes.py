@@ -0,0 +1,88 @@
+"""Endpoints de clientes"""
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ...dto.paginacion import Pagina
+from ...dto.archivo import FormatoArchivo, ResultadoImportacion
+from ...dto.cliente import ClienteCreate, ClienteUpdate, ClienteOut
+from ...db.base import get_async_db, sesiones_async
+from ...db.cliente_repository import ClienteRepository
+from ...db.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO
+from ...services.async_services import ClienteServiceAsync
+from ...services.importacion import importar, detectar_formato
+from ...services.exportacion import exportar, TIPOS_MEDIO
+from ..condicional import etag, no_modificado, cabeceras, respuesta_304
+from ..idempotencia import idempotente
+
+router = APIRouter(prefix="/clientes", tags=["Clientes"])
+
+
+@router.post("/", response_model=ClienteOut)
+async def crear_cliente(data: ClienteCreate, request: Request,
+                        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+                        db: AsyncSession = Depends(get_async_db)):
+    """Crea un nuevo cliente. Con Idempotency-Key, los reintentos reciben la misma respuesta"""
+    service = ClienteServiceAsync(db)
+    return await idempotente(request, db, idempotency_key, data, ClienteOut, lambda: service.crear_cliente(data))
+
+@router.get("/", response_model=Pagina[ClienteOut])
+async def obtener_clientes(request: Request, response: Response,
+                           limite: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                           cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Lista los clientes por páginas (usar next_cursor para pedir la siguiente). Admite If-None-Match"""
+    service = ClienteServiceAsync(db)
+    # El ETag incluye los parámetros: cada página es otra representación
+    version = etag("clientes", await service.version_clientes(), limite, cursor)
+    if no_modificado(request, version):
+        return respuesta_304(version)
+    response.headers.update(cabeceras(version))
+    return await service.obtener_clientes(limite, cursor)
+
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_clientes(request: Request, formato: Optional[FormatoArchivo] = None,
+                            db: AsyncSession = Depends(get_async_db)):
+    """Importa clientes desde CSV o NDJSON (columnas: nombre, telefono, email, notas)"""
+    service = ClienteServiceAsync(db)
+    return await importar(await request.body(), detectar_formato(request, formato),
+                          ClienteCreate, service.crear_clientes_lote)
+
+@router.get("/exportar")
+async def exportar_clientes(formato: FormatoArchivo = FormatoArchivo.CSV):
+    """Descarga todos los clientes en CSV o NDJSON"""
+    return StreamingResponse(
+        exportar(sesiones_async(), ClienteRepository.consulta_exportacion(), formato),
+        media_type=TIPOS_MEDIO[formato],
+        headers={"Content-Disposition": f"attachment; filename=clientes.{formato.value}"}
+    )
+
+@router.get("/buscar/{termino}", response_model=list[ClienteOut])
+async def buscar_clientes(termino: str, limite: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(get_async_db)):
+    """Busca clientes por nombre o teléfono (ordenados por relevancia)"""
+    service = ClienteServiceAsync(db)
+    return await service.buscar_clientes(termino, limite)
+
+@router.get("/{id}", response_model=ClienteOut)
+async def obtener_cliente(id: int, request: Request, response: Response,
+                          db: AsyncSession = Depends(get_async_db)):
+    """Obtiene un cliente por ID. Admite If-None-Match"""
+    service = ClienteServiceAsync(db)
+    version = etag("clientes", id, await service.version_clientes())
+    if no_modificado(request, version):
+        return respuesta_304(version)
+    response.headers.update(cabeceras(version))
+    return await service.obtener_cliente(id)
+
+@router.put("/{id}", response_model=ClienteOut)
+async def actualizar_cliente(id: int, data: ClienteUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Actualiza un cliente"""
+    service = ClienteServiceAsync(db)
+    return await service.actualizar_cliente(id, data)
+
+@router.delete("/{id}")
+async def eliminar_cliente(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Elimina un cliente"""
+    service = ClienteServiceAsync(db)
+    await service.eliminar_cliente(id)
+    return {"message": "Cliente eliminado"}
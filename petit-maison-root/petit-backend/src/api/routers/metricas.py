@@ -0,0 +1,13 @@
+"""Endpoint de métricas para Prometheus"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..metricas import exponer
+
+router = APIRouter(tags=["Métricas"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metricas():
+    """Métricas de requests y SQL en formato de texto de Prometheus"""
+    return PlainTextResponse(exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,25 @@
+"""Endpoints de reportes (leen solo el resumen diario)"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+
+from ...dto.reporte import ReporteIngresosOut, AsistenciaOut
+from ...db.base import get_async_db
+from ...services.async_services import ReporteServiceAsync
+
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+
+@router.get("/ingresos", response_model=ReporteIngresosOut)
+async def reporte_ingresos(desde: date, hasta: date, servicio_id: Optional[int] = None,
+                           db: AsyncSession = Depends(get_async_db)):
+    """Ingresos por día y servicio (turnos completados, al precio de la reserva)"""
+    service = ReporteServiceAsync(db)
+    return await service.obtener_ingresos(desde, hasta, servicio_id)
+
+@router.get("/asistencia", response_model=list[AsistenciaOut])
+async def reporte_asistencia(desde: date, hasta: date, db: AsyncSession = Depends(get_async_db)):
+    """Tasas de ausencia y cancelación por servicio; la última fila es el total"""
+    service = ReporteServiceAsync(db)
+    return await service.obtener_asistencia(desde, hasta)
@@ -0,0 +1,56 @@
+"""Endpoints de servicios"""
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ...dto.paginacion import Pagina
+from ...dto.servicio import ServicioCreate, ServicioUpdate, ServicioOut
+from ...db.base import get_async_db
+from ...db.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO
+from ...services.async_services import ServicioServiceAsync
+from ..condicional import etag, no_modificado, cabeceras, respuesta_304
+
+router = APIRouter(prefix="/servicios", tags=["Servicios"])
+
+
+@router.post("/", response_model=ServicioOut)
+async def crear_servicio(data: ServicioCreate, db: AsyncSession = Depends(get_async_db)):
+    """Crea un nuevo servicio de manicura"""
+    service = ServicioServiceAsync(db)
+    return await service.crear_servicio(data)
+
+@router.get("/", response_model=Pagina[ServicioOut])
+async def obtener_servicios(request: Request, response: Response, solo_activos: bool = True,
+                            limite: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                            cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Lista servicios por páginas (por defecto solo activos). Admite If-None-Match"""
+    service = ServicioServiceAsync(db)
+    # El ETag incluye los parámetros: cada consulta es otra representación
+    version = etag("servicios", await service.version_servicios(), solo_activos, limite, cursor)
+    if no_modificado(request, version):
+        return respuesta_304(version)
+    response.headers.update(cabeceras(version))
+    return await service.obtener_servicios(solo_activos, limite, cursor)
+
+@router.get("/{id}", response_model=ServicioOut)
+async def obtener_servicio(id: int, request: Request, response: Response,
+                           db: AsyncSession = Depends(get_async_db)):
+    """Obtiene un servicio por ID. Admite If-None-Match"""
+    service = ServicioServiceAsync(db)
+    version = etag("servicios", id, await service.version_servicios())
+    if no_modificado(request, version):
+        return respuesta_304(version)
+    response.headers.update(cabeceras(version))
+    return await service.obtener_servicio(id)
+
+@router.put("/{id}", response_model=ServicioOut)
+async def actualizar_servicio(id: int, data: ServicioUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Actualiza un servicio"""
+    service = ServicioServiceAsync(db)
+    return await service.actualizar_servicio(id, data)
+
+@router.delete("/{id}", response_model=ServicioOut)
+async def desactivar_servicio(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Desactiva un servicio (no lo elimina)"""
+    service = ServicioServiceAsync(db)
+    return await service.desactivar_servicio(id)
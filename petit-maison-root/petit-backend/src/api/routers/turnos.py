@@ -0,0 +1,181 @@
+"""Endpoints de turnos y agenda"""
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
+
+from ...dto.archivo import FormatoArchivo, ResultadoImportacion
+from ...dto.paginacion import Pagina
+from ...dto.turno import (
+    TurnoCreate, TurnoUpdate, TurnoOut, TurnoDetailOut, SlotOut,
+    AgendaDiaOut, EstadoTurno, TurnoImport, SerieCreate, SerieUpdate, SerieOut, ResumenClienteOut,
+    CambioEstadoLote, CierreDia, LoteEstadoOut
+)
+from ...db.base import get_async_db, sesiones_async
+from ...db.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO
+from ...db.turno_repository import TurnoRepository
+from ...services.async_services import TurnoServiceAsync
+from ...services.importacion import importar, detectar_formato
+from ...services.exportacion import exportar, TIPOS_MEDIO
+from ...services.agenda_en_vivo import transmitir
+from ..respuestas import RespuestaJSON
+from ..condicional import etag, no_modificado, cabeceras, respuesta_304
+from ..idempotencia import idempotente
+
+router = APIRouter(prefix="/turnos", tags=["Turnos"])
+
+
+@router.post("/", response_model=TurnoOut)
+async def crear_turno(data: TurnoCreate, request: Request,
+                      idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+                      db: AsyncSession = Depends(get_async_db)):
+    """Agenda un nuevo turno. Con Idempotency-Key, los reintentos reciben la misma respuesta"""
+    service = TurnoServiceAsync(db)
+    return await idempotente(request, db, idempotency_key, data, TurnoOut, lambda: service.crear_turno(data))
+
+@router.post("/serie", response_model=SerieOut)
+async def crear_serie(data: SerieCreate, db: AsyncSession = Depends(get_async_db)):
+    """Agenda una serie de turnos semanales o quincenales (todos o ninguno)"""
+    service = TurnoServiceAsync(db)
+    return await service.crear_serie(data)
+
+@router.put("/serie/{serie_id}", response_model=list[TurnoOut])
+async def actualizar_serie(serie_id: int, desde: date, data: SerieUpdate,
+                           db: AsyncSession = Depends(get_async_db)):
+    """Actualiza el turno de la serie en la fecha `desde` y todos los siguientes"""
+    service = TurnoServiceAsync(db)
+    return await service.actualizar_serie(serie_id, desde, data)
+
+@router.post("/serie/{serie_id}/cancelar", response_model=list[TurnoOut])
+async def cancelar_serie(serie_id: int, desde: date, db: AsyncSession = Depends(get_async_db)):
+    """Cancela el turno de la serie en la fecha `desde` y todos los siguientes"""
+    service = TurnoServiceAsync(db)
+    return await service.cancelar_serie(serie_id, desde)
+
+@router.post("/estado/lote", response_model=LoteEstadoOut)
+async def cambiar_estado_lote(data: CambioEstadoLote, db: AsyncSession = Depends(get_async_db)):
+    """Cambia el estado de varios turnos en una transacción; informa qué pasó con cada uno"""
+    service = TurnoServiceAsync(db)
+    return await service.cambiar_estado_lote(data.ids, data.estado)
+
+@router.post("/cierre/{fecha}", response_model=LoteEstadoOut)
+async def cerrar_dia(fecha: date, data: Optional[CierreDia] = None, db: AsyncSession = Depends(get_async_db)):
+    """Cierra el día: los turnos pendientes o confirmados pasan a completado (los `ausentes`, a no_asistio)"""
+    service = TurnoServiceAsync(db)
+    return await service.cerrar_dia(fecha, data.ausentes if data else [])
+
+@router.post("/importar", response_model=ResultadoImportacion)
+async def importar_turnos(request: Request, formato: Optional[FormatoArchivo] = None,
+                          db: AsyncSession = Depends(get_async_db)):
+    """Importa turnos desde CSV o NDJSON (columnas: cliente_id, servicio_id, fecha, hora_inicio, estado, notas)"""
+    service = TurnoServiceAsync(db)
+    return await importar(await request.body(), detectar_formato(request, formato),
+                          TurnoImport, service.crear_turnos_lote)
+
+@router.get("/exportar")
+async def exportar_turnos(desde: date, hasta: date, formato: FormatoArchivo = FormatoArchivo.CSV):
+    """Descarga los turnos de un rango de fechas en CSV o NDJSON"""
+    return StreamingResponse(
+        exportar(sesiones_async(), TurnoRepository.consulta_exportacion(desde, hasta), formato),
+        media_type=TIPOS_MEDIO[formato],
+        headers={"Content-Disposition": f"attachment; filename=turnos_{desde}_{hasta}.{formato.value}"}
+    )
+
+@router.get("/agenda", response_model=list[AgendaDiaOut], response_class=RespuestaJSON)
+async def obtener_agenda_rango(request: Request, desde: date, hasta: date,
+                               estado: Optional[EstadoTurno] = None,
+                               db: AsyncSession = Depends(get_async_db)):
+    """Obtiene la agenda entre dos fechas agrupada por día (formato: YYYY-MM-DD). Admite If-None-Match"""
+    service = TurnoServiceAsync(db)
+    version = etag("agenda", await service.version_agenda(desde, hasta), desde, hasta, estado and estado.value)
+    if no_modificado(request, version):
+        return respuesta_304(version)
+    return RespuestaJSON(await service.obtener_agenda_rango(desde, hasta, estado), headers=cabeceras(version))
+
+@router.get("/agenda/{fecha}", response_model=list[TurnoDetailOut], response_class=RespuestaJSON)
+async def obtener_agenda_dia(fecha: date, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Obtiene la agenda de un día (formato: YYYY-MM-DD). Admite If-None-Match"""
+    service = TurnoServiceAsync(db)
+    version = etag("agenda", await service.version_agenda(fecha), fecha)
+    if no_modificado(request, version):
+        return respuesta_304(version)
+    return Response(await service.obtener_agenda_dia_json(fecha), media_type=RespuestaJSON.media_type,
+                    headers=cabeceras(version))
+
+@router.get("/agenda/{fecha}/stream")
+async def stream_agenda_dia(fecha: date):
+    """Agenda de un día en vivo (Server-Sent Events): la agenda completa al conectar y después cada cambio"""
+    fabrica = sesiones_async()
+
+    async def leer_agenda():
+        # Sesión propia y corta: el stream sigue abierto después de que termina el endpoint
+        async with fabrica() as db:
+            return await TurnoServiceAsync(db).obtener_agenda_dia_json(fecha)
+
+    return StreamingResponse(
+        transmitir(fecha, leer_agenda), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/disponibilidad/{fecha}", response_model=list[SlotOut])
+async def obtener_disponibilidad(fecha: date, servicio_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Obtiene los horarios libres de un día para un servicio (formato: YYYY-MM-DD)"""
+    service = TurnoServiceAsync(db)
+    return await service.obtener_disponibilidad(fecha, servicio_id)
+
+@router.get("/cliente/{cliente_id}", response_model=Pagina[TurnoDetailOut], response_class=RespuestaJSON)
+async def obtener_historial_cliente(cliente_id: int, limite: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                                    cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """Historial de turnos de un cliente por páginas, del más reciente al más viejo (usar next_cursor)"""
+    service = TurnoServiceAsync(db)
+    return RespuestaJSON(await service.obtener_historial_cliente(cliente_id, limite, cursor))
+
+@router.get("/cliente/{cliente_id}/resumen", response_model=ResumenClienteOut)
+async def obtener_resumen_cliente(cliente_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Visitas, última visita, ausencias y total gastado de un cliente (para su ficha)"""
+    service = TurnoServiceAsync(db)
+    return await service.obtener_resumen_cliente(cliente_id)
+
+@router.get("/{id}", response_model=TurnoOut)
+async def obtener_turno(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Obtiene un turno por ID"""
+    service = TurnoServiceAsync(db)
+    return await service.obtener_turno(id)
+
+@router.put("/{id}", response_model=TurnoOut)
+async def actualizar_turno(id: int, data: TurnoUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Actualiza un turno"""
+    service = TurnoServiceAsync(db)
+    return await service.actualizar_turno(id, data)
+
+@router.post("/{id}/confirmar", response_model=TurnoOut)
+async def confirmar_turno(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Confirma un turno"""
+    service = TurnoServiceAsync(db)
+    return await service.confirmar_turno(id)
+
+@router.post("/{id}/completar", response_model=TurnoOut)
+async def completar_turno(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Marca un turno como completado"""
+    service = TurnoServiceAsync(db)
+    return await service.completar_turno(id)
+
+@router.post("/{id}/cancelar", response_model=TurnoOut)
+async def cancelar_turno(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Cancela un turno"""
+    service = TurnoServiceAsync(db)
+    return await service.cancelar_turno(id)
+
+@router.post("/{id}/no-asistio", response_model=TurnoOut)
+async def marcar_no_asistio(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Marca que el cliente no asistió"""
+    service = TurnoServiceAsync(db)
+    return await service.marcar_no_asistio(id)
+
+@router.delete("/{id}")
+async def eliminar_turno(id: int, db: AsyncSession = Depends(get_async_db)):
+    """Elimina un turno"""
+    service = TurnoServiceAsync(db)
+    await service.eliminar_turno(id)
+    return {"message": "Turno eliminado"}
@@ -0,0 +1,29 @@
+"""Endpoints de usuarios"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ...dto.paginacion import Pagina
+from ...dto.usuario import UsuarioCreate, UsuarioOut
+from ...db.base import get_async_db
+from ...db.paginacion import LIMITE_DEFECTO, LIMITE_MAXIMO
+from ...services.async_services import UsuarioServiceAsync
+
+router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
+
+
+@router.post("/", response_model=UsuarioOut)
+async def crear_usuario(data: UsuarioCreate, db: AsyncSession = Depends(get_async_db)):
+    service = UsuarioServiceAsync(db)
+    return await service.crear_usuario(data)
+
+@router.get("/", response_model=Pagina[UsuarioOut])
+async def obtener_usuarios(limite: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+                           cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    service = UsuarioServiceAsync(db)
+    return await service.obtener_usuarios(limite, cursor)
+
+@router.get("/{email}", response_model=UsuarioOut)
+async def obtener_usuario_por_email(email: str, db: AsyncSession = Depends(get_async_db)):
+    service = UsuarioServiceAsync(db)
+    return await service.obtener_usuario_por_email(email)
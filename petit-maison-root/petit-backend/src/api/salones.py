@@ -0,0 +1,80 @@
+"""
+Ruteo de cada request a la base de su salón.
+El salón sale de la cabecera X-Salon o, con PETIT_DOMINIO, del subdominio
+(palermo.petitmaison.com.ar -> "palermo"); la cabecera manda sobre el
+subdominio. Sin ninguno de los dos el request usa la base principal, como
+con un solo salón.
+
+El middleware deja el salón en `salon_actual` (lo heredan las sesiones, los
+caches en memoria, los canales de la agenda en vivo y los ETag) y abre sus
+motores antes de entrar al router, así la migración del primer uso no frena
+el event loop.
+"""
+import os
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException
+
+from ..db.base import salon_actual
+from ..db.salones import motores_salon, nombre_valido
+
+DOMINIO = os.getenv("PETIT_DOMINIO", "").lower().strip(".")
+CABECERA = b"x-salon"
+# Subdominios que no son un salón
+SIN_SALON = frozenset({"www", "api"})
+
+
+def salon_del_request(scope) -> Optional[str]:
+    """Salón pedido por cabecera o subdominio (None = base principal)"""
+    host = None
+    for nombre, valor in scope["headers"]:
+        if nombre == CABECERA:
+            return valor.decode("latin-1").strip().lower() or None
+        if nombre == b"host":
+            host = valor
+    if not DOMINIO or host is None:
+        return None
+    host = host.decode("latin-1").lower().rsplit(":", 1)[0]
+    subdominio = host.removesuffix("." + DOMINIO)
+    if subdominio == host or "." in subdominio or subdominio in SIN_SALON:
+        return None
+    return subdominio
+
+
+class MiddlewareSalon:
+    """Middleware ASGI: elige la base del salón del request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        salon = salon_del_request(scope)
+        if salon is not None:
+            if not nombre_valido(salon):
+                await _error(send, 400, "Salón inválido")
+                return
+            try:
+                await motores_salon.preparar(salon)
+            except HTTPException as error:
+                await _error(send, error.status_code, error.detail)
+                return
+
+        token = salon_actual.set(salon)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            salon_actual.reset(token)
+
+
+async def _error(send, codigo: int, detalle: str) -> None:
+    """Respuesta de error con el mismo formato que las HTTPException de FastAPI"""
+    cuerpo = orjson.dumps({"detail": detalle})
+    await send({"type": "http.response.start", "status": codigo, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": cuerpo})
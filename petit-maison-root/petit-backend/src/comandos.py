@@ -0,0 +1,102 @@
+"""
+Comandos de mantenimiento.
+
+Uso (desde petit-backend; con --salon NOMBRE, sobre la base de ese salón):
+    python -m src.comandos [--salon NOMBRE] reconstruir-resumen [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD]
+    python -m src.comandos recordatorios [--fecha AAAA-MM-DD] [--enviador log|archivo:RUTA|modulo:Clase]
+                                         [--workers 50] [--tanda 500]
+    python -m src.comandos archivar-turnos [--dias 730 | --antes AAAA-MM-DD] [--tanda 5000]
+    python -m src.comandos crear-salon NOMBRE
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import date, timedelta
+
+from .db.base import motor, salon_actual
+from .db.esquema import migrar
+from .db import resumen_diario, archivo_turnos, salones
+from .services import recordatorios
+
+logger = logging.getLogger("petit.comandos")
+
+# Antigüedad a partir de la cual se archivan los turnos cerrados
+DIAS_ARCHIVO = int(os.getenv("PETIT_ARCHIVO_DIAS", 730))
+
+
+def reconstruir_resumen(args: argparse.Namespace) -> None:
+    """Recalcula resumen_diario desde turnos (backfills o correcciones a mano)"""
+    with motor().begin() as conn:
+        filas = resumen_diario.reconstruir(conn, args.desde, args.hasta)
+    logger.info("Resumen diario reconstruido: %d filas", filas)
+
+
+def enviar_recordatorios(args: argparse.Namespace) -> None:
+    """Encola los turnos abiertos del día (por defecto, mañana) y envía los recordatorios pendientes"""
+    enviador = recordatorios.crear_enviador(args.enviador)
+    inicio = time.perf_counter()
+    totales = asyncio.run(recordatorios.correr(enviador, args.fecha, args.workers, args.tanda))
+    segundos = time.perf_counter() - inicio
+    despachados = sum(v for k, v in totales.items() if k != "encolados")
+    logger.info("Recordatorios: %s en %.2f s (%.0f por segundo)",
+                totales, segundos, despachados / segundos if segundos else 0)
+
+
+def archivar_turnos(args: argparse.Namespace) -> None:
+    """Mueve a turnos_archivo los turnos cerrados más viejos que el horizonte"""
+    antes = args.antes or date.today() - timedelta(days=args.dias)
+    inicio = time.perf_counter()
+    movidos = archivo_turnos.archivar(motor(), antes, args.tanda)
+    logger.info("Turnos archivados (anteriores a %s): %d en %.1f s", antes, movidos, time.perf_counter() - inicio)
+
+
+def crear_salon(args: argparse.Namespace) -> None:
+    """Crea la base de un salón nuevo (o migra la de uno existente)"""
+    version = salones.crear_salon(args.nombre)
+    logger.info("Salón %s en %s (esquema en versión %d)", args.nombre, salones.archivo(args.nombre), version)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.comandos", description=__doc__.split("\n")[1])
+    parser.add_argument("--salon", default=None, help="Salón sobre el que corre el comando (por defecto, la base principal)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    resumen = comandos.add_parser("reconstruir-resumen", help=reconstruir_resumen.__doc__)
+    resumen.add_argument("--desde", type=date.fromisoformat, default=None)
+    resumen.add_argument("--hasta", type=date.fromisoformat, default=None)
+    resumen.set_defaults(funcion=reconstruir_resumen)
+
+    envios = comandos.add_parser("recordatorios", help=enviar_recordatorios.__doc__)
+    envios.add_argument("--fecha", type=date.fromisoformat, default=None)
+    envios.add_argument("--enviador", default=recordatorios.ENVIADOR)
+    envios.add_argument("--workers", type=int, default=recordatorios.WORKERS)
+    envios.add_argument("--tanda", type=int, default=recordatorios.TANDA)
+    envios.set_defaults(funcion=enviar_recordatorios)
+
+    archivo = comandos.add_parser("archivar-turnos", help=archivar_turnos.__doc__)
+    horizonte = archivo.add_mutually_exclusive_group()
+    horizonte.add_argument("--dias", type=int, default=DIAS_ARCHIVO)
+    horizonte.add_argument("--antes", type=date.fromisoformat, default=None)
+    archivo.add_argument("--tanda", type=int, default=archivo_turnos.TANDA)
+    archivo.set_defaults(funcion=archivar_turnos)
+
+    nuevo = comandos.add_parser("crear-salon", help=crear_salon.__doc__)
+    nuevo.add_argument("nombre")
+    nuevo.set_defaults(funcion=crear_salon)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    if args.funcion is crear_salon:
+        args.funcion(args)
+        return
+    if args.salon is not None and not salones.existe(args.salon):
+        parser.error(f"Salón desconocido: {args.salon}")
+    salon_actual.set(args.salon)
+    migrar(motor())
+    args.funcion(args)
+
+
+if __name__ == "__main__":
+    main()
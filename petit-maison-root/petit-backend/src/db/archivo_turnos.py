@@ -0,0 +1,63 @@
+"""
+Archivo de turnos viejos.
+Los turnos cerrados (completados, cancelados, ausentes) anteriores a un corte
+se mueven de turnos a turnos_archivo en tandas, cada una en su transacción
+(INSERT ... SELECT y DELETE de los mismos IDs): la tabla caliente y sus
+índices quedan con lo que usan la agenda, las reservas y la disponibilidad,
+y nunca hay un turno en las dos tablas ni en ninguna.
+
+El archivo está en la misma base a propósito: así cada tanda es atómica sin
+depender de transacciones entre archivos adjuntos.
+
+Los turnos abiertos viejos (nunca se cerraron) se quedan en turnos. El
+resumen diario no cambia: su trigger de borrado ignora los turnos que ya
+están en el archivo (turnos es AUTOINCREMENT, así un ID archivado no vuelve
+a aparecer en turnos). El corte se guarda en versiones (CLAVE_CORTE_ARCHIVO) y
+las consultas de historial suman el archivo solo si llegan a él.
+"""
+from datetime import date
+
+from sqlalchemy import Engine, delete, insert, select
+from sqlalchemy.sql import func
+
+from .servicio_repository import ServicioDB
+from .turno_repository import TurnoDB, TurnoArchivoDB, CLAVE_CORTE_ARCHIVO
+from .versiones import leer_version, fijar_version
+from ..dto.turno import EstadoTurno
+
+# Estados que se archivan: los que ya no pueden cambiar en la agenda
+ESTADOS_CERRADOS = (EstadoTurno.COMPLETADO.value, EstadoTurno.CANCELADO.value, EstadoTurno.NO_ASISTIO.value)
+TANDA = 5000
+
+_COLUMNAS = [c.name for c in TurnoDB.__table__.columns]
+
+
+def archivar(engine: Engine, antes: date, tanda: int = TANDA) -> int:
+    """Mueve a turnos_archivo los turnos cerrados con fecha anterior a `antes`; devuelve cuántos movió"""
+    # El corte avanza antes de mover nada: mientras dura el archivado las
+    # consultas de esas fechas ya suman el archivo. Nunca retrocede
+    with engine.begin() as conn:
+        if antes.toordinal() > leer_version(conn, CLAVE_CORTE_ARCHIVO):
+            fijar_version(conn, CLAVE_CORTE_ARCHIVO, antes.toordinal())
+
+    # Las filas sin precio (anteriores a la columna) se archivan con el precio actual del servicio
+    precio = func.coalesce(
+        TurnoDB.precio, select(ServicioDB.precio).where(ServicioDB.id == TurnoDB.servicio_id).scalar_subquery()
+    )
+    movidos = 0
+    while True:
+        with engine.begin() as conn:
+            # Por ix_turnos_fecha_hora, del día más viejo en adelante
+            ids = conn.scalars(
+                select(TurnoDB.id).where(TurnoDB.fecha < antes, TurnoDB.estado.in_(ESTADOS_CERRADOS))
+                .order_by(TurnoDB.fecha, TurnoDB.hora_inicio).limit(tanda)
+            ).all()
+            if ids:
+                columnas = [precio if nombre == "precio" else TurnoDB.__table__.c[nombre] for nombre in _COLUMNAS]
+                conn.execute(insert(TurnoArchivoDB).from_select(
+                    _COLUMNAS, select(*columnas).where(TurnoDB.id.in_(ids))
+                ))
+                conn.execute(delete(TurnoDB).where(TurnoDB.id.in_(ids)))
+                movidos += len(ids)
+        if len(ids) < tanda:
+            return movidos
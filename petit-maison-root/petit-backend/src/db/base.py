@@ -1,22 +1,269 @@
 """
 Configuración base de la base de datos.
 Todas las tablas y repositorios importan desde acá.
+
+La URL y el perfil de SQLite se toman del entorno (ver variables PETIT_*);
+sin variables se usa db/petit.db dentro de petit-backend, con WAL.
+
+Con varios salones cada uno tiene su propia base (ver salones): el salón del
+request en curso está en `salon_actual` y sesiones()/sesiones_async() dan la
+fábrica de sesiones de su base (la principal si no hay salón).
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+import asyncio
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger("petit.db")
+
+T = TypeVar("T")
+
+
+def _env_int(nombre: str, defecto: int) -> int:
+    """Lee un entero del entorno"""
+    return int(os.getenv(nombre, defecto))
+
+
+DB_DIR = Path(__file__).resolve().parents[2] / "db"
+DATABASE_URL = os.getenv("PETIT_DATABASE_URL", f"sqlite:///{DB_DIR / 'petit.db'}")
+ASYNC_DATABASE_URL = os.getenv(
+    "PETIT_ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+
+# Pragmas que se aplican a cada conexión nueva
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("PETIT_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("PETIT_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": _env_int("PETIT_SQLITE_BUSY_TIMEOUT_MS", 5000),
+    "mmap_size": _env_int("PETIT_SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    "cache_size": _env_int("PETIT_SQLITE_CACHE_SIZE", -20000),  # Negativo = KiB
+}
+
+# Pool de conexiones
+POOL_SIZE = _env_int("PETIT_DB_POOL_SIZE", 5)
+POOL_MAX_OVERFLOW = _env_int("PETIT_DB_POOL_MAX_OVERFLOW", 10)
+POOL_RECYCLE = _env_int("PETIT_DB_POOL_RECYCLE", 3600)  # Segundos
+POOL_TIMEOUT = _env_int("PETIT_DB_POOL_TIMEOUT", 30)
+
+# Reintentos de escrituras cuando la base está bloqueada
+REINTENTOS = _env_int("PETIT_DB_REINTENTOS", 5)
+ESPERA_INICIAL_MS = _env_int("PETIT_DB_ESPERA_MS", 50)
+
+
+def _opciones_pool(url: str, poolclass: type, pool_size: int = POOL_SIZE,
+                   max_overflow: int = POOL_MAX_OVERFLOW) -> dict:
+    """Parámetros de pool (las bases en memoria usan el pool por defecto)"""
+    if ":memory:" in url:
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_pre_ping": False,
+    }
+
+
+def configurar_sqlite(engine: Engine) -> None:
+    """Aplica los pragmas de SQLITE_PRAGMAS en cada conexión que abre el motor"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, valor in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={valor}")
+        cursor.close()
+
+
+def crear_motor(url: str, pool_size: int = POOL_SIZE, max_overflow: int = POOL_MAX_OVERFLOW) -> Engine:
+    """Crea un motor sync con el perfil de SQLite y el pool configurados"""
+    motor = create_engine(url, echo=False, **_opciones_pool(url, QueuePool, pool_size, max_overflow))
+    configurar_sqlite(motor)
+    return motor
+
+
+def crear_motor_async(url: str, pool_size: int = POOL_SIZE, max_overflow: int = POOL_MAX_OVERFLOW) -> AsyncEngine:
+    """Crea un motor async (aiosqlite) con el perfil de SQLite y el pool configurados"""
+    motor = create_async_engine(
+        url, echo=False, **_opciones_pool(url, AsyncAdaptedQueuePool, pool_size, max_overflow)
+    )
+    configurar_sqlite(motor.sync_engine)
+    return motor
+
+
+def crear_sesiones(motor: Engine) -> sessionmaker:
+    return sessionmaker(bind=motor, autoflush=False, autocommit=False, expire_on_commit=False)
+
+
+def crear_sesiones_async(motor: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(bind=motor, autoflush=False, expire_on_commit=False)
+
+
+# Motor sync: scripts, migraciones y herramientas
+engine = crear_motor(DATABASE_URL)
+SessionLocal = crear_sesiones(engine)
+
+# Motor async: endpoints de la API (aiosqlite, sin pasar por el threadpool)
+async_engine = crear_motor_async(ASYNC_DATABASE_URL)
+AsyncSessionLocal = crear_sesiones_async(async_engine)
+
+# Salón del request o comando en curso (None = la base principal)
+salon_actual: ContextVar[Optional[str]] = ContextVar("petit_salon", default=None)
 
-DATABASE_URL = "sqlite:///./db/petit.db"
-engine = create_engine(DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+def motor() -> Engine:
+    """Motor sync de la base del salón actual"""
+    salon = salon_actual.get()
+    if salon is None:
+        return engine
+    from .salones import motores_salon
+    return motores_salon.obtener(salon).engine
+
+
+def sesiones() -> sessionmaker:
+    """Fábrica de sesiones sync de la base del salón actual"""
+    salon = salon_actual.get()
+    if salon is None:
+        return SessionLocal
+    from .salones import motores_salon
+    return motores_salon.obtener(salon).sesiones
+
+
+def sesiones_async() -> async_sessionmaker:
+    """Fábrica de sesiones async de la base del salón actual"""
+    salon = salon_actual.get()
+    if salon is None:
+        return AsyncSessionLocal
+    from .salones import motores_salon
+    return motores_salon.obtener(salon).sesiones_async
+
+
+class PorSalon(Generic[T]):
+    """Una instancia de `fabrica` por salón: los atributos se buscan en la del salón actual.
+
+    Para el estado en memoria que depende de los datos de una base (índices
+    de agenda, catálogo): cada salón tiene el suyo y no se mezclan.
+    """
+
+    def __init__(self, fabrica: Callable[[], T]):
+        self._fabrica = fabrica
+        self._instancias: dict[Optional[str], T] = {}
+        self._lock = Lock()
+
+    def actual(self) -> T:
+        salon = salon_actual.get()
+        instancia = self._instancias.get(salon)
+        if instancia is None:
+            with self._lock:
+                instancia = self._instancias.setdefault(salon, self._fabrica())
+        return instancia
+
+    def __getattr__(self, nombre: str):
+        return getattr(self.actual(), nombre)
 
 class Base(DeclarativeBase):
     """Clase base para todos los modelos SQLAlchemy"""
     pass
 
+def ahora() -> datetime:
+    """Hora actual en UTC sin zona (como CURRENT_TIMESTAMP de SQLite)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 def get_db():
-    """Generador de sesiones de base de datos para FastAPI"""
-    db = SessionLocal()
+    """Generador de sesiones de base de datos para FastAPI (de la base del salón del request)"""
+    db = sesiones()()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Generador de sesiones async de base de datos para FastAPI (de la base del salón del request)"""
+    async with sesiones_async()() as db:
+        yield db
+
+
+def bloquear_escritura(db: Session) -> None:
+    """Toma el lock de escritura de SQLite (BEGIN IMMEDIATE) si la conexión no está en una transacción.
+
+    Desde acá hasta el commit ninguna otra conexión puede escribir: lo que se
+    valida con lo leído después queda firme. Las demás esperan (busy_timeout)
+    y, si se agota, el 'database is locked' lo reintenta reintentar_si_bloqueada.
+    """
+    conn = db.connection()
+    if conn.dialect.name != "sqlite":
+        return
+    # El driver abre la transacción recién en la primera escritura: si ya la
+    # abrió, el lock ya es nuestro
+    if not conn.connection.driver_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def es_bloqueo(error: Exception) -> bool:
+    """Indica si el error es un 'database is locked' / 'busy' de SQLite"""
+    mensaje = str(getattr(error, "orig", error)).lower()
+    return isinstance(error, OperationalError) and ("locked" in mensaje or "busy" in mensaje)
+
+
+def _espera(intento: int) -> float:
+    """Backoff exponencial con jitter, en segundos"""
+    return ESPERA_INICIAL_MS * (2 ** intento) * random.uniform(0.5, 1.5) / 1000
+
+
+def reintentar_si_bloqueada(db: Session, operacion: Callable[[], T]) -> T:
+    """Ejecuta `operacion`; si la base está bloqueada hace rollback y reintenta"""
+    for intento in range(REINTENTOS + 1):
+        try:
+            return operacion()
+        except OperationalError as error:
+            if not es_bloqueo(error) or intento == REINTENTOS:
+                raise
+            db.rollback()
+            logger.warning("Base bloqueada, reintento %d/%d", intento + 1, REINTENTOS)
+            time.sleep(_espera(intento))
+
+
+async def reintentar_si_bloqueada_async(db: AsyncSession, operacion: Callable[[], Awaitable[T]]) -> T:
+    """Versión async de reintentar_si_bloqueada (no bloquea el event loop al esperar)"""
+    for intento in range(REINTENTOS + 1):
+        try:
+            return await operacion()
+        except OperationalError as error:
+            if not es_bloqueo(error) or intento == REINTENTOS:
+                raise
+            await db.rollback()
+            logger.warning("Base bloqueada, reintento %d/%d", intento + 1, REINTENTOS)
+            await asyncio.sleep(_espera(intento))
+
+
+def registrar_configuracion(motor: Engine) -> None:
+    """Deja en el log la configuración efectiva de la base"""
+    if motor.dialect.name != "sqlite":
+        logger.info("Base de datos: %s", motor.url.render_as_string(hide_password=True))
+        return
+    with motor.connect() as conn:
+        efectivos = {
+            pragma: conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+            for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")
+        }
+    logger.info(
+        "Base de datos: %s | %s | pool_size=%d max_overflow=%d recycle=%ds | reintentos=%d",
+        motor.url.database, " ".join(f"{k}={v}" for k, v in efectivos.items()),
+        POOL_SIZE, POOL_MAX_OVERFLOW, POOL_RECYCLE, REINTENTOS
+    )
@@ -0,0 +1,164 @@
+"""
+Índice de búsqueda de clientes (SQLite FTS5 con tokenizer trigram).
+Guarda el nombre sin acentos ni mayúsculas y el teléfono solo con dígitos,
+con rowid = clientes.id. Lo crea una migración (ver esquema) y lo mantiene
+ClienteRepository en cada escritura.
+"""
+import logging
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import Connection, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+TABLA = "clientes_busqueda"
+# El tokenizer trigram necesita al menos 3 caracteres para usar el índice
+MIN_TRIGRAMA = 3
+
+# Queda en False si el SQLite instalado no trae FTS5/trigram
+fts_disponible = True
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Pasa a minúsculas y quita acentos: 'Núñez' -> 'nunez'"""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower().strip()
+
+
+def solo_digitos(texto: Optional[str]) -> str:
+    """Deja solo los dígitos de un teléfono: '+54 11-2233' -> '54112233'"""
+    return "".join(c for c in texto or "" if c.isdigit())
+
+
+def crear_indice(conn: Connection) -> None:
+    """Crea la tabla FTS y la reconstruye si no coincide con clientes"""
+    global fts_disponible
+    try:
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA} "
+            "USING fts5(nombre, telefono, tokenize='trigram')"
+        )
+    except OperationalError:
+        fts_disponible = False
+        logger.warning("SQLite sin FTS5/trigram: la búsqueda de clientes usa LIKE")
+        return
+
+    total_clientes = conn.exec_driver_sql("SELECT count(*) FROM clientes").scalar()
+    total_indice = conn.exec_driver_sql(f"SELECT count(*) FROM {TABLA}").scalar()
+    if total_clientes != total_indice:
+        reconstruir(conn)
+
+
+def detectar(conn: Connection) -> None:
+    """Al arrancar: si la tabla FTS no existe (SQLite sin FTS5) se busca con LIKE"""
+    global fts_disponible
+    fts_disponible = conn.exec_driver_sql(
+        "SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE name = ?)", (TABLA,)
+    ).scalar() == 1
+
+
+def reconstruir(conn: Connection, lote: int = 1000) -> None:
+    """Vuelve a indexar todos los clientes"""
+    conn.exec_driver_sql(f"DELETE FROM {TABLA}")
+    ultimo_id = 0
+    while True:
+        filas = conn.execute(
+            text("SELECT id, nombre, telefono FROM clientes WHERE id > :id ORDER BY id LIMIT :lote"),
+            {"id": ultimo_id, "lote": lote}
+        ).all()
+        if not filas:
+            break
+        conn.execute(
+            text(f"INSERT INTO {TABLA}(rowid, nombre, telefono) VALUES (:id, :nombre, :telefono)"),
+            [_fila_indice(id, nombre, telefono) for id, nombre, telefono in filas]
+        )
+        ultimo_id = filas[-1][0]
+
+
+def indexar(db: Session, id: int, nombre: str, telefono: Optional[str]) -> None:
+    """Agrega o reemplaza un cliente en el índice (dentro de la transacción actual)"""
+    if not fts_disponible:
+        return
+    desindexar(db, id)
+    db.execute(
+        text(f"INSERT INTO {TABLA}(rowid, nombre, telefono) VALUES (:id, :nombre, :telefono)"),
+        _fila_indice(id, nombre, telefono)
+    )
+
+
+def indexar_lote(db: Session, clientes: list[tuple[int, str, Optional[str]]]) -> None:
+    """Agrega clientes nuevos al índice con un solo executemany"""
+    if fts_disponible and clientes:
+        db.execute(
+            text(f"INSERT INTO {TABLA}(rowid, nombre, telefono) VALUES (:id, :nombre, :telefono)"),
+            [_fila_indice(*cliente) for cliente in clientes]
+        )
+
+
+def desindexar(db: Session, id: int) -> None:
+    """Quita un cliente del índice"""
+    if fts_disponible:
+        db.execute(text(f"DELETE FROM {TABLA} WHERE rowid = :id"), {"id": id})
+
+
+def buscar_ids(db: Session, termino: str, limite: int) -> list[int]:
+    """Devuelve los ids de clientes que coinciden, los que empiezan igual primero"""
+    nombre = normalizar(termino)
+    digitos = solo_digitos(termino)
+    if not nombre:
+        return []
+
+    condiciones = []
+    params = {
+        "limite": limite,
+        "prefijo": _like(nombre) + "%",
+        "palabra": "% " + _like(nombre) + "%",
+        "tel_prefijo": _like(digitos) + "%" if digitos else None,
+    }
+    if len(nombre) >= MIN_TRIGRAMA:
+        condiciones.append(f"{TABLA} MATCH :match")
+        match = f"nombre : {_frase(nombre)}"
+        if len(digitos) >= MIN_TRIGRAMA:
+            match += f" OR telefono : {_frase(digitos)}"
+        params["match"] = match
+    else:
+        # Términos cortos: el trigrama no aplica, se busca solo por prefijo
+        condiciones.append(r"nombre LIKE :prefijo ESCAPE '\'")
+        condiciones.append(r"nombre LIKE :palabra ESCAPE '\'")
+        if digitos:
+            condiciones.append(r"telefono LIKE :tel_prefijo ESCAPE '\'")
+
+    filas = db.execute(text(f"""
+        SELECT rowid FROM {TABLA}
+        WHERE {" OR ".join(condiciones)}
+        ORDER BY
+            CASE
+                WHEN nombre LIKE :prefijo ESCAPE '\\' THEN 0
+                WHEN telefono LIKE :tel_prefijo ESCAPE '\\' THEN 0
+                WHEN nombre LIKE :palabra ESCAPE '\\' THEN 1
+                ELSE 2
+            END,
+            {"rank" if len(nombre) >= MIN_TRIGRAMA else "nombre"}
+        LIMIT :limite
+    """), params).all()
+    return [fila[0] for fila in filas]
+
+
+def _fila_indice(id: int, nombre: str, telefono: Optional[str]) -> dict:
+    """Arma los valores normalizados de una fila del índice"""
+    return {"id": id, "nombre": normalizar(nombre), "telefono": solo_digitos(telefono)}
+
+
+def _frase(termino: str) -> str:
+    """Arma una frase literal para MATCH"""
+    return '"' + termino.replace('"', '""') + '"'
+
+
+def _like(termino: str) -> str:
+    """Escapa los comodines de LIKE"""
+    return termino.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
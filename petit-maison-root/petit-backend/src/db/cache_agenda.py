@@ -0,0 +1,80 @@
+"""
+Cache en memoria de la agenda de cada día, ya serializada (JSON).
+La agenda de hoy y mañana se lee muchas más veces de las que se escribe: cada
+entrada guarda los bytes de GET /turnos/agenda/{fecha} con la versión
+"agenda:AAAA-MM-DD" con la que se armó y solo vale mientras la base siga en
+esa versión (como los índices de indice_agenda), así no la dejan vieja las
+escrituras de otros procesos.
+
+Las escrituras del proceso además la invalidan en el momento:
+TurnoRepository los días que toca (los dos si un turno se muda), y
+ClienteRepository/ServicioRepository los días donde aparece el cliente o el
+servicio que cambió (ver versiones.incrementar_agendas). Se desalojan los
+días menos usados por cantidad (PETIT_CACHE_AGENDA_DIAS) y por memoria
+(PETIT_CACHE_AGENDA_MB).
+"""
+import os
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from typing import Iterable, Optional
+
+from .base import PorSalon
+
+MAX_DIAS = int(os.getenv("PETIT_CACHE_AGENDA_DIAS", 256))
+MAX_BYTES = int(float(os.getenv("PETIT_CACHE_AGENDA_MB", 16)) * 1024 * 1024)
+
+
+class CacheAgenda:
+    """LRU de agendas serializadas por día, acotado en días y en bytes"""
+
+    def __init__(self, max_dias: int = MAX_DIAS, max_bytes: int = MAX_BYTES):
+        self.max_dias = max_dias
+        self.max_bytes = max_bytes
+        self._dias: OrderedDict[date, tuple[int, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    def obtener(self, fecha: date, version: int) -> Optional[bytes]:
+        """La agenda del día si está armada con `version`, o None"""
+        with self._lock:
+            entrada = self._dias.get(fecha)
+            if entrada is None or entrada[0] != version:
+                return None
+            self._dias.move_to_end(fecha)
+            return entrada[1]
+
+    def guardar(self, fecha: date, version: int, agenda: bytes) -> None:
+        """Guarda la agenda del día armada con `version` y desaloja lo que sobre"""
+        if len(agenda) > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._dias.pop(fecha, None)
+            if anterior is not None:
+                self._bytes -= len(anterior[1])
+            self._dias[fecha] = (version, agenda)
+            self._bytes += len(agenda)
+            while len(self._dias) > self.max_dias or self._bytes > self.max_bytes:
+                _, (_, viejo) = self._dias.popitem(last=False)
+                self._bytes -= len(viejo)
+
+    def invalidar(self, fechas: Iterable[date]) -> None:
+        """Descarta la agenda de esos días"""
+        with self._lock:
+            for fecha in fechas:
+                entrada = self._dias.pop(fecha, None)
+                if entrada is not None:
+                    self._bytes -= len(entrada[1])
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._dias.clear()
+            self._bytes = 0
+
+    def estado(self) -> dict[str, int]:
+        """Días y bytes en el cache"""
+        return {"dias": len(self._dias), "bytes": self._bytes}
+
+
+# Un cache por salón
+cache_agenda: CacheAgenda = PorSalon(CacheAgenda)
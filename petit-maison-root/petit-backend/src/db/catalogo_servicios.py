@@ -0,0 +1,103 @@
+"""
+Cache en memoria del catálogo de servicios.
+El catálogo es chico y casi no cambia: se guarda completo en el proceso y se
+recarga cuando cambia la versión "servicios" de la tabla versiones (que
+incrementa ServicioRepository en cada escritura). Para no leer la versión en
+cada request, los listados la verifican como mucho una vez cada CATALOGO_TTL
+segundos; las escrituras del propio proceso invalidan el cache en el momento.
+Lo que escribe a partir del catálogo (reservas, precios copiados al turno)
+pide `al_dia=True` y lee la versión siempre: un cambio de otro proceso se ve
+en la escritura siguiente.
+"""
+import os
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .base import PorSalon
+from .versiones import leer_version
+from .indice_agenda import indices_agenda
+
+CLAVE_VERSION = "servicios"
+CATALOGO_TTL = float(os.getenv("PETIT_CATALOGO_TTL_S", "2"))
+
+
+@dataclass(frozen=True)
+class ServicioCache:
+    """Copia inmutable de una fila de servicios"""
+    id: int
+    nombre: str
+    duracion_min: int
+    precio: float
+    activo: bool
+
+
+class CatalogoServicios:
+    """Catálogo de servicios del proceso, ordenado por (nombre, id)"""
+
+    def __init__(self, ttl: float = CATALOGO_TTL):
+        self.ttl = ttl
+        self._por_id: dict[int, ServicioCache] = {}
+        self._ordenados: list[ServicioCache] = []
+        self._version: Optional[int] = None
+        self._verificado = 0.0
+        self._lock = Lock()
+
+    def servicios(self, db: Session, al_dia: bool = False) -> list[ServicioCache]:
+        """Todos los servicios, ordenados por nombre"""
+        self._asegurar(db, al_dia)
+        return self._ordenados
+
+    def por_id(self, db: Session, id: int, al_dia: bool = False) -> Optional[ServicioCache]:
+        """Un servicio por ID, o None si no existe"""
+        self._asegurar(db, al_dia)
+        return self._por_id.get(id)
+
+    def version(self, db: Session) -> int:
+        """Versión con la que se cargó lo que devuelven servicios/por_id (para ETags)"""
+        self._asegurar(db)
+        return self._version
+
+    def invalidar(self) -> None:
+        """Fuerza la recarga en el próximo acceso"""
+        with self._lock:
+            self._version = None
+
+    def _asegurar(self, db: Session, al_dia: bool = False) -> None:
+        """Recarga el catálogo si cambió la versión en la base (sin al_dia, la verifica cada `ttl`)"""
+        ahora = time.monotonic()
+        if not al_dia and self._version is not None and ahora - self._verificado < self.ttl:
+            return
+        version = leer_version(db, CLAVE_VERSION)
+        with self._lock:
+            if version != self._version:
+                self._cargar(db, version)
+            self._verificado = ahora
+
+    def _cargar(self, db: Session, version: int) -> None:
+        """Lee todos los servicios de la base"""
+        from .servicio_repository import ServicioDB
+
+        filas = db.execute(select(
+            ServicioDB.id, ServicioDB.nombre, ServicioDB.duracion_min,
+            ServicioDB.precio, ServicioDB.activo
+        ).order_by(ServicioDB.nombre, ServicioDB.id)).all()
+        ordenados = [ServicioCache(*fila) for fila in filas]
+
+        # Si otro proceso cambió una duración, los índices de agenda quedaron viejos
+        anteriores = self._por_id
+        if any(anteriores.get(s.id) and anteriores[s.id].duracion_min != s.duracion_min
+               for s in ordenados):
+            indices_agenda.limpiar()
+
+        self._ordenados = ordenados
+        self._por_id = {s.id: s for s in ordenados}
+        self._version = version
+
+
+# Un catálogo por salón
+catalogo_servicios: CatalogoServicios = PorSalon(CatalogoServicios)
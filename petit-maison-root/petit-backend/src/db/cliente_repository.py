@@ -1,17 +1,28 @@
-from sqlalchemy import String, Text, DateTime
+from sqlalchemy import String, Text, DateTime, Index, Select, insert, select, update, delete
 from sqlalchemy.orm import Mapped, mapped_column, Session
 from sqlalchemy.sql import func
 from fastapi import HTTPException
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 from .base import Base
+from . import busqueda_clientes
+from .paginacion import paginar, LIMITE_DEFECTO
+from .versiones import leer_version, incrementar_version, incrementar_agendas
+from .cache_agenda import cache_agenda
 from ..dto.cliente import ClienteCreate, ClienteUpdate
 
+# Clave de versión de la tabla (ver versiones): cambia con cada alta, cambio o baja
+CLAVE_VERSION = "clientes"
+
 
 class ClienteDB(Base):
     """Modelo de base de datos para Cliente"""
     __tablename__ = "clientes"
+    __table_args__ = (
+        # Orden estable para la paginación por cursor
+        Index("ix_clientes_nombre_id", "nombre", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     nombre: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -30,21 +41,45 @@ class ClienteRepository:
         self.db = db
 
     def crear(self, data: ClienteCreate) -> ClienteDB:
-        """Crea un nuevo cliente"""
-        cliente = ClienteDB(
-            nombre=data.nombre,
-            telefono=data.telefono,
-            email=data.email,
-            notas=data.notas
-        )
-        self.db.add(cliente)
+        """Crea un nuevo cliente (INSERT ... RETURNING, sin refresh)"""
+        cliente = self.db.scalars(
+            insert(ClienteDB).values(**data.model_dump()).returning(ClienteDB)
+        ).one()
+        busqueda_clientes.indexar_lote(self.db, [(cliente.id, cliente.nombre, cliente.telefono)])
+        incrementar_version(self.db, CLAVE_VERSION)
         self.db.commit()
-        self.db.refresh(cliente)
         return cliente
 
-    def listar(self) -> list[ClienteDB]:
-        """Lista todos los clientes"""
-        return self.db.query(ClienteDB).order_by(ClienteDB.nombre).all()
+    def crear_lote(self, filas: list[tuple[int, ClienteCreate]]) -> dict:
+        """Crea varios clientes en una transacción (INSERT executemany)"""
+        if not filas:
+            return {"creados": 0, "errores": []}
+        ids = self.db.scalars(
+            insert(ClienteDB).returning(ClienteDB.id, sort_by_parameter_order=True),
+            [data.model_dump() for _, data in filas]
+        ).all()
+        busqueda_clientes.indexar_lote(
+            self.db, [(id, data.nombre, data.telefono) for id, (_, data) in zip(ids, filas)]
+        )
+        incrementar_version(self.db, CLAVE_VERSION)
+        self.db.commit()
+        return {"creados": len(ids), "errores": []}
+
+    def version(self) -> int:
+        """Versión actual de los clientes (para ETags)"""
+        return leer_version(self.db, CLAVE_VERSION)
+
+    def listar(self, limite: int = LIMITE_DEFECTO, cursor: Optional[str] = None) -> dict:
+        """Lista una página de clientes ordenados por nombre"""
+        return paginar(self.db.query(ClienteDB), (ClienteDB.nombre, ClienteDB.id), limite, cursor)
+
+    @staticmethod
+    def consulta_exportacion() -> Select:
+        """Consulta de columnas para exportar todos los clientes"""
+        return select(
+            ClienteDB.id, ClienteDB.nombre, ClienteDB.telefono,
+            ClienteDB.email, ClienteDB.notas, ClienteDB.created_at
+        ).order_by(ClienteDB.id)
 
     def por_id(self, id: int) -> ClienteDB:
         """Obtiene un cliente por su ID"""
@@ -53,34 +88,58 @@ class ClienteRepository:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
         return cliente
 
-    def buscar(self, termino: str) -> list[ClienteDB]:
-        """Busca clientes por nombre o teléfono"""
-        return self.db.query(ClienteDB).filter(
-            (ClienteDB.nombre.ilike(f"%{termino}%")) |
-            (ClienteDB.telefono.ilike(f"%{termino}%"))
-        ).all()
+    def buscar(self, termino: str, limite: int = 20) -> list[ClienteDB]:
+        """Busca clientes por nombre o teléfono (sin acentos, por prefijo o contenido)"""
+        if not busqueda_clientes.fts_disponible:
+            return self.db.query(ClienteDB).filter(
+                (ClienteDB.nombre.ilike(f"%{termino}%")) |
+                (ClienteDB.telefono.ilike(f"%{termino}%"))
+            ).limit(limite).all()
 
-    def actualizar(self, id: int, data: ClienteUpdate) -> ClienteDB:
-        """Actualiza un cliente existente"""
-        cliente = self.por_id(id)
-        
+        ids = busqueda_clientes.buscar_ids(self.db, termino, limite)
+        if not ids:
+            return []
+        clientes = {c.id: c for c in self.db.query(ClienteDB).filter(ClienteDB.id.in_(ids))}
+        return [clientes[id] for id in ids if id in clientes]
+
+    def actualizar(self, id: int, data: ClienteUpdate) -> tuple[ClienteDB, list[date]]:
+        """Actualiza un cliente existente (un solo UPDATE ... RETURNING).
+
+        Devuelve el cliente y los días de la agenda donde cambió lo que se muestra de él.
+        """
         # Solo actualiza los campos que vienen con valor
-        if data.nombre is not None:
-            cliente.nombre = data.nombre
-        if data.telefono is not None:
-            cliente.telefono = data.telefono
-        if data.email is not None:
-            cliente.email = data.email
-        if data.notas is not None:
-            cliente.notas = data.notas
-        
+        cambios = data.model_dump(exclude_none=True)
+        if not cambios:
+            return self.por_id(id), []
+
+        cliente = self.db.scalars(
+            update(ClienteDB).where(ClienteDB.id == id).values(**cambios).returning(ClienteDB),
+            execution_options={"populate_existing": True}
+        ).one_or_none()
+        if not cliente:
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+
+        dias = []
+        if data.nombre is not None or data.telefono is not None:
+            busqueda_clientes.indexar(self.db, cliente.id, cliente.nombre, cliente.telefono)
+            # La agenda muestra nombre y teléfono: cambian los días donde aparece el cliente
+            dias = incrementar_agendas(self.db, "cliente_id", id)
+        incrementar_version(self.db, CLAVE_VERSION)
         self.db.commit()
-        self.db.refresh(cliente)
-        return cliente
+        cache_agenda.invalidar(dias)
+        return cliente, dias
 
-    def eliminar(self, id: int) -> bool:
-        """Elimina un cliente"""
-        cliente = self.por_id(id)
-        self.db.delete(cliente)
+    def eliminar(self, id: int) -> list[date]:
+        """Elimina un cliente (DELETE ... RETURNING, sin SELECT previo).
+
+        Devuelve los días de la agenda donde tenía turnos (dejan de mostrarse).
+        """
+        borrado = self.db.scalar(delete(ClienteDB).where(ClienteDB.id == id).returning(ClienteDB.id))
+        if borrado is None:
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+        busqueda_clientes.desindexar(self.db, id)
+        dias = incrementar_agendas(self.db, "cliente_id", id)
+        incrementar_version(self.db, CLAVE_VERSION)
         self.db.commit()
-        return True
+        cache_agenda.invalidar(dias)
+        return dias
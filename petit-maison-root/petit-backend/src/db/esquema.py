@@ -0,0 +1,180 @@
+"""
+Migraciones versionadas del esquema.
+La versión aplicada se guarda en `versiones` (clave "esquema"): con la base al
+día, arrancar cuesta una lectura por clave primaria. Cada migración corre en
+su propia transacción junto con el cambio de versión y es idempotente, así
+también se puede aplicar sobre bases creadas antes de las migraciones.
+
+Para cambiar el esquema se agrega una función al final de MIGRACIONES (y el
+cambio en el modelo); nunca se modifica ni se reordena una ya publicada.
+"""
+import logging
+from typing import Callable
+
+from sqlalchemy import Connection, Engine, inspect
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from .base import Base
+from . import busqueda_clientes, resumen_diario
+from .turno_repository import TurnoDB
+from .versiones import VersionDB, leer_version, fijar_version
+# Importar los modelos para que queden registrados en Base.metadata
+from . import (  # noqa: F401
+    usuario_repository, cliente_repository, servicio_repository, turno_repository,
+    reporte_repository, versiones, recordatorio_repository, idempotencia_repository
+)
+
+logger = logging.getLogger("petit.db")
+
+CLAVE_VERSION = "esquema"
+
+
+def _tablas(conn: Connection) -> None:
+    """Crea las tablas de los modelos que falten"""
+    Base.metadata.create_all(bind=conn)
+
+
+def _columnas(conn: Connection) -> None:
+    """Agrega las columnas nuevas de los modelos (ALTER TABLE ADD COLUMN)"""
+    inspector = inspect(conn)
+    for tabla in Base.metadata.sorted_tables:
+        # Las tablas que todavía no existen las crea su propia migración, completas
+        if not inspector.has_table(tabla.name):
+            continue
+        existentes = {c["name"] for c in inspector.get_columns(tabla.name)}
+        for columna in tabla.columns:
+            if columna.name not in existentes:
+                ddl = CreateColumn(columna).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {tabla.name} ADD COLUMN {ddl}")
+
+
+def _indices_paginacion(conn: Connection) -> None:
+    """Índices de paginación y agenda; borra ix_turnos_fecha (cubierto por ix_turnos_fecha_hora)"""
+    for nombre in ("ix_usuarios_nombre_id", "ix_clientes_nombre_id", "ix_servicios_nombre_id",
+                   "ix_turnos_fecha_hora", "ix_turnos_serie_id"):
+        _crear_indice(conn, nombre)
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_turnos_fecha")
+
+
+def _indice_historial_cliente(conn: Connection) -> None:
+    """Índice (cliente_id, fecha, hora_inicio) para el historial de un cliente"""
+    _crear_indice(conn, "ix_turnos_cliente_fecha")
+
+
+def _version_turnos(conn: Connection) -> None:
+    """Columna turnos.version para las actualizaciones optimistas"""
+    _columnas(conn)
+
+
+def _cola_recordatorios(conn: Connection) -> None:
+    """Tabla recordatorios (cola de envíos de recordatorios de turnos)"""
+    _tablas(conn)
+
+
+def _archivo_turnos(conn: Connection) -> None:
+    """Tabla turnos_archivo; el resumen diario deja de restar los turnos archivados"""
+    _tablas(conn)
+    resumen_diario.actualizar_trigger_borrado(conn)
+
+
+def _idempotencia(conn: Connection) -> None:
+    """Tabla idempotencia (respuestas guardadas por Idempotency-Key)"""
+    _tablas(conn)
+
+
+def _turnos_autoincrement(conn: Connection) -> None:
+    """turnos con AUTOINCREMENT: un ID archivado no vuelve a usarse en un turno nuevo"""
+    anterior = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'turnos'"
+    ).scalar()
+    if "AUTOINCREMENT" in anterior.upper():
+        return
+
+    # Tabla nueva, copia, DROP y RENAME; después los índices y triggers que tenía turnos
+    objetos = conn.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'turnos' AND type IN ('index', 'trigger') "
+        "AND sql IS NOT NULL"
+    ).scalars().all()
+    ddl = str(CreateTable(TurnoDB.__table__).compile(dialect=conn.dialect))
+    conn.exec_driver_sql(ddl.replace("CREATE TABLE turnos ", "CREATE TABLE turnos_nueva ", 1))
+    columnas = ", ".join(c.name for c in TurnoDB.__table__.columns)
+    conn.exec_driver_sql(f"INSERT INTO turnos_nueva ({columnas}) SELECT {columnas} FROM turnos")
+
+    # Turnos que ya recibieron el ID de uno archivado: pasan a un ID nuevo (con sus recordatorios)
+    tope = conn.exec_driver_sql(
+        "SELECT max(coalesce((SELECT max(id) FROM turnos), 0), coalesce((SELECT max(id) FROM turnos_archivo), 0))"
+    ).scalar()
+    repetidos = conn.exec_driver_sql(
+        "SELECT id, fecha FROM turnos_nueva WHERE id IN (SELECT id FROM turnos_archivo) ORDER BY id"
+    ).all()
+    for nuevo, (id, fecha) in enumerate(repetidos, start=tope + 1):
+        conn.exec_driver_sql("UPDATE turnos_nueva SET id = ? WHERE id = ?", (nuevo, id))
+        conn.exec_driver_sql(
+            "UPDATE recordatorios SET turno_id = ? WHERE turno_id = ? AND fecha = ?", (nuevo, id, fecha)
+        )
+
+    conn.exec_driver_sql("DROP TABLE turnos")
+    conn.exec_driver_sql("ALTER TABLE turnos_nueva RENAME TO turnos")
+    for sql in objetos:
+        conn.exec_driver_sql(sql)
+    conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name IN ('turnos', 'turnos_nueva')")
+    conn.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('turnos', ?)", (tope + len(repetidos),))
+    if repetidos:
+        # El trigger de borrado pudo no restar turnos con ID repetido
+        resumen_diario.reconstruir(conn)
+
+
+def _precio_turnos(conn: Connection) -> None:
+    """Completa turnos.precio de los turnos anteriores a la columna con el precio del servicio"""
+    # Una sola vez: después un cambio de precio del servicio ya no toca sus importes.
+    # El trigger de resumen resta y suma el mismo importe (ver resumen_diario._IMPORTE)
+    for tabla in ("turnos", "turnos_archivo"):
+        conn.exec_driver_sql(
+            f"UPDATE {tabla} SET precio = coalesce((SELECT precio FROM servicios WHERE id = {tabla}.servicio_id), 0) "
+            "WHERE precio IS NULL"
+        )
+
+
+# La versión de cada migración es su posición en la lista (1, 2, ...)
+MIGRACIONES: list[Callable[[Connection], None]] = [
+    _tablas,
+    _columnas,
+    _indices_paginacion,
+    busqueda_clientes.crear_indice,
+    resumen_diario.crear_triggers,
+    _indice_historial_cliente,
+    versiones.crear_triggers_agenda,
+    _version_turnos,
+    _cola_recordatorios,
+    _archivo_turnos,
+    _idempotencia,
+    _turnos_autoincrement,
+    _precio_turnos,
+]
+
+
+def migrar(engine: Engine) -> int:
+    """Aplica las migraciones pendientes y devuelve la versión del esquema"""
+    with engine.begin() as conn:
+        VersionDB.__table__.create(bind=conn, checkfirst=True)
+        actual = leer_version(conn, CLAVE_VERSION)
+
+    for version, migracion in enumerate(MIGRACIONES[actual:], start=actual + 1):
+        logger.info("Migración %d: %s", version, migracion.__doc__.splitlines()[0])
+        with engine.begin() as conn:
+            migracion(conn)
+            fijar_version(conn, CLAVE_VERSION, version)
+
+    with engine.connect() as conn:
+        busqueda_clientes.detectar(conn)
+    return max(actual, len(MIGRACIONES))
+
+
+def _crear_indice(conn: Connection, nombre: str) -> None:
+    """Crea un índice declarado en los modelos, si no existe"""
+    for tabla in Base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            if indice.name == nombre:
+                indice.create(bind=conn, checkfirst=True)
+                return
+    raise ValueError(f"Índice desconocido: {nombre}")
@@ -0,0 +1,118 @@
+"""
+Respuestas guardadas por Idempotency-Key.
+El primer request con una clave la reserva (fila "en_curso") y al terminar
+guarda su respuesta (código y cuerpo JSON): los reintentos con la misma clave
+reciben esa respuesta sin volver a ejecutar nada. Las filas vencen a las
+TTL_HORAS y se borran de a tandas; una reserva que quedó colgada (el proceso
+se cayó a mitad de camino) se puede volver a tomar pasados RESERVA_SEGUNDOS.
+"""
+import os
+import time as reloj
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import String, DateTime, Integer, LargeBinary, Index, select, update, delete, or_, and_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Mapped, mapped_column, Session
+
+from .base import Base, PorSalon, ahora
+
+EN_CURSO = "en_curso"
+LISTO = "listo"
+
+TTL_HORAS = float(os.getenv("PETIT_IDEMPOTENCIA_TTL_HORAS", 24))
+RESERVA_SEGUNDOS = 60        # Después de esto una reserva sin respuesta se considera abandonada
+PURGA_SEGUNDOS = 300         # Cada cuánto se borran las filas vencidas (como mucho)
+TANDA_PURGA = 1000
+
+
+class PurgaIdempotencia:
+    """Cuándo toca la próxima purga de filas vencidas (una por salón)"""
+
+    def __init__(self):
+        self.proxima = 0.0
+
+    def toca(self) -> bool:
+        """True (y corre la próxima) si pasaron PURGA_SEGUNDOS desde la última purga"""
+        if reloj.monotonic() < self.proxima:
+            return False
+        self.proxima = reloj.monotonic() + PURGA_SEGUNDOS
+        return True
+
+
+purgas_idempotencia: PurgaIdempotencia = PorSalon(PurgaIdempotencia)
+
+
+class IdempotenciaDB(Base):
+    """Modelo de base de datos para la respuesta guardada de una Idempotency-Key"""
+    __tablename__ = "idempotencia"
+    __table_args__ = (
+        Index("ix_idempotencia_expira", "expira"),
+    )
+
+    clave: Mapped[str] = mapped_column(String(255), primary_key=True)
+    huella: Mapped[str] = mapped_column(String(32), nullable=False)   # Ruta y cuerpo del request original
+    estado: Mapped[str] = mapped_column(String(10), nullable=False)
+    codigo: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    cuerpo: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    creado: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    expira: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class IdempotenciaRepository:
+    """Repositorio de las respuestas guardadas por Idempotency-Key"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reservar(self, clave: str, huella: str) -> Optional[Row]:
+        """Reserva la clave para este request (devuelve None) o devuelve la fila de quien la tiene.
+
+        Una clave vencida o abandonada se reserva de nuevo en el mismo INSERT.
+        """
+        momento = ahora()
+        valores = {"huella": huella, "estado": EN_CURSO, "codigo": None, "cuerpo": None,
+                   "creado": momento, "expira": momento + timedelta(hours=TTL_HORAS)}
+        reservada = self.db.scalar(
+            insert(IdempotenciaDB).values(clave=clave, **valores).on_conflict_do_update(
+                index_elements=[IdempotenciaDB.clave], set_=valores,
+                where=or_(
+                    IdempotenciaDB.expira <= momento,
+                    and_(IdempotenciaDB.estado == EN_CURSO,
+                         IdempotenciaDB.creado <= momento - timedelta(seconds=RESERVA_SEGUNDOS)),
+                ),
+            ).returning(IdempotenciaDB.clave)
+        )
+        fila = None
+        if reservada is None:
+            fila = self.db.execute(
+                select(IdempotenciaDB.huella, IdempotenciaDB.estado, IdempotenciaDB.codigo, IdempotenciaDB.cuerpo)
+                .where(IdempotenciaDB.clave == clave)
+            ).one()
+        else:
+            self._purgar_si_toca(momento)
+        self.db.commit()
+        return fila
+
+    def completar(self, clave: str, codigo: int, cuerpo: bytes) -> None:
+        """Guarda la respuesta del request que tiene la clave"""
+        self.db.execute(
+            update(IdempotenciaDB).where(IdempotenciaDB.clave == clave)
+            .values(estado=LISTO, codigo=codigo, cuerpo=cuerpo)
+        )
+        self.db.commit()
+
+    def liberar(self, clave: str) -> None:
+        """Suelta una reserva sin respuesta (el request falló): el próximo reintento se ejecuta"""
+        self.db.execute(
+            delete(IdempotenciaDB).where(IdempotenciaDB.clave == clave, IdempotenciaDB.estado == EN_CURSO)
+        )
+        self.db.commit()
+
+    def _purgar_si_toca(self, momento: datetime) -> None:
+        """Borra una tanda de filas vencidas, como mucho una vez cada PURGA_SEGUNDOS por salón"""
+        if not purgas_idempotencia.toca():
+            return
+        vencidas = select(IdempotenciaDB.clave).where(IdempotenciaDB.expira <= momento).limit(TANDA_PURGA)
+        self.db.execute(delete(IdempotenciaDB).where(IdempotenciaDB.clave.in_(vencidas.scalar_subquery())))
@@ -0,0 +1,170 @@
+"""
+Índice en memoria de los intervalos ocupados de cada día.
+Lo usa TurnoRepository para detectar superposiciones y calcular horarios libres
+sin recorrer todos los turnos del día en cada reserva.
+
+Cada índice guarda la versión "agenda:AAAA-MM-DD" con la que se armó y solo
+vale mientras la base siga en esa versión: así no lo dejan viejo ni las
+escrituras de otros procesos ni las de otra sesión que todavía no lo actualizó.
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, time
+from threading import Lock
+from typing import Callable, Iterable, Optional
+
+from .base import PorSalon
+from ..dto.turno import EstadoTurno
+
+# Horario de atención usado para calcular la disponibilidad
+HORA_APERTURA = time(9, 0)
+HORA_CIERRE = time(20, 0)
+PASO_MIN = 15  # Cada cuántos minutos puede empezar un turno
+
+# Estados que ocupan lugar en la agenda (cancelados y ausentes liberan el horario)
+ESTADOS_OCUPAN = (
+    EstadoTurno.PENDIENTE.value,
+    EstadoTurno.CONFIRMADO.value,
+    EstadoTurno.COMPLETADO.value,
+)
+
+
+def a_minutos(hora: time) -> int:
+    """Convierte una hora en minutos desde las 00:00"""
+    return hora.hour * 60 + hora.minute
+
+
+def a_hora(minutos: int) -> time:
+    """Convierte minutos desde las 00:00 en una hora (tope 23:59)"""
+    minutos = min(minutos, 24 * 60 - 1)
+    return time(minutos // 60, minutos % 60)
+
+
+class IndiceDia:
+    """Intervalos [inicio, fin) ocupados en un día, ordenados por inicio.
+
+    Junto a cada posición se guarda el mayor fin hasta ella: los candidatos a
+    chocar son los que empiezan antes del nuevo fin (búsqueda binaria), y se
+    recorren hacia atrás solo mientras alguno anterior termine después del
+    nuevo inicio. Sin superposiciones previas es O(log n); con turnos viejos
+    que ya se superponían (o un servicio que se alargó) sigue siendo correcto.
+    """
+
+    def __init__(self, intervalos: Optional[list[tuple[int, int, int]]] = None, version: int = 0):
+        # Cada intervalo es (inicio, fin, turno_id), en minutos
+        self._intervalos = sorted(intervalos or [])
+        self._fin_maximo: list[int] = []
+        self._recalcular(0)
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self._intervalos)
+
+    def se_superpone(self, inicio: int, fin: int, excluir_id: Optional[int] = None) -> bool:
+        """Indica si [inicio, fin) choca con algún intervalo ocupado"""
+        i = bisect_left(self._intervalos, (fin,)) - 1
+        while i >= 0 and self._fin_maximo[i] > inicio:
+            _, fin_ocupado, turno_id = self._intervalos[i]
+            if turno_id != excluir_id and fin_ocupado > inicio:
+                return True
+            i -= 1
+        return False
+
+    def agregar(self, inicio: int, fin: int, turno_id: int) -> None:
+        """Registra un intervalo ocupado"""
+        intervalo = (inicio, fin, turno_id)
+        i = bisect_left(self._intervalos, intervalo)
+        self._intervalos.insert(i, intervalo)
+        self._recalcular(i)
+
+    def quitar(self, turno_id: int) -> bool:
+        """Quita el intervalo de un turno; devuelve True si estaba"""
+        for i, intervalo in enumerate(self._intervalos):
+            if intervalo[2] == turno_id:
+                del self._intervalos[i]
+                self._recalcular(i)
+                return True
+        return False
+
+    def _recalcular(self, desde: int) -> None:
+        """Rehace el mayor fin acumulado a partir de la posición `desde`"""
+        del self._fin_maximo[desde:]
+        maximo = self._fin_maximo[-1] if self._fin_maximo else 0
+        for _, fin, _ in self._intervalos[desde:]:
+            maximo = max(maximo, fin)
+            self._fin_maximo.append(maximo)
+
+    def huecos(self, duracion: int, apertura: int, cierre: int, paso: int = PASO_MIN) -> list[tuple[int, int]]:
+        """Lista los horarios libres donde entra un turno de `duracion` minutos"""
+        libres = []
+        cursor = apertura
+        for inicio, fin, _ in self._intervalos + [(cierre, cierre, 0)]:
+            limite = min(inicio, cierre)
+            # Alinear el comienzo a la grilla de `paso` minutos
+            desde = apertura + -(-(cursor - apertura) // paso) * paso
+            while desde + duracion <= limite:
+                libres.append((desde, desde + duracion))
+                desde += paso
+            cursor = max(cursor, fin)
+            if cursor >= cierre:
+                break
+        return libres
+
+
+class RegistroIndices:
+    """Cache LRU de índices por fecha, compartido por todas las sesiones del proceso"""
+
+    def __init__(self, max_dias: int = 64):
+        self.max_dias = max_dias
+        self._dias: OrderedDict[date, IndiceDia] = OrderedDict()
+        self._lock = Lock()
+
+    def obtener(self, fecha: date, version: int, cargar: Callable[[], IndiceDia]) -> IndiceDia:
+        """Devuelve el índice del día en `version`, cargándolo desde la base si no está o quedó viejo"""
+        with self._lock:
+            indice = self._dias.get(fecha)
+            if indice is not None and indice.version == version:
+                self._dias.move_to_end(fecha)
+                return indice
+        indice = cargar()
+        indice.version = version
+        with self._lock:
+            self._dias[fecha] = indice
+            self._dias.move_to_end(fecha)
+            while len(self._dias) > self.max_dias:
+                self._dias.popitem(last=False)
+        return indice
+
+    def aplicar(self, fecha: date, antes: int, despues: int, quitar: Iterable[int] = (),
+                agregar: Iterable[tuple[int, int, int]] = ()) -> None:
+        """Refleja una escritura ya confirmada que llevó el día de la versión `antes` a `despues`.
+
+        Si el índice no estaba en `antes` le faltan escrituras de otros: se
+        descarta y se vuelve a cargar la próxima vez que se use.
+        """
+        with self._lock:
+            indice = self._dias.get(fecha)
+            if indice is None:
+                return
+            if indice.version != antes:
+                del self._dias[fecha]
+                return
+            for turno_id in quitar:
+                indice.quitar(turno_id)
+            for inicio, fin, turno_id in agregar:
+                indice.agregar(inicio, fin, turno_id)
+            indice.version = despues
+
+    def invalidar(self, fecha: date) -> None:
+        """Descarta el índice de un día"""
+        with self._lock:
+            self._dias.pop(fecha, None)
+
+    def limpiar(self) -> None:
+        """Descarta todos los índices (p. ej. si cambia la duración de un servicio)"""
+        with self._lock:
+            self._dias.clear()
+
+
+# Un registro por salón (cada salón tiene su base y sus versiones)
+indices_agenda: RegistroIndices = PorSalon(RegistroIndices)
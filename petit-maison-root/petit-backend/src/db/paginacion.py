@@ -0,0 +1,108 @@
+"""
+Paginación por cursor (keyset) para los listados.
+El cursor es opaco para el cliente: codifica los valores de orden de la última
+fila devuelta, y la siguiente página arranca con un WHERE (claves) > (cursor)
+que usa el índice, así que cualquier página cuesta lo mismo que la primera.
+"""
+import base64
+import json
+from datetime import date, time, datetime
+from bisect import bisect_right
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import Query
+
+# Tamaño de página por defecto y máximo
+LIMITE_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+
+def codificar_cursor(valores: list) -> str:
+    """Convierte los valores de orden en un cursor opaco"""
+    crudo = json.dumps(valores, default=lambda v: v.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, claves: tuple) -> list:
+    """Recupera los valores de orden de un cursor; 400 si es inválido"""
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(crudo)
+        if not isinstance(valores, list) or len(valores) != len(claves):
+            raise ValueError
+        return [_convertir(v, clave.type.python_type) for v, clave in zip(valores, claves)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def paginar(query: Query, claves: tuple, limite: int, cursor: Optional[str],
+            descendente: bool = False) -> dict:
+    """Aplica paginación keyset ordenando por `claves` (la última debe ser única)"""
+    if cursor:
+        query = query.filter(_despues_del_cursor(claves, cursor, descendente))
+
+    orden = [c.desc() for c in claves] if descendente else list(claves)
+    filas = query.order_by(*orden).limit(limite + 1).all()
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor([getattr(filas[-1], c.key) for c in claves])
+    return {"items": filas, "next_cursor": siguiente}
+
+
+def paginar_filas(consulta: Select, claves: tuple, limite: int, cursor: Optional[str],
+                  leer: Callable[[Select], list[dict]], descendente: bool = False) -> dict:
+    """Como paginar, para un SELECT de columnas cuyas filas `leer` devuelve como diccionarios"""
+    if cursor:
+        consulta = consulta.where(_despues_del_cursor(claves, cursor, descendente))
+
+    orden = [c.desc() for c in claves] if descendente else list(claves)
+    filas = leer(consulta.order_by(*orden).limit(limite + 1))
+
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = codificar_cursor([filas[-1][c.key] for c in claves])
+    return {"items": filas, "next_cursor": siguiente}
+
+
+def _despues_del_cursor(claves: tuple, cursor: str, descendente: bool):
+    """WHERE (claves) > (cursor), o < si el orden es descendente"""
+    valores = decodificar_cursor(cursor, claves)
+    if descendente:
+        return tuple_(*claves) < tuple_(*valores)
+    return tuple_(*claves) > tuple_(*valores)
+
+
+def paginar_lista(items: list, claves: tuple[str, ...], limite: int, cursor: Optional[str]) -> dict:
+    """Paginación keyset sobre una lista en memoria ya ordenada por `claves`"""
+    def clave(item) -> tuple:
+        return tuple(getattr(item, c) for c in claves)
+
+    inicio = 0
+    if cursor:
+        try:
+            valores = tuple(json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))))
+            if len(valores) != len(claves):
+                raise ValueError
+            inicio = bisect_right(items, valores, key=clave)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    pagina = items[inicio:inicio + limite]
+    siguiente = None
+    if inicio + limite < len(items):
+        siguiente = codificar_cursor(list(clave(pagina[-1])))
+    return {"items": pagina, "next_cursor": siguiente}
+
+
+def _convertir(valor, tipo: type):
+    """Reconstruye fechas y horas guardadas como texto ISO en el cursor"""
+    if tipo in (date, time, datetime):
+        return tipo.fromisoformat(valor)
+    if not isinstance(valor, tipo):
+        raise TypeError
+    return valor
@@ -0,0 +1,188 @@
+"""
+Cola persistente de recordatorios de turnos.
+Cada fila es un recordatorio por (turno, fecha): volver a escanear un día no
+duplica nada, y si el turno se muda a otro día el escaneo de ese día encola
+uno nuevo. Los despachadores toman tandas con un UPDATE ... RETURNING que las
+reserva por un rato (`proximo_intento` = fin de la reserva): dos procesos
+nunca toman el mismo recordatorio, y si uno se cae a mitad de un envío la
+reserva vence y otro lo retoma. Cada reserva cuenta como un intento, así
+un envío que nunca vuelve también termina en FALLIDO.
+"""
+from sqlalchemy import String, Date, DateTime, Integer, ForeignKey, Index, UniqueConstraint, select, update, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Mapped, mapped_column, Session
+from sqlalchemy.sql import func
+from typing import Optional
+from datetime import date, datetime, time, timedelta
+
+from .base import Base, ahora
+from .cliente_repository import ClienteDB
+from .servicio_repository import ServicioDB
+from .turno_repository import TurnoDB, ESTADOS_ABIERTOS
+
+# Estados de un recordatorio
+PENDIENTE = "pendiente"
+ENVIANDO = "enviando"        # Reservado por un despachador hasta `proximo_intento`
+ENVIADO = "enviado"
+FALLIDO = "fallido"          # Agotó los reintentos
+DESCARTADO = "descartado"    # El turno se canceló, se cerró, se borró o cambió de día
+REINTENTO = "reintento"      # Resultado de un envío fallido que vuelve a la cola (queda pendiente)
+
+RESERVA_SEGUNDOS = 300       # Cuánto tiene un despachador para enviar lo que tomó
+MAX_INTENTOS = 5
+ESPERA_REINTENTO_SEGUNDOS = 30   # Se duplica en cada intento
+
+
+class RecordatorioDB(Base):
+    """Modelo de base de datos para un recordatorio en cola"""
+    __tablename__ = "recordatorios"
+    __table_args__ = (
+        UniqueConstraint("turno_id", "fecha", name="uq_recordatorios_turno_fecha"),
+        # Lo próximo a enviar, sin recorrer los ya enviados
+        Index("ix_recordatorios_cola", "estado", "proximo_intento"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    turno_id: Mapped[int] = mapped_column(ForeignKey("turnos.id"), nullable=False)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
+    estado: Mapped[str] = mapped_column(String(20), nullable=False, default=PENDIENTE)
+    intentos: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    proximo_intento: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    enviado_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+
+class RecordatorioRepository:
+    """Repositorio de la cola de recordatorios"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def encolar_dia(self, fecha: date, tanda: int) -> int:
+        """Encola un recordatorio por turno abierto del día, en tandas por el índice (fecha, hora_inicio).
+
+        Cada tanda es una transacción corta: no frena las reservas mientras
+        se escanea un día cargado. Devuelve cuántos recordatorios son nuevos.
+        """
+        encolados = 0
+        ultimo = (time.min, 0)
+        while True:
+            filas = self.db.execute(
+                select(TurnoDB.id, TurnoDB.hora_inicio).where(
+                    TurnoDB.fecha == fecha,
+                    TurnoDB.estado.in_(ESTADOS_ABIERTOS),
+                    tuple_(TurnoDB.hora_inicio, TurnoDB.id) > ultimo,
+                ).order_by(TurnoDB.hora_inicio, TurnoDB.id).limit(tanda)
+            ).all()
+            if not filas:
+                return encolados
+            momento = ahora()
+            nuevos = self.db.scalars(
+                insert(RecordatorioDB).on_conflict_do_nothing().returning(RecordatorioDB.id),
+                [{"turno_id": id, "fecha": fecha, "estado": PENDIENTE, "intentos": 0,
+                  "proximo_intento": momento} for id, _ in filas]
+            ).all()
+            self.db.commit()
+            encolados += len(nuevos)
+            ultimo = (filas[-1].hora_inicio, filas[-1].id)
+
+    def tomar(self, cantidad: int) -> list[dict]:
+        """Reserva hasta `cantidad` recordatorios listos y los devuelve con los datos del turno.
+
+        Los vencidos (turno cancelado, cerrado, borrado o mudado de día) se
+        descartan en la misma transacción y no se devuelven.
+        """
+        momento = ahora()
+        # Una reserva vencida es un intento que no volvió (el despachador se cayó
+        # o se colgó): si ya no quedan intentos, no se vuelve a tomar
+        self.db.execute(
+            update(RecordatorioDB).where(
+                RecordatorioDB.estado == ENVIANDO,
+                RecordatorioDB.proximo_intento <= momento,
+                RecordatorioDB.intentos >= MAX_INTENTOS,
+            ).values(estado=FALLIDO, error="La reserva venció sin resultado")
+        )
+        listos = select(RecordatorioDB.id).where(
+            RecordatorioDB.estado.in_((PENDIENTE, ENVIANDO)),
+            RecordatorioDB.proximo_intento <= momento,
+        ).order_by(RecordatorioDB.proximo_intento).limit(cantidad)
+        tomados = self.db.execute(
+            update(RecordatorioDB).where(RecordatorioDB.id.in_(listos.scalar_subquery())).values(
+                estado=ENVIANDO, intentos=RecordatorioDB.intentos + 1,
+                proximo_intento=momento + timedelta(seconds=RESERVA_SEGUNDOS),
+            ).returning(RecordatorioDB.id, RecordatorioDB.turno_id, RecordatorioDB.fecha, RecordatorioDB.intentos)
+        ).all()
+        if not tomados:
+            self.db.commit()
+            return []
+
+        detalles = {fila.turno_id: fila._asdict() for fila in self.db.execute(
+            select(
+                TurnoDB.id.label("turno_id"), TurnoDB.fecha, TurnoDB.hora_inicio,
+                ClienteDB.nombre.label("cliente_nombre"),
+                ClienteDB.telefono.label("cliente_telefono"),
+                ClienteDB.email.label("cliente_email"),
+                ServicioDB.nombre.label("servicio_nombre"),
+            ).join(
+                ClienteDB, TurnoDB.cliente_id == ClienteDB.id
+            ).join(
+                ServicioDB, TurnoDB.servicio_id == ServicioDB.id
+            ).where(
+                TurnoDB.id.in_([t.turno_id for t in tomados]),
+                TurnoDB.estado.in_(ESTADOS_ABIERTOS),
+            )
+        )}
+        listos, vencidos = [], []
+        for t in tomados:
+            detalle = detalles.get(t.turno_id)
+            if detalle is None or detalle["fecha"] != t.fecha:
+                vencidos.append(t.id)
+            else:
+                listos.append({**detalle, "id": t.id, "intentos": t.intentos})
+        if vencidos:
+            self.db.execute(
+                update(RecordatorioDB).where(RecordatorioDB.id.in_(vencidos)).values(estado=DESCARTADO)
+            )
+        self.db.commit()
+        return listos
+
+    def registrar(self, enviados: list[int], fallidos: list[tuple[int, int, str]]) -> dict[str, int]:
+        """Guarda el resultado de una tanda: `fallidos` trae (id, intentos, error).
+
+        Los fallidos vuelven a la cola con espera exponencial hasta
+        MAX_INTENTOS. Solo cambian los que siguen en la reserva con la que se
+        tomaron: un resultado tardío no pisa lo que ya hizo otro despachador.
+        Devuelve cuántos quedaron en cada estado.
+        """
+        momento = ahora()
+        resultado = {ENVIADO: 0, REINTENTO: 0, FALLIDO: 0}
+        if enviados:
+            resultado[ENVIADO] = len(self.db.scalars(
+                update(RecordatorioDB).where(
+                    RecordatorioDB.id.in_(enviados), RecordatorioDB.estado == ENVIANDO
+                ).values(estado=ENVIADO, enviado_at=momento, error=None).returning(RecordatorioDB.id)
+            ).all())
+        for id, intentos, error in fallidos:
+            # Los fallidos son pocos: un UPDATE por clave primaria cada uno; el intento identifica la reserva
+            estado = self.db.scalar(
+                update(RecordatorioDB).where(
+                    RecordatorioDB.id == id, RecordatorioDB.intentos == intentos, RecordatorioDB.estado == ENVIANDO
+                ).values(
+                    estado=FALLIDO if intentos >= MAX_INTENTOS else PENDIENTE, error=error[:500],
+                    proximo_intento=momento + timedelta(seconds=ESPERA_REINTENTO_SEGUNDOS * 2 ** (intentos - 1)),
+                ).returning(RecordatorioDB.estado)
+            )
+            if estado is not None:
+                resultado[REINTENTO if estado == PENDIENTE else FALLIDO] += 1
+        self.db.commit()
+        return resultado
+
+    def contar(self, fecha: Optional[date] = None) -> dict[str, int]:
+        """Cantidad de recordatorios por estado (de un día, o de toda la cola)"""
+        consulta = select(RecordatorioDB.estado, func.count()).group_by(RecordatorioDB.estado)
+        if fecha is not None:
+            consulta = consulta.where(RecordatorioDB.fecha == fecha)
+        return dict(self.db.execute(consulta).tuples().all())
@@ -0,0 +1,108 @@
+from sqlalchemy import String, Date, Float, ForeignKey, select, func
+from sqlalchemy.orm import Mapped, mapped_column, Session
+from fastapi import HTTPException
+from typing import Optional
+from datetime import date
+
+from .base import Base
+from .catalogo_servicios import catalogo_servicios
+from ..dto.turno import EstadoTurno
+
+
+class ResumenDiarioDB(Base):
+    """Modelo de base de datos para el resumen diario (lo mantienen triggers, ver resumen_diario)"""
+    __tablename__ = "resumen_diario"
+
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    servicio_id: Mapped[int] = mapped_column(ForeignKey("servicios.id"), primary_key=True)
+    estado: Mapped[str] = mapped_column(String(20), primary_key=True)
+    cantidad: Mapped[int] = mapped_column(nullable=False, default=0)
+    importe: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+
+class ReporteRepository:
+    """Repositorio de reportes: lee solo resumen_diario, nunca turnos"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ingresos(self, desde: date, hasta: date, servicio_id: Optional[int] = None) -> dict:
+        """Ingresos (turnos completados) por día y servicio"""
+        self._validar_rango(desde, hasta)
+        consulta = select(
+            ResumenDiarioDB.fecha, ResumenDiarioDB.servicio_id,
+            ResumenDiarioDB.cantidad, ResumenDiarioDB.importe
+        ).where(
+            ResumenDiarioDB.fecha.between(desde, hasta),
+            ResumenDiarioDB.estado == EstadoTurno.COMPLETADO.value,
+            ResumenDiarioDB.cantidad > 0
+        ).order_by(ResumenDiarioDB.fecha, ResumenDiarioDB.servicio_id)
+        if servicio_id is not None:
+            consulta = consulta.where(ResumenDiarioDB.servicio_id == servicio_id)
+
+        detalle = [
+            {
+                "fecha": fila.fecha,
+                "servicio_id": fila.servicio_id,
+                "servicio_nombre": self._nombre_servicio(fila.servicio_id),
+                "completados": fila.cantidad,
+                "ingresos": round(fila.importe, 2),
+            }
+            for fila in self.db.execute(consulta)
+        ]
+        return {
+            "desde": desde,
+            "hasta": hasta,
+            "total": round(sum(d["ingresos"] for d in detalle), 2),
+            "detalle": detalle,
+        }
+
+    def asistencia(self, desde: date, hasta: date) -> list[dict]:
+        """Tasas de ausencia y cancelación por servicio, con una fila de total al final"""
+        self._validar_rango(desde, hasta)
+        filas = self.db.execute(
+            select(
+                ResumenDiarioDB.servicio_id, ResumenDiarioDB.estado,
+                func.sum(ResumenDiarioDB.cantidad).label("cantidad")
+            ).where(
+                ResumenDiarioDB.fecha.between(desde, hasta)
+            ).group_by(ResumenDiarioDB.servicio_id, ResumenDiarioDB.estado)
+        ).all()
+
+        por_servicio: dict[Optional[int], dict[str, int]] = {}
+        for fila in filas:
+            for clave in (fila.servicio_id, None):
+                conteo = por_servicio.setdefault(clave, {})
+                conteo[fila.estado] = conteo.get(fila.estado, 0) + fila.cantidad
+
+        claves = sorted(k for k in por_servicio if k is not None) + ([None] if por_servicio else [])
+        return [self._tasas(clave, por_servicio[clave]) for clave in claves]
+
+    def _tasas(self, servicio_id: Optional[int], conteo: dict[str, int]) -> dict:
+        """Arma una fila de asistencia a partir de la cantidad de turnos por estado"""
+        completados = conteo.get(EstadoTurno.COMPLETADO.value, 0)
+        ausentes = conteo.get(EstadoTurno.NO_ASISTIO.value, 0)
+        cancelados = conteo.get(EstadoTurno.CANCELADO.value, 0)
+        turnos = sum(conteo.values())
+        # La ausencia se mide sobre los turnos que llegaron a su horario
+        return {
+            "servicio_id": servicio_id,
+            "servicio_nombre": self._nombre_servicio(servicio_id) if servicio_id else None,
+            "turnos": turnos,
+            "completados": completados,
+            "ausentes": ausentes,
+            "cancelados": cancelados,
+            "tasa_ausencia": round(ausentes / (completados + ausentes), 4) if completados + ausentes else 0.0,
+            "tasa_cancelacion": round(cancelados / turnos, 4) if turnos else 0.0,
+        }
+
+    def _nombre_servicio(self, servicio_id: int) -> Optional[str]:
+        """Nombre del servicio desde el catálogo en memoria"""
+        servicio = catalogo_servicios.por_id(self.db, servicio_id)
+        return servicio.nombre if servicio else None
+
+    @staticmethod
+    def _validar_rango(desde: date, hasta: date) -> None:
+        """400 si el rango está invertido"""
+        if hasta < desde:
+            raise HTTPException(status_code=400, detail="La fecha 'hasta' es anterior a 'desde'")
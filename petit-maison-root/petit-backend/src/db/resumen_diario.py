@@ -0,0 +1,83 @@
+"""
+Resumen diario de turnos por (fecha, servicio_id, estado): cantidad e importe.
+Lo mantienen triggers de SQLite sobre turnos, así cada INSERT/UPDATE/DELETE
+del repositorio (altas, lotes, series, cambios de estado) lo actualiza en la
+misma sentencia y transacción. Los reportes leen solo esta tabla.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Connection, text
+
+TABLA = "resumen_diario"
+
+# Importe del turno: el precio copiado al reservar (o el del servicio en filas viejas)
+_IMPORTE = "COALESCE({t}.precio, (SELECT precio FROM servicios WHERE id = {t}.servicio_id), 0)"
+
+_SUMAR = f"""
+    INSERT INTO {TABLA}(fecha, servicio_id, estado, cantidad, importe)
+    VALUES (NEW.fecha, NEW.servicio_id, NEW.estado, 1, {_IMPORTE.format(t="NEW")})
+    ON CONFLICT(fecha, servicio_id, estado) DO UPDATE
+    SET cantidad = cantidad + 1, importe = importe + excluded.importe;
+"""
+
+_RESTAR = f"""
+    UPDATE {TABLA}
+    SET cantidad = cantidad - 1, importe = importe - {_IMPORTE.format(t="OLD")}
+    WHERE fecha = OLD.fecha AND servicio_id = OLD.servicio_id AND estado = OLD.estado;
+"""
+
+TRIGGERS = {
+    "resumen_turnos_insert": f"AFTER INSERT ON turnos BEGIN {_SUMAR} END",
+    "resumen_turnos_update": (
+        f"AFTER UPDATE OF fecha, servicio_id, estado, precio ON turnos BEGIN {_RESTAR} {_SUMAR} END"
+    ),
+    # Un turno que pasó a turnos_archivo sigue contando (ver archivo_turnos)
+    "resumen_turnos_delete": (
+        "AFTER DELETE ON turnos WHEN NOT EXISTS (SELECT 1 FROM turnos_archivo WHERE id = OLD.id) "
+        f"BEGIN {_RESTAR} END"
+    ),
+}
+
+
+def crear_triggers(conn: Connection) -> None:
+    """Crea los triggers y llena el resumen si la tabla es nueva y ya hay turnos"""
+    for nombre, cuerpo in TRIGGERS.items():
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}")
+
+    vacio = conn.exec_driver_sql(f"SELECT NOT EXISTS (SELECT 1 FROM {TABLA})").scalar()
+    hay_turnos = conn.exec_driver_sql("SELECT EXISTS (SELECT 1 FROM turnos)").scalar()
+    if vacio and hay_turnos:
+        reconstruir(conn)
+
+
+def actualizar_trigger_borrado(conn: Connection) -> None:
+    """Vuelve a crear el trigger de borrado (las bases anteriores al archivo restaban los archivados)"""
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS resumen_turnos_delete")
+    conn.exec_driver_sql(f"CREATE TRIGGER resumen_turnos_delete {TRIGGERS['resumen_turnos_delete']}")
+
+
+def reconstruir(conn: Connection, desde: Optional[date] = None, hasta: Optional[date] = None) -> int:
+    """Recalcula el resumen (todo o un rango de fechas) desde turnos y el archivo; devuelve las filas escritas"""
+    condiciones = []
+    params = {}
+    if desde is not None:
+        condiciones.append("fecha >= :desde")
+        params["desde"] = desde.isoformat()
+    if hasta is not None:
+        condiciones.append("fecha <= :hasta")
+        params["hasta"] = hasta.isoformat()
+    filtro = "WHERE " + " AND ".join(condiciones) if condiciones else ""
+
+    conn.execute(text(f"DELETE FROM {TABLA} {filtro}"), params)
+    origen = "turnos"
+    if conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'turnos_archivo'").first():
+        origen = ("(SELECT fecha, servicio_id, estado, precio FROM turnos UNION ALL "
+                  "SELECT fecha, servicio_id, estado, precio FROM turnos_archivo)")
+    # Sin tocar turnos: las filas sin precio suman el del servicio, como en los triggers
+    return conn.execute(text(f"""
+        INSERT INTO {TABLA}(fecha, servicio_id, estado, cantidad, importe)
+        SELECT fecha, servicio_id, estado, count(*), sum({_IMPORTE.format(t="t")})
+        FROM {origen} AS t {filtro}
+        GROUP BY fecha, servicio_id, estado
+    """), params).rowcount
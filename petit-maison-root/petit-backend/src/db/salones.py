@@ -0,0 +1,149 @@
+"""
+Un salón = una base SQLite propia.
+Cada sucursal tiene su archivo en PETIT_SALONES_DIR (<salon>.db): los datos
+quedan aislados y las escrituras de un salón no esperan el lock de otro.
+Los motores de cada salón (sync y async, con un pool chico) se abren la
+primera vez que se usan, se migran en ese momento y quedan en un LRU de
+hasta PETIT_SALONES_MAX salones: al desalojar uno se cierran sus conexiones.
+
+Un salón existe si está en PETIT_SALONES (lista separada por comas; su base
+se crea al primer uso) o si ya tiene su archivo (ver comando crear-salon).
+"""
+import asyncio
+import logging
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+from fastapi import HTTPException, status
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from .base import (
+    DB_DIR, crear_motor, crear_motor_async, crear_sesiones, crear_sesiones_async, _env_int
+)
+
+logger = logging.getLogger("petit.db")
+
+SALONES_DIR = Path(os.getenv("PETIT_SALONES_DIR", DB_DIR / "salones"))
+SALONES = frozenset(s.strip() for s in os.getenv("PETIT_SALONES", "").split(",") if s.strip())
+MAX_ABIERTOS = _env_int("PETIT_SALONES_MAX", 32)             # Salones con motores abiertos a la vez
+POOL_SIZE = _env_int("PETIT_SALON_POOL_SIZE", 2)             # Conexiones por salón (y por motor)
+POOL_MAX_OVERFLOW = _env_int("PETIT_SALON_POOL_MAX_OVERFLOW", 3)
+
+# Un nombre de salón es una etiqueta DNS: sirve de subdominio y de nombre de archivo
+NOMBRE_SALON = re.compile(r"^[a-z0-9](?:[a-z0-9-]{0,38}[a-z0-9])?$")
+
+
+def nombre_valido(salon: str) -> bool:
+    return NOMBRE_SALON.fullmatch(salon) is not None
+
+
+def archivo(salon: str) -> Path:
+    """Archivo de la base de un salón"""
+    return SALONES_DIR / f"{salon}.db"
+
+
+def existe(salon: str) -> bool:
+    """Indica si el salón está configurado o ya tiene su base"""
+    return nombre_valido(salon) and (salon in SALONES or archivo(salon).exists())
+
+
+def conocidos() -> list[str]:
+    """Salones configurados o con base, ordenados"""
+    con_base = {p.stem for p in SALONES_DIR.glob("*.db") if nombre_valido(p.stem)} if SALONES_DIR.is_dir() else set()
+    return sorted(SALONES | con_base)
+
+
+@dataclass
+class MotoresSalon:
+    """Motores y fábricas de sesiones de la base de un salón"""
+    engine: Engine
+    async_engine: AsyncEngine
+    sesiones: sessionmaker
+    sesiones_async: async_sessionmaker
+
+
+class RegistroMotores:
+    """LRU de motores por salón, con migración en el primer uso"""
+
+    def __init__(self, maximo: int = MAX_ABIERTOS):
+        self.maximo = max(1, maximo)
+        self._abiertos: OrderedDict[str, MotoresSalon] = OrderedDict()
+        self._lock = Lock()
+        # Motores async desalojados: se cierran desde el event loop (ver preparar)
+        self._por_cerrar: list[AsyncEngine] = []
+
+    def obtener(self, salon: str) -> MotoresSalon:
+        """Motores del salón; los abre y migra su base si no estaban abiertos"""
+        motores = self._abiertos.get(salon)
+        if motores is not None:
+            self._tocar(salon)
+            return motores
+        with self._lock:
+            motores = self._abiertos.get(salon)
+            if motores is None:
+                motores = self._abrir(salon)
+                self._abiertos[salon] = motores
+                while len(self._abiertos) > self.maximo:
+                    _, viejo = self._abiertos.popitem(last=False)
+                    viejo.engine.dispose()
+                    self._por_cerrar.append(viejo.async_engine)
+            else:
+                self._abiertos.move_to_end(salon)
+        return motores
+
+    async def preparar(self, salon: str) -> MotoresSalon:
+        """Como obtener, pero abre y migra fuera del event loop; cierra los motores async desalojados"""
+        motores = self._abiertos.get(salon)
+        if motores is not None:
+            self._tocar(salon)
+        else:
+            motores = await asyncio.to_thread(self.obtener, salon)
+        while self._por_cerrar:
+            await self._por_cerrar.pop().dispose()
+        return motores
+
+    def abiertos(self) -> list[str]:
+        """Salones con motores abiertos, del menos al más usado"""
+        return list(self._abiertos)
+
+    def _tocar(self, salon: str) -> None:
+        try:
+            self._abiertos.move_to_end(salon)
+        except KeyError:
+            pass  # Otro hilo lo desalojó: sus sesiones en curso terminan igual
+
+    def _abrir(self, salon: str) -> MotoresSalon:
+        from .esquema import migrar
+
+        if not existe(salon):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Salón desconocido")
+        SALONES_DIR.mkdir(parents=True, exist_ok=True)
+        ruta = archivo(salon)
+        engine = crear_motor(f"sqlite:///{ruta}", POOL_SIZE, POOL_MAX_OVERFLOW)
+        async_engine = crear_motor_async(f"sqlite+aiosqlite:///{ruta}", POOL_SIZE, POOL_MAX_OVERFLOW)
+        version = migrar(engine)
+        logger.info("Salón %s abierto (esquema en versión %d)", salon, version)
+        return MotoresSalon(engine, async_engine, crear_sesiones(engine), crear_sesiones_async(async_engine))
+
+
+motores_salon = RegistroMotores()
+
+
+def crear_salon(salon: str) -> int:
+    """Crea (o migra) la base de un salón; devuelve la versión del esquema"""
+    from .esquema import migrar
+
+    if not nombre_valido(salon):
+        raise ValueError(f"Nombre de salón inválido: {salon}")
+    SALONES_DIR.mkdir(parents=True, exist_ok=True)
+    engine = crear_motor(f"sqlite:///{archivo(salon)}", 1, 0)
+    try:
+        return migrar(engine)
+    finally:
+        engine.dispose()
@@ -1,15 +1,29 @@
-from sqlalchemy import String, Float, Boolean
+from sqlalchemy import String, Float, Boolean, Index, insert, update
 from sqlalchemy.orm import Mapped, mapped_column, Session
 from fastapi import HTTPException
 from typing import Optional
+from datetime import date
 
 from .base import Base
+from .indice_agenda import indices_agenda
+from .paginacion import paginar_lista, LIMITE_DEFECTO
+from .versiones import incrementar_version, incrementar_agendas
+from .cache_agenda import cache_agenda
+from .catalogo_servicios import catalogo_servicios, ServicioCache, CLAVE_VERSION
 from ..dto.servicio import ServicioCreate, ServicioUpdate
 
 
+# Campos del servicio que aparecen en el detalle de la agenda
+CAMPOS_AGENDA = ("nombre", "duracion_min", "precio")
+
+
 class ServicioDB(Base):
     """Modelo de base de datos para Servicio"""
     __tablename__ = "servicios"
+    __table_args__ = (
+        # Orden estable para la paginación por cursor
+        Index("ix_servicios_nombre_id", "nombre", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     nombre: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -25,53 +39,69 @@ class ServicioRepository:
         self.db = db
 
     def crear(self, data: ServicioCreate) -> ServicioDB:
-        """Crea un nuevo servicio"""
-        servicio = ServicioDB(
-            nombre=data.nombre,
-            duracion_min=data.duracion_min,
-            precio=data.precio,
-            activo=True
-        )
-        self.db.add(servicio)
+        """Crea un nuevo servicio (INSERT ... RETURNING, sin refresh)"""
+        servicio = self.db.scalars(
+            insert(ServicioDB).values(**data.model_dump(), activo=True).returning(ServicioDB)
+        ).one()
+        incrementar_version(self.db, CLAVE_VERSION)
         self.db.commit()
-        self.db.refresh(servicio)
+        catalogo_servicios.invalidar()
         return servicio
 
-    def listar(self, solo_activos: bool = True) -> list[ServicioDB]:
-        """Lista servicios (por defecto solo activos)"""
-        query = self.db.query(ServicioDB)
+    def listar(self, solo_activos: bool = True, limite: int = LIMITE_DEFECTO,
+               cursor: Optional[str] = None) -> dict:
+        """Lista una página de servicios (por defecto solo activos), desde el catálogo en memoria"""
+        servicios = catalogo_servicios.servicios(self.db)
         if solo_activos:
-            query = query.filter(ServicioDB.activo == True)
-        return query.order_by(ServicioDB.nombre).all()
+            servicios = [s for s in servicios if s.activo]
+        return paginar_lista(servicios, ("nombre", "id"), limite, cursor)
+
+    def version(self) -> int:
+        """Versión de los servicios del catálogo en memoria, la de lo que devuelven listar y por_id (para ETags)"""
+        return catalogo_servicios.version(self.db)
 
-    def por_id(self, id: int) -> ServicioDB:
-        """Obtiene un servicio por su ID"""
-        servicio = self.db.query(ServicioDB).filter(ServicioDB.id == id).first()
+    def por_id(self, id: int) -> ServicioCache:
+        """Obtiene un servicio por su ID, desde el catálogo en memoria"""
+        servicio = catalogo_servicios.por_id(self.db, id)
         if not servicio:
             raise HTTPException(status_code=404, detail="Servicio no encontrado")
         return servicio
 
-    def actualizar(self, id: int, data: ServicioUpdate) -> ServicioDB:
-        """Actualiza un servicio existente"""
-        servicio = self.por_id(id)
-        
-        if data.nombre is not None:
-            servicio.nombre = data.nombre
-        if data.duracion_min is not None:
-            servicio.duracion_min = data.duracion_min
-        if data.precio is not None:
-            servicio.precio = data.precio
-        if data.activo is not None:
-            servicio.activo = data.activo
-        
-        self.db.commit()
-        self.db.refresh(servicio)
-        return servicio
+    def actualizar(self, id: int, data: ServicioUpdate) -> tuple[ServicioDB, list[date]]:
+        """Actualiza un servicio existente (un solo UPDATE ... RETURNING).
+
+        Devuelve el servicio y los días de la agenda donde cambió lo que se muestra de él.
+        """
+        cambios = data.model_dump(exclude_none=True)
+        if not cambios:
+            return self.por_id(id), []
+
+        anterior = catalogo_servicios.por_id(self.db, id, al_dia=True)
+        # La agenda muestra nombre, duración y precio: si cambian, cambian los días donde aparece el servicio
+        en_agenda = anterior is None or any(
+            cambios.get(campo, getattr(anterior, campo)) != getattr(anterior, campo) for campo in CAMPOS_AGENDA
+        )
+        servicio, dias = self._actualizar_fila(id, cambios, en_agenda)
+        if anterior is None or anterior.duracion_min != servicio.duracion_min:
+            # Los intervalos ocupados cambian en todos los días
+            indices_agenda.limpiar()
+        return servicio, dias
 
     def desactivar(self, id: int) -> ServicioDB:
         """Desactiva un servicio (no lo elimina)"""
-        servicio = self.por_id(id)
-        servicio.activo = False
+        return self._actualizar_fila(id, {"activo": False})[0]
+
+    def _actualizar_fila(self, id: int, cambios: dict, en_agenda: bool = False) -> tuple[ServicioDB, list[date]]:
+        """UPDATE ... RETURNING de un servicio (y los días de la agenda que cambian si `en_agenda`); 404 si no existe"""
+        servicio = self.db.scalars(
+            update(ServicioDB).where(ServicioDB.id == id).values(**cambios).returning(ServicioDB),
+            execution_options={"populate_existing": True}
+        ).one_or_none()
+        if not servicio:
+            raise HTTPException(status_code=404, detail="Servicio no encontrado")
+        dias = incrementar_agendas(self.db, "servicio_id", id) if en_agenda else []
+        incrementar_version(self.db, CLAVE_VERSION)
         self.db.commit()
-        self.db.refresh(servicio)
-        return servicio
+        catalogo_servicios.invalidar()
+        cache_agenda.invalidar(dias)
+        return servicio, dias
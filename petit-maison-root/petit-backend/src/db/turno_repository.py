@@ -1,32 +1,142 @@
-from sqlalchemy import String, Date, Time, DateTime, ForeignKey
+from sqlalchemy import (
+    String, Date, Time, DateTime, Float, Integer, ForeignKey, Index, Select,
+    insert, select, update, delete, exists, literal, text, case, union_all
+)
 from sqlalchemy.orm import Mapped, mapped_column, Session
 from sqlalchemy.sql import func
 from fastapi import HTTPException
-from typing import Optional
-from datetime import date, time, datetime
+from typing import Callable, Iterable, Optional
+from collections import Counter, defaultdict
+from datetime import date, time, datetime, timedelta
 
-from .base import Base
-from .cliente_repository import ClienteDB
+from .base import Base, bloquear_escritura
+from .cliente_repository import ClienteDB, CLAVE_VERSION as CLAVE_CLIENTES
 from .servicio_repository import ServicioDB
-from ..dto.turno import TurnoCreate, TurnoUpdate, EstadoTurno
+from .catalogo_servicios import catalogo_servicios, ServicioCache, CLAVE_VERSION as CLAVE_SERVICIOS
+from .versiones import leer_version, leer_versiones, clave_agenda
+from .paginacion import paginar_filas, LIMITE_DEFECTO
+from .cache_agenda import cache_agenda
+from .indice_agenda import (
+    IndiceDia, indices_agenda, a_minutos, a_hora,
+    ESTADOS_OCUPAN, HORA_APERTURA, HORA_CIERRE, PASO_MIN
+)
+from ..dto.turno import (
+    TurnoCreate, TurnoUpdate, TurnoImport, EstadoTurno, ResultadoCambio,
+    SerieCreate, SerieUpdate, Frecuencia
+)
+
+
+class SerieDB(Base):
+    """Modelo de base de datos para una serie de turnos recurrentes"""
+    __tablename__ = "series_turnos"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    frecuencia: Mapped[str] = mapped_column(String(20), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
 
 
 class TurnoDB(Base):
     """Modelo de base de datos para Turno"""
     __tablename__ = "turnos"
+    __table_args__ = (
+        # Cubre el filtro por fecha y el ORDER BY hora_inicio de las agendas
+        Index("ix_turnos_fecha_hora", "fecha", "hora_inicio"),
+        # Historial de un cliente sin ordenar en memoria (se recorre al revés para DESC)
+        Index("ix_turnos_cliente_fecha", "cliente_id", "fecha", "hora_inicio"),
+        # Los IDs no se reusan: los de turnos_archivo siguen siendo de sus turnos
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     cliente_id: Mapped[int] = mapped_column(ForeignKey("clientes.id"), nullable=False)
     servicio_id: Mapped[int] = mapped_column(ForeignKey("servicios.id"), nullable=False)
-    fecha: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
     hora_inicio: Mapped[time] = mapped_column(Time, nullable=False)
     estado: Mapped[str] = mapped_column(String(20), default="pendiente")
     notas: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # Precio del servicio al reservar: los reportes no cambian si después cambia la lista
+    precio: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    serie_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("series_turnos.id"), nullable=True, index=True
+    )
+    # Sube con cada UPDATE: quien actualiza con la versión que leyó no pisa cambios ajenos
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default=text("1"))
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
 
 
+class TurnoArchivoDB(Base):
+    """Turnos cerrados viejos, movidos fuera de turnos (ver archivo_turnos)"""
+    __tablename__ = "turnos_archivo"
+    __table_args__ = (
+        Index("ix_turnos_archivo_fecha_hora", "fecha", "hora_inicio"),
+        Index("ix_turnos_archivo_cliente_fecha", "cliente_id", "fecha", "hora_inicio"),
+    )
+
+    # Conserva el ID que tenía en turnos
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    cliente_id: Mapped[int] = mapped_column(ForeignKey("clientes.id"), nullable=False)
+    servicio_id: Mapped[int] = mapped_column(ForeignKey("servicios.id"), nullable=False)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
+    hora_inicio: Mapped[time] = mapped_column(Time, nullable=False)
+    estado: Mapped[str] = mapped_column(String(20), nullable=False)
+    notas: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    precio: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    serie_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archivado_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+
+# Clave de versiones con el corte del archivo (ordinal de la fecha): los
+# turnos cerrados anteriores al corte están en turnos_archivo. Solo avanza
+CLAVE_CORTE_ARCHIVO = "archivo:turnos"
+
+
+def corte_archivo(db: Session) -> Optional[date]:
+    """Fecha hasta la que se archivó (exclusiva), o None si nunca se archivó"""
+    ordinal = leer_version(db, CLAVE_CORTE_ARCHIVO)
+    return date.fromordinal(ordinal) if ordinal else None
+
+
+SERVICIO_INACTIVO = "El servicio está desactivado"
+
+# Máximo de días que se pueden pedir en una agenda por rango
+MAX_DIAS_RANGO = 62
+
+
+# Días entre ocurrencias de cada frecuencia
+DIAS_FRECUENCIA = {Frecuencia.SEMANAL: 7, Frecuencia.QUINCENAL: 14}
+MAX_OCURRENCIAS = 52
+
+# Estados que todavía se pueden modificar o cancelar en una serie
+ESTADOS_ABIERTOS = (EstadoTurno.PENDIENTE.value, EstadoTurno.CONFIRMADO.value)
+
+# Estados desde los que se puede pasar a cada estado en un cambio en lote.
+# Ninguno hace que un turno vuelva a ocupar lugar (reactivar un cancelado
+# exige verificar el horario: eso queda para el cambio de a uno)
+TRANSICIONES_LOTE = {
+    EstadoTurno.CONFIRMADO: (EstadoTurno.PENDIENTE.value,),
+    EstadoTurno.COMPLETADO: ESTADOS_ABIERTOS,
+    EstadoTurno.CANCELADO: ESTADOS_ABIERTOS,
+    EstadoTurno.NO_ASISTIO: ESTADOS_ABIERTOS,
+}
+
+
+def fechas_de_serie(data: SerieCreate) -> list[date]:
+    """Calcula las fechas de las ocurrencias de una serie"""
+    paso = timedelta(days=DIAS_FRECUENCIA[data.frecuencia])
+    cantidad = data.cantidad or (data.hasta - data.fecha_inicio) // paso + 1
+    if cantidad > MAX_OCURRENCIAS:
+        raise HTTPException(status_code=400, detail=f"Una serie no puede tener más de {MAX_OCURRENCIAS} turnos")
+    return [data.fecha_inicio + paso * i for i in range(cantidad)]
+
+
 class TurnoRepository:
     """Repositorio para operaciones CRUD de turnos"""
     
@@ -34,115 +144,562 @@ class TurnoRepository:
         self.db = db
 
     def crear(self, data: TurnoCreate) -> TurnoDB:
-        """Crea un nuevo turno"""
-        # Verificar que existen cliente y servicio
-        cliente = self.db.query(ClienteDB).filter(ClienteDB.id == data.cliente_id).first()
-        if not cliente:
+        """Crea un nuevo turno con un único INSERT ... SELECT ... RETURNING"""
+        # Con el lock tomado, la verificación y el INSERT no se pueden intercalar con otra reserva
+        # (ni con un cambio del servicio: su duración y precio se leen ya con el lock)
+        bloquear_escritura(self.db)
+        servicio = self._servicio(data.servicio_id, reserva=True)
+        self._verificar_disponible(data.fecha, data.hora_inicio, servicio.duracion_min)
+
+        # La existencia del cliente se verifica dentro del mismo INSERT
+        valores = {**data.model_dump(), "estado": EstadoTurno.PENDIENTE.value, "precio": servicio.precio}
+        turno = self.db.scalars(
+            insert(TurnoDB).from_select(
+                list(valores),
+                select(*[literal(v, getattr(TurnoDB, k).type) for k, v in valores.items()]).where(
+                    exists().where(ClienteDB.id == data.cliente_id)
+                )
+            ).returning(TurnoDB)
+        ).one_or_none()
+        if not turno:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        servicio = self.db.query(ServicioDB).filter(ServicioDB.id == data.servicio_id).first()
-        if not servicio:
-            raise HTTPException(status_code=404, detail="Servicio no encontrado")
 
-        turno = TurnoDB(
-            cliente_id=data.cliente_id,
-            servicio_id=data.servicio_id,
-            fecha=data.fecha,
-            hora_inicio=data.hora_inicio,
-            estado=EstadoTurno.PENDIENTE.value,
-            notas=data.notas
-        )
-        self.db.add(turno)
-        self.db.commit()
-        self.db.refresh(turno)
+        self._confirmar([self._guardado(turno)])
         return turno
 
-    def listar_por_fecha(self, fecha: date) -> list[dict]:
-        """Lista todos los turnos de una fecha con detalles"""
-        turnos = self.db.query(
-            TurnoDB, ClienteDB, ServicioDB
-        ).join(
-            ClienteDB, TurnoDB.cliente_id == ClienteDB.id
-        ).join(
-            ServicioDB, TurnoDB.servicio_id == ServicioDB.id
-        ).filter(
-            TurnoDB.fecha == fecha
-        ).order_by(
-            TurnoDB.hora_inicio
+    def crear_lote(self, filas: list[tuple[int, TurnoImport]]) -> dict:
+        """Crea varios turnos en una transacción; las filas inválidas se informan y se saltean"""
+        clientes = {data.cliente_id for _, data in filas}
+        existentes = set(self.db.scalars(select(ClienteDB.id).where(ClienteDB.id.in_(clientes))))
+        bloquear_escritura(self.db)
+        servicios = {s.id: s for s in catalogo_servicios.servicios(self.db, al_dia=True)}
+        indices = self._cargar_indices({data.fecha for _, data in filas})
+
+        validas = []
+        errores = []
+        for nro, data in filas:
+            servicio = servicios.get(data.servicio_id)
+            if data.cliente_id not in existentes:
+                errores.append({"fila": nro, "error": "Cliente no encontrado"})
+                continue
+            if not servicio:
+                errores.append({"fila": nro, "error": "Servicio no encontrado"})
+                continue
+            # El historial importado puede ser de servicios que ya no se ofrecen
+            if data.estado.value in ESTADOS_ABIERTOS and not servicio.activo:
+                errores.append({"fila": nro, "error": SERVICIO_INACTIVO})
+                continue
+            if data.estado.value in ESTADOS_OCUPAN:
+                inicio = a_minutos(data.hora_inicio)
+                fin = inicio + servicio.duracion_min
+                # El índice incluye también las filas ya aceptadas del lote
+                if indices[data.fecha].se_superpone(inicio, fin):
+                    errores.append({"fila": nro, "error": "El horario se superpone con otro turno"})
+                    continue
+                indices[data.fecha].agregar(inicio, fin, 0)
+            validas.append((data, servicio))
+
+        if validas:
+            ids = self.db.scalars(
+                insert(TurnoDB).returning(TurnoDB.id, sort_by_parameter_order=True),
+                [{**data.model_dump(), "estado": data.estado.value, "precio": servicio.precio}
+                 for data, servicio in validas]
+            ).all()
+            self._confirmar([
+                (id, data.fecha, self._intervalo(data.estado.value, data.hora_inicio, servicio.duracion_min))
+                for id, (data, servicio) in zip(ids, validas)
+            ])
+        return {"creados": len(validas), "errores": errores}
+
+    def crear_serie(self, data: SerieCreate) -> dict:
+        """Crea todas las ocurrencias de una serie en una transacción (todo o nada)"""
+        fechas = fechas_de_serie(data)
+        bloquear_escritura(self.db)
+        servicio = self._servicio(data.servicio_id, reserva=True)
+        if not self.db.scalar(select(exists().where(ClienteDB.id == data.cliente_id))):
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+        self._verificar_disponible_fechas(fechas, data.hora_inicio, servicio.duracion_min)
+
+        serie = self.db.scalars(
+            insert(SerieDB).values(frecuencia=data.frecuencia.value).returning(SerieDB)
+        ).one()
+        turnos = self.db.scalars(
+            insert(TurnoDB).returning(TurnoDB, sort_by_parameter_order=True),
+            [{
+                "cliente_id": data.cliente_id, "servicio_id": data.servicio_id,
+                "fecha": fecha, "hora_inicio": data.hora_inicio, "notas": data.notas,
+                "estado": EstadoTurno.PENDIENTE.value, "precio": servicio.precio, "serie_id": serie.id,
+            } for fecha in fechas]
         ).all()
+        self._confirmar([self._guardado(turno) for turno in turnos])
+        return {"id": serie.id, "frecuencia": data.frecuencia, "turnos": turnos}
 
-        return [self._turno_to_detail(t, c, s) for t, c, s in turnos]
+    def actualizar_serie(self, serie_id: int, desde: date, data: SerieUpdate) -> list[TurnoDB]:
+        """Actualiza "este y los siguientes" turnos abiertos de una serie con un solo UPDATE"""
+        cambios = data.model_dump(exclude_none=True)
+        if not cambios:
+            raise HTTPException(status_code=400, detail="No hay cambios para aplicar")
 
-    def listar_por_cliente(self, cliente_id: int) -> list[dict]:
-        """Lista el historial de turnos de un cliente"""
-        turnos = self.db.query(
-            TurnoDB, ClienteDB, ServicioDB
-        ).join(
-            ClienteDB, TurnoDB.cliente_id == ClienteDB.id
-        ).join(
-            ServicioDB, TurnoDB.servicio_id == ServicioDB.id
-        ).filter(
-            TurnoDB.cliente_id == cliente_id
-        ).order_by(
-            TurnoDB.fecha.desc(), TurnoDB.hora_inicio.desc()
+        if "servicio_id" in cambios:
+            cambios["precio"] = self._servicio(cambios["servicio_id"], reserva=True).precio
+        if cambios.keys() & {"servicio_id", "hora_inicio"}:
+            bloquear_escritura(self.db)
+            # El horario nuevo se valida para todas las ocurrencias afectadas a la vez
+            afectados = self.db.execute(
+                select(TurnoDB.id, TurnoDB.fecha, TurnoDB.hora_inicio, TurnoDB.servicio_id)
+                .where(*self._filtro_serie(serie_id, desde))
+            ).all()
+            if not afectados:
+                raise HTTPException(status_code=404, detail="La serie no tiene turnos abiertos desde esa fecha")
+            indices = self._cargar_indices({t.fecha for t in afectados})
+            conflictos = []
+            for t in afectados:
+                # Una serie tiene a lo sumo un turno por día: alcanza con excluir ese
+                inicio = a_minutos(cambios.get("hora_inicio", t.hora_inicio))
+                fin = inicio + self._duracion_servicio(cambios.get("servicio_id", t.servicio_id))
+                if indices[t.fecha].se_superpone(inicio, fin, excluir_id=t.id):
+                    conflictos.append(t.fecha)
+            if conflictos:
+                raise HTTPException(status_code=409, detail=self._detalle_conflictos(conflictos))
+
+        return self._actualizar_serie(serie_id, desde, cambios)
+
+    def cancelar_serie(self, serie_id: int, desde: date) -> list[TurnoDB]:
+        """Cancela "este y los siguientes" turnos abiertos de una serie con un solo UPDATE"""
+        return self._actualizar_serie(serie_id, desde, {"estado": EstadoTurno.CANCELADO.value})
+
+    def _actualizar_serie(self, serie_id: int, desde: date, cambios: dict) -> list[TurnoDB]:
+        """UPDATE ... RETURNING de los turnos abiertos de una serie desde una fecha"""
+        turnos = self.db.scalars(
+            update(TurnoDB).where(*self._filtro_serie(serie_id, desde))
+            .values(**cambios, version=TurnoDB.version + 1).returning(TurnoDB),
+            execution_options={"populate_existing": True}
         ).all()
+        if not turnos:
+            raise HTTPException(status_code=404, detail="La serie no tiene turnos abiertos desde esa fecha")
+        # Una serie no cambia de día: cada turno se queda en su fecha
+        self._confirmar([self._guardado(t) for t in turnos], {t.id: t.fecha for t in turnos})
+        return sorted(turnos, key=lambda t: t.fecha)
+
+    @staticmethod
+    def _filtro_serie(serie_id: int, desde: date) -> tuple:
+        """Condiciones de "este y los siguientes" turnos abiertos de una serie"""
+        return (
+            TurnoDB.serie_id == serie_id,
+            TurnoDB.fecha >= desde,
+            TurnoDB.estado.in_(ESTADOS_ABIERTOS),
+        )
+
+    @staticmethod
+    def consulta_exportacion(desde: date, hasta: date) -> Select:
+        """Consulta de columnas para exportar los turnos de un rango de fechas (archivados incluidos)"""
+        def consulta(t: type) -> Select:
+            return select(
+                t.id, t.fecha, t.hora_inicio, t.estado,
+                t.cliente_id, ClienteDB.nombre.label("cliente_nombre"),
+                t.servicio_id, ServicioDB.nombre.label("servicio_nombre"),
+                t.notas, t.created_at
+            ).join(
+                ClienteDB, t.cliente_id == ClienteDB.id
+            ).join(
+                ServicioDB, t.servicio_id == ServicioDB.id
+            ).where(
+                t.fecha.between(desde, hasta)
+            )
+        # Sin sesión para leer el corte: la parte del archivo es una búsqueda por índice, vacía si no llega
+        union = TurnoRepository._con_archivo(consulta)
+        return select(union).order_by(union.c.fecha, union.c.hora_inicio)
+
+    def listar_por_fecha(self, fecha: date) -> list[dict]:
+        """Lista todos los turnos de una fecha con detalles"""
+        return self._listar(lambda t: (t.fecha == fecha,), fecha)
 
-        return [self._turno_to_detail(t, c, s) for t, c, s in turnos]
+    def listar_por_rango(self, desde: date, hasta: date,
+                         estado: Optional[EstadoTurno] = None) -> list[dict]:
+        """Lista los turnos entre dos fechas (inclusive) con detalles, en una sola consulta"""
+        self._validar_rango(desde, hasta)
 
-    def por_id(self, id: int) -> TurnoDB:
-        """Obtiene un turno por su ID"""
-        turno = self.db.query(TurnoDB).filter(TurnoDB.id == id).first()
+        def filtro(t: type) -> list:
+            condiciones = [t.fecha.between(desde, hasta)]
+            if estado is not None:
+                condiciones.append(t.estado == estado.value)
+            return condiciones
+        return self._listar(filtro, desde)
+
+    def _listar(self, filtro: Callable[[type], Iterable], desde: date) -> list[dict]:
+        """Detalle de los turnos que cumplen `filtro` por fecha y hora; suma el archivo solo si `desde` llega a él"""
+        if not self._llega_al_archivo(desde):
+            return self._detalles(
+                self._consulta_detalle().where(*filtro(TurnoDB)).order_by(TurnoDB.fecha, TurnoDB.hora_inicio)
+            )
+        union = self._con_archivo(lambda t: self._consulta_detalle(t).where(*filtro(t)))
+        return self._detalles(select(union).order_by(union.c.fecha, union.c.hora_inicio))
+
+    def _llega_al_archivo(self, desde: date) -> bool:
+        """Indica si puede haber turnos archivados desde esa fecha en adelante"""
+        corte = corte_archivo(self.db)
+        return corte is not None and desde < corte
+
+    def _cliente_con_archivo(self, cliente_id: int) -> bool:
+        """Indica si el cliente tiene turnos archivados"""
+        return corte_archivo(self.db) is not None and self.db.scalar(
+            select(exists().where(TurnoArchivoDB.cliente_id == cliente_id))
+        )
+
+    @staticmethod
+    def _con_archivo(consulta: Callable[[type], Select]):
+        """UNION ALL de la misma consulta sobre turnos y turnos_archivo, como subconsulta"""
+        return union_all(consulta(TurnoDB), consulta(TurnoArchivoDB)).subquery()
+
+    def version_dia(self, fecha: date) -> int:
+        """Versión de la agenda de un día (solo sus turnos; ver cache_agenda)"""
+        return leer_version(self.db, clave_agenda(fecha))
+
+    def version_agenda(self, desde: date, hasta: Optional[date] = None) -> str:
+        """Versión de la agenda de un día o rango: la de cada día más clientes y servicios (para ETags)"""
+        hasta = hasta or desde
+        self._validar_rango(desde, hasta)
+        claves = [clave_agenda(desde + timedelta(days=i)) for i in range((hasta - desde).days + 1)]
+        # El detalle trae nombre y teléfono del cliente y datos del servicio
+        claves += [CLAVE_CLIENTES, CLAVE_SERVICIOS]
+        versiones = leer_versiones(self.db, claves)
+        return ".".join(str(versiones[clave]) for clave in claves)
+
+    @staticmethod
+    def _validar_rango(desde: date, hasta: date) -> None:
+        """400 si el rango está invertido o es más largo que MAX_DIAS_RANGO"""
+        if hasta < desde:
+            raise HTTPException(status_code=400, detail="La fecha 'hasta' es anterior a 'desde'")
+        if (hasta - desde).days >= MAX_DIAS_RANGO:
+            raise HTTPException(status_code=400, detail=f"El rango no puede superar {MAX_DIAS_RANGO} días")
+
+    def listar_por_cliente(self, cliente_id: int, limite: int = LIMITE_DEFECTO,
+                           cursor: Optional[str] = None) -> dict:
+        """Una página del historial de un cliente, del turno más reciente al más viejo"""
+        # ix_turnos_cliente_fecha recorrido al revés: ni ordenamiento en memoria ni tabla completa
+        if not self._cliente_con_archivo(cliente_id):
+            return paginar_filas(
+                self._consulta_detalle().where(TurnoDB.cliente_id == cliente_id),
+                (TurnoDB.fecha, TurnoDB.hora_inicio, TurnoDB.id), limite, cursor,
+                self._detalles, descendente=True
+            )
+        union = self._con_archivo(lambda t: self._consulta_detalle(t).where(t.cliente_id == cliente_id))
+        return paginar_filas(
+            select(union), (union.c.fecha, union.c.hora_inicio, union.c.id), limite, cursor,
+            self._detalles, descendente=True
+        )
+
+    def resumen_cliente(self, cliente_id: int) -> dict:
+        """Visitas, última visita, ausencias y total gastado de un cliente, en una sola consulta"""
+        if self._cliente_con_archivo(cliente_id):
+            t = self._con_archivo(
+                lambda m: select(m.fecha, m.estado, m.precio).where(m.cliente_id == cliente_id)
+            ).c
+            filtro = ()
+        else:
+            t, filtro = TurnoDB.__table__.c, (TurnoDB.cliente_id == cliente_id,)
+        completado = t.estado == EstadoTurno.COMPLETADO.value
+        fila = self.db.execute(select(
+            select(ClienteDB.id).where(ClienteDB.id == cliente_id).exists().label("existe"),
+            func.count().filter(completado).label("visitas"),
+            func.max(t.fecha).filter(completado).label("ultima_visita"),
+            func.count().filter(t.estado == EstadoTurno.NO_ASISTIO.value).label("ausencias"),
+            func.coalesce(func.sum(t.precio).filter(completado), 0).label("total_gastado"),
+        ).where(*filtro)).one()
+        if not fila.existe:
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+        return {"cliente_id": cliente_id, **fila._asdict()}
+
+    def detalles_por_id(self, ids: list[int]) -> list[dict]:
+        """Detalle de varios turnos por ID, en una sola consulta"""
+        return self._detalles(self._consulta_detalle().where(TurnoDB.id.in_(ids)))
+
+    def por_id(self, id: int, recargar: bool = False) -> TurnoDB:
+        """Obtiene un turno por su ID (si ya está en la sesión, sin consultar, salvo con `recargar`)"""
+        turno = self.db.get(TurnoDB, id, populate_existing=recargar)
         if not turno:
             raise HTTPException(status_code=404, detail="Turno no encontrado")
         return turno
 
-    def actualizar(self, id: int, data: TurnoUpdate) -> TurnoDB:
-        """Actualiza un turno existente"""
-        turno = self.por_id(id)
-        
-        if data.cliente_id is not None:
-            turno.cliente_id = data.cliente_id
-        if data.servicio_id is not None:
-            turno.servicio_id = data.servicio_id
-        if data.fecha is not None:
-            turno.fecha = data.fecha
-        if data.hora_inicio is not None:
-            turno.hora_inicio = data.hora_inicio
+    def actualizar(self, id: int, data: TurnoUpdate) -> tuple[TurnoDB, date]:
+        """Actualiza un turno existente (un solo UPDATE ... RETURNING).
+
+        Con `data.version` la actualización es optimista: si el turno cambió
+        desde que se leyó, 409 en vez de pisar el cambio ajeno.
+        Devuelve el turno y la fecha que tenía antes del cambio.
+        """
+        cambios = data.model_dump(exclude_none=True)
+        version = cambios.pop("version", None)
         if data.estado is not None:
-            turno.estado = data.estado.value
-        if data.notas is not None:
-            turno.notas = data.notas
-        
-        self.db.commit()
-        self.db.refresh(turno)
-        return turno
+            cambios["estado"] = data.estado.value
+        if not cambios:
+            turno = self.por_id(id)
+            return turno, turno.fecha
+
+        # Si cambia el horario hay que validarlo contra el resto del día,
+        # y para eso hace falta saber dónde está hoy el turno
+        if "servicio_id" in cambios:
+            cambios["precio"] = self._servicio(cambios["servicio_id"], reserva=True).precio
+        anterior = None
+        if cambios.keys() & {"servicio_id", "fecha", "hora_inicio", "estado"}:
+            bloquear_escritura(self.db)
+            # Releído con el lock tomado: lo que haya en la sesión pudo cambiar en otra conexión
+            actual = self.por_id(id, recargar=True)
+            anterior = actual.fecha
+            servicio_id = cambios.get("servicio_id", actual.servicio_id)
+            duracion = self._duracion_servicio(servicio_id)
+            if cambios.get("estado", actual.estado) in ESTADOS_OCUPAN:
+                self._verificar_disponible(
+                    cambios.get("fecha", actual.fecha), cambios.get("hora_inicio", actual.hora_inicio),
+                    duracion, excluir_id=id
+                )
+
+        turno = self._actualizar_fila(id, cambios, version=version)
+        self._confirmar([self._guardado(turno)], {id: anterior or turno.fecha})
+        return turno, anterior or turno.fecha
 
     def cambiar_estado(self, id: int, estado: EstadoTurno) -> TurnoDB:
-        """Cambia el estado de un turno"""
-        turno = self.por_id(id)
-        turno.estado = estado.value
-        self.db.commit()
-        self.db.refresh(turno)
+        """Cambia el estado de un turno con un solo UPDATE ... WHERE id=? RETURNING"""
+        condicion = None
+        if estado.value in ESTADOS_OCUPAN:
+            # Caso común (pendiente -> confirmado -> completado): el lugar ya era suyo
+            condicion = TurnoDB.estado.in_(ESTADOS_OCUPAN)
+        turno = self._actualizar_fila(id, {"estado": estado.value}, condicion, falta_ok=True)
+
+        if turno is None:
+            # Reactivar un turno cancelado no puede pisar otro que ocupó su lugar
+            bloquear_escritura(self.db)
+            actual = self.por_id(id, recargar=True)
+            self._verificar_disponible(
+                actual.fecha, actual.hora_inicio,
+                self._duracion_servicio(actual.servicio_id), excluir_id=id
+            )
+            turno = self._actualizar_fila(id, {"estado": estado.value})
+
+        self._confirmar([self._guardado(turno)], {id: turno.fecha})
         return turno
 
-    def eliminar(self, id: int) -> bool:
-        """Elimina un turno"""
-        turno = self.por_id(id)
-        self.db.delete(turno)
+    def cambiar_estado_lote(self, ids: list[int], estado: EstadoTurno) -> dict:
+        """Cambia el estado de varios turnos con un solo UPDATE; la transición se valida en el WHERE"""
+        origenes = TRANSICIONES_LOTE.get(estado)
+        if origenes is None:
+            raise HTTPException(status_code=400, detail=f"No se puede pasar a '{estado.value}' en lote")
+        ids = list(dict.fromkeys(ids))
+        turnos = self._actualizar_estados(estado.value, TurnoDB.id.in_(ids), TurnoDB.estado.in_(origenes))
+        # Los que no cambiaron: no existen, ya estaban en ese estado o la transición no va
+        actuales = dict(self.db.execute(
+            select(TurnoDB.id, TurnoDB.estado).where(TurnoDB.id.in_(set(ids) - turnos.keys()))
+        ).tuples().all())
+        self._confirmar([self._guardado(t) for t in turnos.values()], {t.id: t.fecha for t in turnos.values()})
+
+        resultados = []
+        for id in ids:
+            if id in turnos:
+                resultados.append({"id": id, "resultado": ResultadoCambio.ACTUALIZADO, "estado": estado.value})
+            elif id not in actuales:
+                resultados.append({"id": id, "resultado": ResultadoCambio.NO_ENCONTRADO})
+            else:
+                resultado = ResultadoCambio.SIN_CAMBIO if actuales[id] == estado.value else ResultadoCambio.NO_PERMITIDO
+                resultados.append({"id": id, "resultado": resultado, "estado": actuales[id]})
+        return {"actualizados": len(turnos), "resultados": resultados, "turnos": list(turnos.values())}
+
+    def cerrar_dia(self, fecha: date, ausentes: list[int]) -> dict:
+        """Cierra un día con un solo UPDATE: los turnos abiertos pasan a completado y los `ausentes` a no_asistio"""
+        if fecha > date.today():
+            raise HTTPException(status_code=400, detail="No se puede cerrar un día que todavía no llegó")
+        ausentes = set(ausentes)
+        turnos = self._actualizar_estados(
+            case((TurnoDB.id.in_(ausentes), EstadoTurno.NO_ASISTIO.value), else_=EstadoTurno.COMPLETADO.value),
+            TurnoDB.fecha == fecha, TurnoDB.estado.in_(ESTADOS_ABIERTOS)
+        )
+        # Los demás turnos del día ya estaban cerrados (completados, cancelados o ausentes)
+        dia = self.db.execute(
+            select(TurnoDB.id, TurnoDB.estado).where(TurnoDB.fecha == fecha).order_by(TurnoDB.hora_inicio, TurnoDB.id)
+        ).tuples().all()
+        self._confirmar([self._guardado(t) for t in turnos.values()], {t.id: fecha for t in turnos.values()})
+
+        resultados = []
+        for id, estado in dia:
+            if id in turnos:
+                resultado = ResultadoCambio.ACTUALIZADO
+            elif id in ausentes and estado != EstadoTurno.NO_ASISTIO.value:
+                resultado = ResultadoCambio.NO_PERMITIDO
+            else:
+                resultado = ResultadoCambio.SIN_CAMBIO
+            resultados.append({"id": id, "resultado": resultado, "estado": estado})
+        del_dia = {id for id, _ in dia}
+        resultados += [{"id": id, "resultado": ResultadoCambio.NO_ENCONTRADO} for id in ausentes - del_dia]
+        return {"actualizados": len(turnos), "resultados": resultados, "turnos": list(turnos.values())}
+
+    def _actualizar_estados(self, estado, *condiciones) -> dict[int, TurnoDB]:
+        """UPDATE ... RETURNING del estado de varios turnos a la vez, por ID"""
+        turnos = self.db.scalars(
+            update(TurnoDB).where(*condiciones)
+            .values(estado=estado, version=TurnoDB.version + 1).returning(TurnoDB),
+            execution_options={"populate_existing": True}
+        ).all()
+        return {t.id: t for t in turnos}
+
+    def eliminar(self, id: int) -> date:
+        """Elimina un turno (DELETE ... RETURNING, sin SELECT previo) y devuelve su fecha"""
+        fecha = self.db.scalar(delete(TurnoDB).where(TurnoDB.id == id).returning(TurnoDB.fecha))
+        if fecha is None:
+            raise HTTPException(status_code=404, detail="Turno no encontrado")
+        self._confirmar([], {id: fecha})
+        return fecha
+
+    def _actualizar_fila(self, id: int, cambios: dict, condicion=None, falta_ok: bool = False,
+                         version: Optional[int] = None) -> Optional[TurnoDB]:
+        """UPDATE ... RETURNING de un turno; 404 si ninguna fila coincide (salvo falta_ok).
+
+        Con `version` es un compare-and-swap: si la fila ya no está en esa versión, 409.
+        """
+        stmt = update(TurnoDB).where(TurnoDB.id == id)
+        if condicion is not None:
+            stmt = stmt.where(condicion)
+        if version is not None:
+            stmt = stmt.where(TurnoDB.version == version)
+        turno = self.db.scalars(
+            stmt.values(**cambios, version=TurnoDB.version + 1).returning(TurnoDB),
+            execution_options={"populate_existing": True}
+        ).one_or_none()
+        if turno is None and not falta_ok:
+            if version is not None and self.db.scalar(select(exists().where(TurnoDB.id == id))):
+                raise HTTPException(
+                    status_code=409, detail="El turno fue modificado por otra persona; volvé a cargarlo"
+                )
+            raise HTTPException(status_code=404, detail="Turno no encontrado")
+        return turno
+
+    def disponibilidad(self, fecha: date, servicio_id: int) -> list[dict]:
+        """Lista los horarios libres de un día para un servicio"""
+        duracion = self._duracion_servicio(servicio_id)
+        libres = self._indice_dia(fecha).huecos(
+            duracion, a_minutos(HORA_APERTURA), a_minutos(HORA_CIERRE), PASO_MIN
+        )
+        return [{"hora_inicio": a_hora(ini), "hora_fin": a_hora(fin)} for ini, fin in libres]
+
+    def _duracion_servicio(self, servicio_id: int) -> int:
+        """Obtiene la duración en minutos de un servicio (desde el catálogo en memoria)"""
+        return self._servicio(servicio_id).duracion_min
+
+    def _servicio(self, servicio_id: int, reserva: bool = False) -> ServicioCache:
+        """Obtiene un servicio del catálogo en memoria, al día con la base; 404 si no existe.
+
+        Con `reserva`, 400 si está desactivado (no se puede reservar).
+        """
+        servicio = catalogo_servicios.por_id(self.db, servicio_id, al_dia=True)
+        if not servicio:
+            raise HTTPException(status_code=404, detail="Servicio no encontrado")
+        if reserva and not servicio.activo:
+            raise HTTPException(status_code=400, detail=SERVICIO_INACTIVO)
+        return servicio
+
+    def _indice_dia(self, fecha: date) -> IndiceDia:
+        """Obtiene el índice de intervalos ocupados del día (recargado si la base cambió)"""
+        version = leer_version(self.db, clave_agenda(fecha))
+        return indices_agenda.obtener(fecha, version, lambda: self._cargar_indice(fecha))
+
+    def _cargar_indice(self, fecha: date) -> IndiceDia:
+        """Arma el índice del día con los turnos que ocupan lugar"""
+        return self._cargar_indices({fecha})[fecha]
+
+    def _cargar_indices(self, fechas: set[date]) -> dict[date, IndiceDia]:
+        """Arma los índices de varios días con una sola consulta"""
+        filas = self.db.query(
+            TurnoDB.id, TurnoDB.fecha, TurnoDB.hora_inicio, ServicioDB.duracion_min
+        ).join(
+            ServicioDB, TurnoDB.servicio_id == ServicioDB.id
+        ).filter(
+            TurnoDB.fecha.in_(fechas),
+            TurnoDB.estado.in_(ESTADOS_OCUPAN)
+        ).all()
+        intervalos = {fecha: [] for fecha in fechas}
+        for id, fecha, hora, duracion in filas:
+            intervalos[fecha].append((a_minutos(hora), a_minutos(hora) + duracion, id))
+        return {fecha: IndiceDia(lista) for fecha, lista in intervalos.items()}
+
+    def _verificar_disponible(self, fecha: date, hora_inicio: time, duracion: int,
+                              excluir_id: Optional[int] = None) -> None:
+        """Rechaza el horario si se superpone con otro turno del día"""
+        inicio = a_minutos(hora_inicio)
+        if self._indice_dia(fecha).se_superpone(inicio, inicio + duracion, excluir_id):
+            raise HTTPException(status_code=409, detail="El horario se superpone con otro turno")
+
+    def _verificar_disponible_fechas(self, fechas: list[date], hora_inicio: time, duracion: int) -> None:
+        """Rechaza el horario si choca en alguna de las fechas (una sola consulta para todas)"""
+        indices = self._cargar_indices(set(fechas))
+        inicio = a_minutos(hora_inicio)
+        conflictos = [f for f in fechas if indices[f].se_superpone(inicio, inicio + duracion)]
+        if conflictos:
+            raise HTTPException(status_code=409, detail=self._detalle_conflictos(conflictos))
+
+    @staticmethod
+    def _detalle_conflictos(fechas: list[date]) -> str:
+        """Mensaje de error con las fechas en conflicto"""
+        return "El horario se superpone con otros turnos el " + ", ".join(f.isoformat() for f in fechas)
+
+    def _confirmar(self, guardados: list[tuple[int, date, Optional[tuple[int, int]]]],
+                   anteriores: Optional[dict[int, date]] = None) -> None:
+        """Commit de una escritura de turnos y su reflejo en los índices y el cache de la agenda.
+
+        `guardados` tiene (id, fecha, intervalo ocupado o None) de cada turno
+        escrito y `anteriores` la fecha que tenían los que ya existían (también
+        los borrados). Los triggers suman 1 a la versión del día por fila (a los
+        dos días si el turno se mudó), así que la versión previa de cada día es
+        la actual menos sus filas. La escritura ya tomó el lock: las versiones
+        leídas antes del commit son exactamente las que deja este commit.
+        """
+        anteriores = anteriores or {}
+        filas: Counter[date] = Counter(anteriores.values())
+        quitar: defaultdict[date, list[int]] = defaultdict(list)
+        agregar: defaultdict[date, list[tuple[int, int, int]]] = defaultdict(list)
+        for id, fecha in anteriores.items():
+            quitar[fecha].append(id)
+        for id, fecha, intervalo in guardados:
+            if anteriores.get(id) != fecha:
+                filas[fecha] += 1
+            if intervalo is not None:
+                agregar[fecha].append((*intervalo, id))
+
+        versiones = leer_versiones(self.db, [clave_agenda(fecha) for fecha in filas])
         self.db.commit()
-        return True
-
-    def _turno_to_detail(self, turno: TurnoDB, cliente: ClienteDB, servicio: ServicioDB) -> dict:
-        """Convierte un turno con sus relaciones a un diccionario detallado"""
-        return {
-            "id": turno.id,
-            "fecha": turno.fecha,
-            "hora_inicio": turno.hora_inicio,
-            "estado": turno.estado,
-            "notas": turno.notas,
-            "cliente_nombre": cliente.nombre,
-            "cliente_telefono": cliente.telefono,
-            "servicio_nombre": servicio.nombre,
-            "servicio_duracion_min": servicio.duracion_min,
-            "servicio_precio": servicio.precio
-        }
+        cache_agenda.invalidar(filas)
+        for fecha, n in filas.items():
+            despues = versiones[clave_agenda(fecha)]
+            indices_agenda.aplicar(fecha, despues - n, despues, quitar[fecha], agregar[fecha])
+
+    def _guardado(self, turno: TurnoDB) -> tuple[int, date, Optional[tuple[int, int]]]:
+        """(id, fecha, intervalo ocupado) de un turno recién escrito, para _confirmar"""
+        duracion = self._duracion_servicio(turno.servicio_id)
+        return turno.id, turno.fecha, self._intervalo(turno.estado, turno.hora_inicio, duracion)
+
+    @staticmethod
+    def _intervalo(estado: str, hora_inicio: time, duracion: int) -> Optional[tuple[int, int]]:
+        """Minutos [inicio, fin) que ocupa un turno, o None si su estado no ocupa lugar"""
+        if estado not in ESTADOS_OCUPAN:
+            return None
+        inicio = a_minutos(hora_inicio)
+        return inicio, inicio + duracion
+
+    @staticmethod
+    def _consulta_detalle(t: type = TurnoDB) -> Select:
+        """SELECT de las once columnas de TurnoDetailOut, sin armar entidades ORM (de turnos o del archivo)"""
+        return select(
+            t.id, t.fecha, t.hora_inicio, t.estado, t.notas, t.version,
+            ClienteDB.nombre.label("cliente_nombre"),
+            ClienteDB.telefono.label("cliente_telefono"),
+            ServicioDB.nombre.label("servicio_nombre"),
+            ServicioDB.duracion_min.label("servicio_duracion_min"),
+            ServicioDB.precio.label("servicio_precio")
+        ).join(
+            ClienteDB, t.cliente_id == ClienteDB.id
+        ).join(
+            ServicioDB, t.servicio_id == ServicioDB.id
+        )
+
+    def _detalles(self, consulta: Select) -> list[dict]:
+        """Ejecuta una consulta de detalle y devuelve las filas como diccionarios"""
+        resultado = self.db.execute(consulta)
+        columnas = list(resultado.keys())
+        return [dict(zip(columnas, fila)) for fila in resultado]
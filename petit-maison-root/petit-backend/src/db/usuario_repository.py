@@ -1,12 +1,17 @@
 from fastapi import HTTPException
-from sqlalchemy import String
+from sqlalchemy import String, Index, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Mapped, mapped_column, Session
 from ..dto.usuario import UsuarioCreate
 from .base import Base, get_db, engine, SessionLocal
+from .paginacion import paginar, LIMITE_DEFECTO
 
 
 class UsuarioDB(Base):
     __tablename__ = "usuarios"
+    __table_args__ = (
+        Index("ix_usuarios_nombre_id", "nombre", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     nombre: Mapped[str] = mapped_column(String(100))
@@ -19,22 +24,19 @@ class UsuarioRepository:
         self.db = db
 
     def crear(self, data: UsuarioCreate) -> UsuarioDB:
-        existe = self.db.query(UsuarioDB).filter(UsuarioDB.email == data.email).first()
-        if existe:
+        # El índice único de email detecta el duplicado en el mismo INSERT
+        try:
+            usuario = self.db.scalars(
+                insert(UsuarioDB).values(**data.model_dump()).returning(UsuarioDB)
+            ).one()
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
             raise HTTPException(status_code=400, detail="El correo ya está registrado")
-
-        usuario = UsuarioDB(
-            nombre=data.nombre,
-            email=data.email,
-            telefono=data.telefono
-        )
-        self.db.add(usuario)
-        self.db.commit()
-        self.db.refresh(usuario)
         return usuario
 
-    def listar(self):
-        return self.db.query(UsuarioDB).all()
+    def listar(self, limite: int = LIMITE_DEFECTO, cursor: str | None = None):
+        return paginar(self.db.query(UsuarioDB), (UsuarioDB.nombre, UsuarioDB.id), limite, cursor)
 
     def por_email(self, email: str):
         usuario = self.db.query(UsuarioDB).filter(UsuarioDB.email == email).first()
@@ -0,0 +1,93 @@
+"""
+Contadores de versión guardados en la base.
+Cada clave (p. ej. "servicios") se incrementa en la misma transacción que la
+escritura que la cambia, así todos los procesos pueden saber si lo que tienen
+en memoria quedó viejo con una sola lectura por clave primaria.
+
+Claves: "servicios" y "clientes" las incrementan sus repositorios;
+"agenda:AAAA-MM-DD" la incrementan triggers sobre turnos (TRIGGERS_AGENDA),
+así cubren todos los caminos de escritura, incluido el cambio de fecha, y
+también los cambios de un cliente o servicio en los días donde aparece
+(incrementar_agendas).
+"""
+from datetime import date
+
+from sqlalchemy import Connection, String, select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Mapped, mapped_column, Session
+
+from .base import Base
+
+
+class VersionDB(Base):
+    """Modelo de base de datos para un contador de versión"""
+    __tablename__ = "versiones"
+
+    clave: Mapped[str] = mapped_column(String(60), primary_key=True)
+    valor: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+def leer_version(db: Session | Connection, clave: str) -> int:
+    """Devuelve la versión actual de una clave (0 si nunca cambió)"""
+    return db.execute(select(VersionDB.valor).where(VersionDB.clave == clave)).scalar() or 0
+
+
+def leer_versiones(db: Session | Connection, claves: list[str]) -> dict[str, int]:
+    """Devuelve la versión de varias claves con una sola consulta"""
+    filas = db.execute(select(VersionDB.clave, VersionDB.valor).where(VersionDB.clave.in_(claves)))
+    return {clave: 0 for clave in claves} | dict(filas.tuples().all())
+
+
+def clave_agenda(fecha: date) -> str:
+    """Clave de versión de la agenda de un día"""
+    return f"agenda:{fecha.isoformat()}"
+
+
+def incrementar_version(db: Session, clave: str) -> int:
+    """Incrementa la versión de una clave y devuelve el valor nuevo"""
+    stmt = insert(VersionDB).values(clave=clave, valor=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VersionDB.clave], set_={"valor": VersionDB.valor + 1}
+    ).returning(VersionDB.valor)
+    return db.execute(stmt).scalar_one()
+
+
+def incrementar_agendas(db: Session, columna: str, valor: int) -> list[date]:
+    """Incrementa la versión de la agenda de cada día con turnos (o turnos archivados)
+    donde `columna` = valor; devuelve esos días"""
+    claves = db.execute(text(
+        "INSERT INTO versiones(clave, valor) SELECT 'agenda:' || fecha, 1 FROM ("
+        f"SELECT fecha FROM turnos WHERE {columna} = :valor "
+        f"UNION SELECT fecha FROM turnos_archivo WHERE {columna} = :valor"
+        ") WHERE true ON CONFLICT(clave) DO UPDATE SET valor = valor + 1 RETURNING clave"
+    ), {"valor": valor}).scalars()
+    return [date.fromisoformat(clave.removeprefix("agenda:")) for clave in claves]
+
+
+def fijar_version(db: Session | Connection, clave: str, valor: int) -> None:
+    """Guarda un valor de versión explícito (p. ej. la versión del esquema)"""
+    stmt = insert(VersionDB).values(clave=clave, valor=valor)
+    db.execute(stmt.on_conflict_do_update(index_elements=[VersionDB.clave], set_={"valor": valor}))
+
+
+def _incrementar_agenda(fila: str, condicion: str = "true") -> str:
+    return (
+        f"INSERT INTO versiones(clave, valor) SELECT 'agenda:' || {fila}.fecha, 1 WHERE {condicion} "
+        "ON CONFLICT(clave) DO UPDATE SET valor = valor + 1;"
+    )
+
+
+TRIGGERS_AGENDA = {
+    "version_agenda_insert": f"AFTER INSERT ON turnos BEGIN {_incrementar_agenda('NEW')} END",
+    "version_agenda_update": (
+        f"AFTER UPDATE ON turnos BEGIN {_incrementar_agenda('OLD')} "
+        f"{_incrementar_agenda('NEW', 'NEW.fecha IS NOT OLD.fecha')} END"
+    ),
+    "version_agenda_delete": f"AFTER DELETE ON turnos BEGIN {_incrementar_agenda('OLD')} END",
+}
+
+
+def crear_triggers_agenda(conn: Connection) -> None:
+    """Triggers que incrementan la versión de la agenda de cada día que cambia"""
+    for nombre, cuerpo in TRIGGERS_AGENDA.items():
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}")
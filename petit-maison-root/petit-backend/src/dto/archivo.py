@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from enum import Enum
+
+# Formatos aceptados para importar y exportar
+class FormatoArchivo(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+# Error de una fila puntual de la importación
+class ErrorImportacion(BaseModel):
+    fila: int     # Número de fila (1 = primera fila de datos)
+    error: str
+
+# Para RESPONDER el resultado de una importación masiva
+class ResultadoImportacion(BaseModel):
+    creados: int
+    errores: list[ErrorImportacion]
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Para RESPONDER un listado paginado por cursor
+class Pagina(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str]  # None si no hay más páginas
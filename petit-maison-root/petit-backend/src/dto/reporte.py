@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Optional
+
+# Ingresos de un servicio en un día (turnos completados)
+class IngresoOut(BaseModel):
+    fecha: date
+    servicio_id: int
+    servicio_nombre: Optional[str]
+    completados: int
+    ingresos: float
+
+# Reporte de ingresos de un rango
+class ReporteIngresosOut(BaseModel):
+    desde: date
+    hasta: date
+    total: float
+    detalle: list[IngresoOut]
+
+# Asistencia de un servicio en un rango (servicio_id None = total)
+class AsistenciaOut(BaseModel):
+    servicio_id: Optional[int]
+    servicio_nombre: Optional[str]
+    turnos: int
+    completados: int
+    ausentes: int
+    cancelados: int
+    tasa_ausencia: float      # ausentes / (completados + ausentes)
+    tasa_cancelacion: float   # cancelados / turnos
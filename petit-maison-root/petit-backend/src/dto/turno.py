@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import date, time, datetime
 from typing import Optional
 from enum import Enum
@@ -27,6 +27,7 @@ class TurnoUpdate(BaseModel):
     hora_inicio: Optional[time] = None
     estado: Optional[EstadoTurno] = None
     notas: Optional[str] = None
+    version: Optional[int] = None  # La que se leyó: si el turno cambió desde entonces, 409
 
 # Para RESPONDER (básico)
 class TurnoOut(BaseModel):
@@ -37,6 +38,8 @@ class TurnoOut(BaseModel):
     hora_inicio: time
     estado: str
     notas: Optional[str]
+    serie_id: Optional[int] = None
+    version: int = 1
     created_at: datetime
 
     class Config:
@@ -49,6 +52,7 @@ class TurnoDetailOut(BaseModel):
     hora_inicio: time
     estado: str
     notas: Optional[str]
+    version: int
     cliente_nombre: str
     cliente_telefono: Optional[str]
     servicio_nombre: str
@@ -57,3 +61,88 @@ class TurnoDetailOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Para RESPONDER el resumen de la ficha de un cliente
+class ResumenClienteOut(BaseModel):
+    cliente_id: int
+    visitas: int                    # Turnos completados
+    ultima_visita: Optional[date]
+    ausencias: int                  # Turnos con no_asistio
+    total_gastado: float            # Suma de los turnos completados
+
+# Para CAMBIAR el estado de varios turnos a la vez
+class CambioEstadoLote(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=500)
+    estado: EstadoTurno
+
+# Para CERRAR un día: los abiertos pasan a completado, salvo los ausentes
+class CierreDia(BaseModel):
+    ausentes: list[int] = Field(default_factory=list, max_length=500)   # Quedan como no_asistio
+
+# Qué pasó con cada turno de un cambio de estado en lote
+class ResultadoCambio(str, Enum):
+    ACTUALIZADO = "actualizado"
+    SIN_CAMBIO = "sin_cambio"           # Ya estaba en ese estado (o cerrado, en el cierre del día)
+    NO_PERMITIDO = "no_permitido"       # La transición desde su estado actual no se permite
+    NO_ENCONTRADO = "no_encontrado"
+
+# Para RESPONDER el resultado de cada turno
+class ResultadoEstadoOut(BaseModel):
+    id: int
+    resultado: ResultadoCambio
+    estado: Optional[str] = None        # Estado en que quedó el turno
+
+# Para RESPONDER un cambio de estado en lote o el cierre de un día
+class LoteEstadoOut(BaseModel):
+    actualizados: int
+    resultados: list[ResultadoEstadoOut]
+
+# Para RESPONDER la agenda de un rango, agrupada por día
+class AgendaDiaOut(BaseModel):
+    fecha: date
+    turnos: list[TurnoDetailOut]
+
+# Horario libre para reservar (disponibilidad)
+class SlotOut(BaseModel):
+    hora_inicio: time
+    hora_fin: time
+
+# Para IMPORTAR turnos existentes (permite traer el estado, p. ej. historial completado)
+class TurnoImport(TurnoCreate):
+    estado: EstadoTurno = EstadoTurno.PENDIENTE
+
+# Frecuencias de una serie de turnos recurrentes
+class Frecuencia(str, Enum):
+    SEMANAL = "semanal"
+    QUINCENAL = "quincenal"
+
+# Para CREAR una serie de turnos (indicar cantidad o fecha de fin)
+class SerieCreate(BaseModel):
+    cliente_id: int
+    servicio_id: int
+    fecha_inicio: date
+    hora_inicio: time
+    frecuencia: Frecuencia
+    cantidad: Optional[int] = Field(None, ge=1, le=52)
+    hasta: Optional[date] = None
+    notas: Optional[str] = None
+
+    @model_validator(mode="after")
+    def validar_fin(self):
+        if (self.cantidad is None) == (self.hasta is None):
+            raise ValueError("Indicar 'cantidad' o 'hasta' (solo uno)")
+        if self.hasta is not None and self.hasta < self.fecha_inicio:
+            raise ValueError("'hasta' es anterior a 'fecha_inicio'")
+        return self
+
+# Para ACTUALIZAR "este y los siguientes" turnos de una serie
+class SerieUpdate(BaseModel):
+    servicio_id: Optional[int] = None
+    hora_inicio: Optional[time] = None
+    notas: Optional[str] = None
+
+# Para RESPONDER una serie con sus turnos
+class SerieOut(BaseModel):
+    id: int
+    frecuencia: Frecuencia
+    turnos: list[TurnoOut]
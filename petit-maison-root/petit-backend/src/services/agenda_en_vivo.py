@@ -0,0 +1,154 @@
+"""
+Agenda en vivo: los cambios de turnos se empujan a GET /turnos/agenda/{fecha}/stream.
+
+TurnoService publica cada cambio ya confirmado en el canal de su día
+("agenda:YYYY-MM-DD", con el salón adelante si hay uno) y cada conexión recibe los de su día como Server-Sent
+Events: primero la agenda completa (evento "agenda") y después un evento
+"cambio" por turno creado, actualizado, con cambio de estado o eliminado.
+Los cambios se aplican por id (reemplazar o agregar). Las tablets no
+consultan más: si se corta, EventSource se reconecta solo y vuelve a recibir
+la agenda completa.
+
+El pub/sub es intercambiable: PubSubLocal reparte los mensajes dentro del
+proceso. Con varios workers cada uno ve solo sus escrituras; para eso hay
+que pasarle al broker un backend compartido (p. ej. Redis) con los mismos
+métodos.
+"""
+import asyncio
+from datetime import date
+from threading import Lock
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import orjson
+
+from ..db.base import salon_actual
+from ..db.versiones import clave_agenda
+
+MAX_PENDIENTES = 256     # Mensajes en cola por conexión antes de mandarle la agenda completa
+LATIDO_SEGUNDOS = 15     # Comentario SSE para que los proxies no corten la conexión
+REINTENTO_MS = 3000      # Cuánto espera EventSource para reconectarse
+
+# Pide a las conexiones del día que vuelvan a mandar la agenda completa
+RECARGAR = {"tipo": "recargar"}
+
+
+class Suscripcion:
+    """Cola de mensajes de un canal para una conexión"""
+
+    def __init__(self, canal: str, loop: asyncio.AbstractEventLoop, maximo: int):
+        self.canal = canal
+        self._loop = loop
+        self._cola: asyncio.Queue = asyncio.Queue(maximo)
+
+    def entregar(self, mensaje: dict) -> None:
+        """Encola un mensaje; se puede llamar desde cualquier hilo"""
+        try:
+            self._loop.call_soon_threadsafe(self._poner, mensaje)
+        except RuntimeError:
+            pass  # El loop de la conexión ya terminó
+
+    def _poner(self, mensaje: dict) -> None:
+        try:
+            self._cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: en vez de los cambios sueltos recibe la agenda entera
+            while not self._cola.empty():
+                self._cola.get_nowait()
+            self._cola.put_nowait(RECARGAR)
+
+    async def recibir(self, espera: float) -> Optional[dict]:
+        """Siguiente mensaje, o None si no llegó ninguno en `espera` segundos"""
+        try:
+            return await asyncio.wait_for(self._cola.get(), espera)
+        except asyncio.TimeoutError:
+            return None
+
+
+class PubSubLocal:
+    """Pub/sub en memoria del proceso (thread-safe)"""
+
+    def __init__(self, maximo: int = MAX_PENDIENTES):
+        self.maximo = maximo
+        self._canales: dict[str, set[Suscripcion]] = {}
+        self._lock = Lock()
+
+    def suscribir(self, canal: str) -> Suscripcion:
+        """Suscribe al canal; los mensajes se entregan en el loop que llama"""
+        suscripcion = Suscripcion(canal, asyncio.get_running_loop(), self.maximo)
+        with self._lock:
+            self._canales.setdefault(canal, set()).add(suscripcion)
+        return suscripcion
+
+    def desuscribir(self, suscripcion: Suscripcion) -> None:
+        with self._lock:
+            suscriptores = self._canales.get(suscripcion.canal, set())
+            suscriptores.discard(suscripcion)
+            if not suscriptores:
+                self._canales.pop(suscripcion.canal, None)
+
+    def escuchando(self, canal: str) -> bool:
+        """Indica si alguien está suscripto al canal"""
+        return canal in self._canales
+
+    def publicar(self, canal: str, mensaje: dict) -> None:
+        with self._lock:
+            suscriptores = list(self._canales.get(canal, ()))
+        for suscripcion in suscriptores:
+            suscripcion.entregar(mensaje)
+
+
+class BrokerAgenda:
+    """Canales de la agenda en vivo, uno por día (y por salón)"""
+
+    def __init__(self, backend: PubSubLocal):
+        self.backend = backend
+
+    @staticmethod
+    def canal(fecha: date) -> str:
+        """Canal del día en el salón actual"""
+        salon = salon_actual.get()
+        return clave_agenda(fecha) if salon is None else f"{salon}/{clave_agenda(fecha)}"
+
+    def suscribir(self, fecha: date) -> Suscripcion:
+        return self.backend.suscribir(self.canal(fecha))
+
+    def desuscribir(self, suscripcion: Suscripcion) -> None:
+        self.backend.desuscribir(suscripcion)
+
+    def escuchando(self, fecha: date) -> bool:
+        """Indica si alguien sigue la agenda del día (para no armar mensajes de más)"""
+        return self.backend.escuchando(self.canal(fecha))
+
+    def publicar(self, fecha: date, mensaje: dict) -> None:
+        self.backend.publicar(self.canal(fecha), mensaje)
+
+
+# Broker compartido por todo el proceso
+broker_agenda = BrokerAgenda(PubSubLocal())
+
+
+def _evento(nombre: str, datos) -> bytes:
+    """Un evento SSE con datos JSON"""
+    return b"event: " + nombre.encode() + b"\ndata: " + orjson.dumps(datos) + b"\n\n"
+
+
+async def transmitir(fecha: date, leer_agenda: Callable[[], Awaitable[bytes]]) -> AsyncIterator[bytes]:
+    """Stream SSE de la agenda de un día: la agenda completa (ya serializada) y después cada cambio"""
+    # Se suscribe antes de leer la agenda para no perder cambios entre medio
+    suscripcion = broker_agenda.suscribir(fecha)
+    try:
+        yield f"retry: {REINTENTO_MS}\n\n".encode()
+        recargar = True
+        while True:
+            if recargar:
+                yield b"event: agenda\ndata: " + await leer_agenda() + b"\n\n"
+            mensaje = await suscripcion.recibir(LATIDO_SEGUNDOS)
+            if mensaje is None:
+                recargar = False
+                yield b": ping\n\n"
+                continue
+            recargar = mensaje["tipo"] == RECARGAR["tipo"]
+            if not recargar:
+                yield _evento("cambio", mensaje)
+    finally:
+        broker_agenda.desuscribir(suscripcion)
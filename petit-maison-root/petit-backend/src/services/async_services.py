@@ -0,0 +1,66 @@
+"""
+Versiones async de los servicios, usadas por los endpoints.
+Cada llamada ejecuta el servicio sync completo (con su repositorio) en un
+solo run_sync sobre la AsyncSession: un único salto al driver por request.
+Si la base está bloqueada, la operación entera se reintenta con backoff.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db.base import reintentar_si_bloqueada_async
+from ..db.usuario_repository import UsuarioRepository
+from ..db.cliente_repository import ClienteRepository
+from ..db.servicio_repository import ServicioRepository
+from ..db.turno_repository import TurnoRepository
+from ..db.reporte_repository import ReporteRepository
+from .usuario_services import UsuarioService
+from .cliente_services import ClienteService
+from .servicio_services import ServicioService
+from .turno_services import TurnoService
+from .reporte_services import ReporteService
+
+
+class ServicioAsync:
+    """Expone los métodos de `service_cls` como corrutinas"""
+    service_cls: type
+    repo_cls: type
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def __getattr__(self, nombre: str):
+        getattr(self.service_cls, nombre)  # AttributeError si el método no existe
+
+        async def metodo(*args, **kwargs):
+            return await reintentar_si_bloqueada_async(self.db, lambda: self.db.run_sync(
+                lambda session: getattr(self._crear(session), nombre)(*args, **kwargs)
+            ))
+        return metodo
+
+    def _crear(self, session):
+        """Arma el servicio sync sobre la sesión sync subyacente"""
+        return self.service_cls(self.repo_cls(session))
+
+
+class UsuarioServiceAsync(ServicioAsync):
+    service_cls = UsuarioService
+    repo_cls = UsuarioRepository
+
+
+class ClienteServiceAsync(ServicioAsync):
+    service_cls = ClienteService
+    repo_cls = ClienteRepository
+
+
+class ServicioServiceAsync(ServicioAsync):
+    service_cls = ServicioService
+    repo_cls = ServicioRepository
+
+
+class TurnoServiceAsync(ServicioAsync):
+    service_cls = TurnoService
+    repo_cls = TurnoRepository
+
+
+class ReporteServiceAsync(ServicioAsync):
+    service_cls = ReporteService
+    repo_cls = ReporteRepository
@@ -1,5 +1,7 @@
+from typing import Optional
 from ..db.cliente_repository import ClienteRepository, ClienteDB
 from ..dto.cliente import ClienteCreate, ClienteUpdate
+from .agenda_en_vivo import broker_agenda, RECARGAR
 
 
 class ClienteService:
@@ -12,22 +14,37 @@ class ClienteService:
         """Crea un nuevo cliente"""
         return self.repo.crear(data)
 
-    def obtener_clientes(self) -> list[ClienteDB]:
-        """Obtiene todos los clientes"""
-        return self.repo.listar()
+    def crear_clientes_lote(self, filas: list[tuple[int, ClienteCreate]]) -> dict:
+        """Crea un lote de clientes importados"""
+        return self.repo.crear_lote(filas)
+
+    def obtener_clientes(self, limite: int, cursor: Optional[str] = None) -> dict:
+        """Obtiene una página de clientes"""
+        return self.repo.listar(limite, cursor)
+
+    def version_clientes(self) -> int:
+        """Versión de los clientes, cambia con cada alta, modificación o baja"""
+        return self.repo.version()
 
     def obtener_cliente(self, id: int) -> ClienteDB:
         """Obtiene un cliente por ID"""
         return self.repo.por_id(id)
 
-    def buscar_clientes(self, termino: str) -> list[ClienteDB]:
+    def buscar_clientes(self, termino: str, limite: int = 20) -> list[ClienteDB]:
         """Busca clientes por nombre o teléfono"""
-        return self.repo.buscar(termino)
+        return self.repo.buscar(termino, limite)
 
     def actualizar_cliente(self, id: int, data: ClienteUpdate) -> ClienteDB:
         """Actualiza un cliente"""
-        return self.repo.actualizar(id, data)
+        cliente, dias = self.repo.actualizar(id, data)
+        # Las agendas abiertas de los días donde aparece muestran su nombre y teléfono
+        for fecha in dias:
+            broker_agenda.publicar(fecha, RECARGAR)
+        return cliente
 
     def eliminar_cliente(self, id: int) -> bool:
         """Elimina un cliente"""
-        return self.repo.eliminar(id)
+        # Sus turnos dejan de aparecer en las agendas abiertas de esos días
+        for fecha in self.repo.eliminar(id):
+            broker_agenda.publicar(fecha, RECARGAR)
+        return True
@@ -0,0 +1,49 @@
+"""
+Exportación en streaming a CSV o NDJSON.
+La consulta se lee con AsyncSession.stream en tandas de TAMANO_TANDA filas y
+cada tanda se escribe y se envía enseguida: nunca se carga la tabla completa.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..dto.archivo import FormatoArchivo
+
+TAMANO_TANDA = 500
+
+TIPOS_MEDIO = {
+    FormatoArchivo.CSV: "text/csv; charset=utf-8",
+    FormatoArchivo.NDJSON: "application/x-ndjson",
+}
+
+
+async def exportar(fabrica_sesion: Callable[[], AsyncSession], consulta: Select,
+                   formato: FormatoArchivo) -> AsyncIterator[bytes]:
+    """Genera el archivo de a tandas a partir de una consulta de columnas"""
+    # La sesión es propia: el streaming sigue después de que termina el endpoint
+    async with fabrica_sesion() as db:
+        resultado = await db.stream(consulta.execution_options(yield_per=TAMANO_TANDA))
+        columnas = list(resultado.keys())
+
+        if formato == FormatoArchivo.CSV:
+            buffer = io.StringIO()
+            escritor = csv.writer(buffer)
+            escritor.writerow(columnas)
+            async for tanda in resultado.partitions():
+                escritor.writerows(tanda)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+            return
+
+        async for tanda in resultado.partitions():
+            yield "".join(
+                json.dumps(dict(zip(columnas, fila)), default=str, ensure_ascii=False) + "\n"
+                for fila in tanda
+            ).encode()
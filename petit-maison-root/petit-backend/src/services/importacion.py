@@ -0,0 +1,91 @@
+"""
+Importación masiva desde CSV o NDJSON.
+Las filas se validan con el DTO del recurso y se mandan al servicio en lotes
+de TAMANO_LOTE: cada lote es una transacción con un INSERT executemany, y
+entre lote y lote el event loop queda libre para atender otros requests.
+"""
+import csv
+import io
+import json
+from typing import Awaitable, Callable, Iterator, Optional
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+from ..dto.archivo import FormatoArchivo
+
+TAMANO_LOTE = 500
+
+
+def detectar_formato(request: Request, formato: Optional[FormatoArchivo]) -> FormatoArchivo:
+    """Usa el formato pedido o lo deduce del Content-Type (por defecto CSV)"""
+    if formato is not None:
+        return formato
+    if "json" in request.headers.get("content-type", ""):
+        return FormatoArchivo.NDJSON
+    return FormatoArchivo.CSV
+
+
+def leer_filas(contenido: bytes, formato: FormatoArchivo) -> Iterator[tuple[int, Optional[dict], Optional[str]]]:
+    """Recorre el archivo devolviendo (nro_fila, datos, error de formato)"""
+    try:
+        texto = contenido.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar en UTF-8")
+
+    if formato == FormatoArchivo.CSV:
+        for nro, fila in enumerate(csv.DictReader(io.StringIO(texto)), start=1):
+            # Las celdas vacías cuentan como campos no informados
+            yield nro, {k: v for k, v in fila.items() if k and v not in ("", None)}, None
+        return
+
+    lineas = (linea for linea in texto.splitlines() if linea.strip())
+    for nro, linea in enumerate(lineas, start=1):
+        try:
+            datos = json.loads(linea)
+        except json.JSONDecodeError as e:
+            yield nro, None, f"JSON inválido: {e.msg}"
+            continue
+        if not isinstance(datos, dict):
+            yield nro, None, "Cada línea debe ser un objeto JSON"
+            continue
+        yield nro, datos, None
+
+
+def _describir(error: ValidationError) -> str:
+    """Resume los errores de validación de una fila"""
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def importar(contenido: bytes, formato: FormatoArchivo, modelo: type[BaseModel],
+                   guardar_lote: Callable[[list[tuple[int, BaseModel]]], Awaitable[dict]]) -> dict:
+    """Valida las filas y las guarda por lotes; junta los errores de cada fila"""
+    creados = 0
+    errores = []
+    lote = []
+
+    async def vaciar():
+        nonlocal creados
+        resultado = await guardar_lote(lote)
+        creados += resultado["creados"]
+        errores.extend(resultado["errores"])
+        lote.clear()
+
+    for nro, datos, error in leer_filas(contenido, formato):
+        if error:
+            errores.append({"fila": nro, "error": error})
+            continue
+        try:
+            lote.append((nro, modelo.model_validate(datos)))
+        except ValidationError as e:
+            errores.append({"fila": nro, "error": _describir(e)})
+            continue
+        if len(lote) >= TAMANO_LOTE:
+            await vaciar()
+    if lote:
+        await vaciar()
+
+    errores.sort(key=lambda e: e["fila"])
+    return {"creados": creados, "errores": errores}
@@ -0,0 +1,174 @@
+"""
+Recordatorios de turnos: escaneo, cola y despacho.
+
+`correr` encola los turnos abiertos de un día (por defecto, mañana) en la
+tabla recordatorios y después despacha la cola con un pool acotado de
+workers async: una tarea toma tandas de la cola y las reparte, cada worker
+llama al enviador y los resultados se guardan por tanda (un UPDATE para los
+enviados y uno para los fallidos, que se reintentan con espera creciente).
+Lo corre el comando `recordatorios` (cron) o, con PETIT_RECORDATORIOS_CADA_MIN,
+un programador dentro de la app que recorre la base principal y la de cada salón.
+
+El enviador es intercambiable (ver crear_enviador): por defecto escribe en el
+log, y "archivo:RUTA" deja cada mensaje como una línea NDJSON, para pruebas.
+Del lado de la cola cada turno y día se envía una sola vez; cada mensaje lleva
+además una `clave` estable para que el proveedor descarte un duplicado si un
+envío se repite después de una caída.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from datetime import date, timedelta
+from importlib import import_module
+from pathlib import Path
+from typing import Callable, Optional, Protocol, TypeVar
+
+import orjson
+
+from ..api.metricas import Contador, Histograma, BUCKETS_SEGUNDOS, registrar
+from ..db.base import salon_actual, sesiones, reintentar_si_bloqueada
+from ..db.salones import conocidos
+from ..db.recordatorio_repository import RecordatorioRepository, ENVIADO, REINTENTO, FALLIDO
+
+logger = logging.getLogger("petit.recordatorios")
+
+T = TypeVar("T")
+
+WORKERS = int(os.getenv("PETIT_RECORDATORIOS_WORKERS", 50))      # Envíos en paralelo
+TANDA = int(os.getenv("PETIT_RECORDATORIOS_TANDA", 500))         # Filas por lectura/escritura de la cola
+TIMEOUT_ENVIO = float(os.getenv("PETIT_RECORDATORIOS_TIMEOUT", 10))
+CADA_MINUTOS = float(os.getenv("PETIT_RECORDATORIOS_CADA_MIN", 0))  # 0 = sin programador en la app
+ENVIADOR = os.getenv("PETIT_RECORDATORIOS_ENVIADOR", "log")
+
+RECORDATORIOS = registrar(Contador(
+    "petit_recordatorios_total", "Recordatorios despachados por resultado", ("resultado",)
+))
+DURACION_ENVIO = registrar(Histograma(
+    "petit_recordatorio_envio_segundos", "Duración de cada envío", ("enviador",), BUCKETS_SEGUNDOS
+))
+
+
+class Enviador(Protocol):
+    """Manda un recordatorio; cualquier excepción cuenta como envío fallido"""
+
+    async def enviar(self, recordatorio: dict) -> None: ...
+
+
+class EnviadorLog:
+    """Deja cada recordatorio en el log, o como una línea NDJSON en `archivo`"""
+
+    def __init__(self, archivo: Optional[Path] = None, demora_ms: float = 0):
+        self.archivo = archivo
+        self.demora = demora_ms / 1000  # Simula la latencia de un proveedor real
+
+    async def enviar(self, recordatorio: dict) -> None:
+        if self.demora:
+            await asyncio.sleep(self.demora)
+        mensaje = {clave: recordatorio[clave] for clave in ("clave", "cliente_telefono", "cliente_email", "mensaje")}
+        if self.archivo is None:
+            logger.info("Recordatorio %s", mensaje)
+            return
+        with open(self.archivo, "ab") as salida:
+            salida.write(orjson.dumps(mensaje) + b"\n")
+
+
+def crear_enviador(especificacion: str) -> Enviador:
+    """Arma el enviador: "log", "archivo:RUTA" o "paquete.modulo:Clase" (sin argumentos)"""
+    if especificacion == "log":
+        return EnviadorLog()
+    tipo, _, valor = especificacion.partition(":")
+    if tipo == "archivo" and valor:
+        return EnviadorLog(Path(valor))
+    if not valor:
+        raise ValueError(f"Enviador desconocido: {especificacion}")
+    return getattr(import_module(tipo), valor)()
+
+
+def mensaje(recordatorio: dict) -> str:
+    """Texto del recordatorio"""
+    return (f"Hola {recordatorio['cliente_nombre']}! Te recordamos tu turno de "
+            f"{recordatorio['servicio_nombre']} el {recordatorio['fecha']:%d/%m} a las "
+            f"{recordatorio['hora_inicio']:%H:%M}. Petit Maison")
+
+
+def _en_sesion(operacion: Callable[[RecordatorioRepository], T]) -> T:
+    """Corre una operación de la cola en su propia sesión, en la base del salón actual
+    (reintenta si la base está bloqueada)"""
+    with sesiones()() as db:
+        return reintentar_si_bloqueada(db, lambda: operacion(RecordatorioRepository(db)))
+
+
+async def encolar(fecha: date, tanda: int = TANDA) -> int:
+    """Encola los recordatorios de los turnos abiertos de un día; devuelve cuántos son nuevos"""
+    return await asyncio.to_thread(_en_sesion, lambda repo: repo.encolar_dia(fecha, tanda))
+
+
+async def despachar(enviador: Enviador, workers: int = WORKERS, tanda: int = TANDA) -> dict[str, int]:
+    """Envía todo lo que está listo en la cola; devuelve cuántos se enviaron, se reintentarán o fallaron"""
+    cola: asyncio.Queue[Optional[dict]] = asyncio.Queue(maxsize=tanda)
+    enviados: list[int] = []
+    fallidos: list[tuple[int, int, str]] = []
+    totales: Counter[str] = Counter(dict.fromkeys((ENVIADO, REINTENTO, FALLIDO), 0))
+    nombre = type(enviador).__name__
+
+    async def trabajador():
+        while (recordatorio := await cola.get()) is not None:
+            inicio = time.perf_counter()
+            try:
+                await asyncio.wait_for(enviador.enviar(recordatorio), TIMEOUT_ENVIO)
+                enviados.append(recordatorio["id"])
+            except Exception as error:
+                fallidos.append((recordatorio["id"], recordatorio["intentos"], repr(error)))
+            DURACION_ENVIO.observar(time.perf_counter() - inicio, nombre)
+
+    async def guardar():
+        """Guarda los resultados acumulados en una sola transacción"""
+        listos, fallados = enviados[:], fallidos[:]
+        enviados.clear()
+        fallidos.clear()
+        if listos or fallados:
+            resultado = await asyncio.to_thread(_en_sesion, lambda repo: repo.registrar(listos, fallados))
+            for clave, cantidad in resultado.items():
+                totales[clave] += cantidad
+                RECORDATORIOS.incrementar(clave, valor=cantidad)
+
+    tareas = [asyncio.create_task(trabajador()) for _ in range(max(1, workers))]
+    try:
+        # La tanda siguiente se toma mientras los workers terminan la anterior
+        while lote := await asyncio.to_thread(_en_sesion, lambda repo: repo.tomar(tanda)):
+            for recordatorio in lote:
+                clave = f"turno-{recordatorio['turno_id']}-{recordatorio['fecha'].isoformat()}"
+                await cola.put({**recordatorio, "clave": clave, "mensaje": mensaje(recordatorio)})
+            await guardar()
+    finally:
+        for _ in tareas:
+            await cola.put(None)
+        await asyncio.gather(*tareas)
+        await guardar()
+    return dict(totales)
+
+
+async def correr(enviador: Enviador, fecha: Optional[date] = None,
+                 workers: int = WORKERS, tanda: int = TANDA) -> dict[str, int]:
+    """Encola los turnos del día (por defecto, mañana) y despacha la cola"""
+    fecha = fecha or date.today() + timedelta(days=1)
+    encolados = await encolar(fecha, tanda)
+    return {"encolados": encolados, **await despachar(enviador, workers, tanda)}
+
+
+async def programar(enviador: Enviador, cada_minutos: float) -> None:
+    """Corre `correr` en cada salón cada `cada_minutos` hasta que se cancela (programador de la app)"""
+    while True:
+        for salon in (None, *conocidos()):
+            token = salon_actual.set(salon)
+            try:
+                totales = await correr(enviador)
+                if any(totales.values()):
+                    logger.info("Recordatorios%s: %s", f" ({salon})" if salon else "", totales)
+            except Exception:
+                logger.exception("Falló el despacho de recordatorios%s", f" ({salon})" if salon else "")
+            finally:
+                salon_actual.reset(token)
+        await asyncio.sleep(cada_minutos * 60)
@@ -0,0 +1,18 @@
+from datetime import date
+from typing import Optional
+from ..db.reporte_repository import ReporteRepository
+
+
+class ReporteService:
+    """Servicio de lógica de negocio para reportes"""
+
+    def __init__(self, repo: ReporteRepository):
+        self.repo = repo
+
+    def obtener_ingresos(self, desde: date, hasta: date, servicio_id: Optional[int] = None) -> dict:
+        """Ingresos por día y servicio en un rango"""
+        return self.repo.ingresos(desde, hasta, servicio_id)
+
+    def obtener_asistencia(self, desde: date, hasta: date) -> list[dict]:
+        """Tasas de ausencia y cancelación por servicio en un rango"""
+        return self.repo.asistencia(desde, hasta)
@@ -1,5 +1,8 @@
+from typing import Optional
 from ..db.servicio_repository import ServicioRepository, ServicioDB
+from ..db.catalogo_servicios import ServicioCache
 from ..dto.servicio import ServicioCreate, ServicioUpdate
+from .agenda_en_vivo import broker_agenda, RECARGAR
 
 
 class ServicioService:
@@ -12,17 +15,26 @@ class ServicioService:
         """Crea un nuevo servicio"""
         return self.repo.crear(data)
 
-    def obtener_servicios(self, solo_activos: bool = True) -> list[ServicioDB]:
-        """Obtiene todos los servicios (por defecto solo activos)"""
-        return self.repo.listar(solo_activos)
+    def obtener_servicios(self, solo_activos: bool, limite: int,
+                          cursor: Optional[str] = None) -> dict:
+        """Obtiene una página de servicios (por defecto solo activos)"""
+        return self.repo.listar(solo_activos, limite, cursor)
 
-    def obtener_servicio(self, id: int) -> ServicioDB:
+    def version_servicios(self) -> int:
+        """Versión de los servicios, cambia con cada alta o modificación"""
+        return self.repo.version()
+
+    def obtener_servicio(self, id: int) -> ServicioCache:
         """Obtiene un servicio por ID"""
         return self.repo.por_id(id)
 
     def actualizar_servicio(self, id: int, data: ServicioUpdate) -> ServicioDB:
         """Actualiza un servicio"""
-        return self.repo.actualizar(id, data)
+        servicio, dias = self.repo.actualizar(id, data)
+        # Las agendas abiertas de los días donde aparece muestran su nombre, duración y precio
+        for fecha in dias:
+            broker_agenda.publicar(fecha, RECARGAR)
+        return servicio
 
     def desactivar_servicio(self, id: int) -> ServicioDB:
         """Desactiva un servicio (no lo elimina para mantener historial)"""
@@ -1,6 +1,18 @@
-from datetime import date
+from datetime import date, timedelta
+from typing import Optional
+
+import orjson
+
+from ..api.metricas import Contador, registrar
 from ..db.turno_repository import TurnoRepository, TurnoDB
-from ..dto.turno import TurnoCreate, TurnoUpdate, EstadoTurno
+from ..db.cache_agenda import cache_agenda
+from ..db.paginacion import LIMITE_DEFECTO
+from ..dto.turno import TurnoCreate, TurnoUpdate, TurnoImport, EstadoTurno, SerieCreate, SerieUpdate
+from .agenda_en_vivo import broker_agenda, RECARGAR
+
+CACHE_AGENDA = registrar(Contador(
+    "petit_cache_agenda_total", "Lecturas de la agenda de un día por resultado del cache", ("resultado",)
+))
 
 
 class TurnoService:
@@ -11,15 +23,78 @@ class TurnoService:
 
     def crear_turno(self, data: TurnoCreate) -> TurnoDB:
         """Crea un nuevo turno"""
-        return self.repo.crear(data)
+        turno = self.repo.crear(data)
+        self._avisar("creado", [turno])
+        return turno
+
+    def crear_serie(self, data: SerieCreate) -> dict:
+        """Crea una serie de turnos recurrentes"""
+        serie = self.repo.crear_serie(data)
+        self._avisar("creado", serie["turnos"])
+        return serie
+
+    def actualizar_serie(self, serie_id: int, desde: date, data: SerieUpdate) -> list[TurnoDB]:
+        """Actualiza un turno de la serie y los siguientes"""
+        turnos = self.repo.actualizar_serie(serie_id, desde, data)
+        self._avisar("actualizado", turnos)
+        return turnos
+
+    def cancelar_serie(self, serie_id: int, desde: date) -> list[TurnoDB]:
+        """Cancela un turno de la serie y los siguientes"""
+        turnos = self.repo.cancelar_serie(serie_id, desde)
+        self._avisar("estado", turnos)
+        return turnos
+
+    def crear_turnos_lote(self, filas: list[tuple[int, TurnoImport]]) -> dict:
+        """Crea un lote de turnos importados"""
+        resultado = self.repo.crear_lote(filas)
+        if resultado["creados"]:
+            # Un lote puede traer muchos turnos por día: las agendas abiertas se recargan enteras
+            for fecha in {data.fecha for _, data in filas}:
+                broker_agenda.publicar(fecha, RECARGAR)
+        return resultado
 
     def obtener_agenda_dia(self, fecha: date) -> list[dict]:
         """Obtiene la agenda de un día específico"""
         return self.repo.listar_por_fecha(fecha)
 
-    def obtener_historial_cliente(self, cliente_id: int) -> list[dict]:
-        """Obtiene el historial de turnos de un cliente"""
-        return self.repo.listar_por_cliente(cliente_id)
+    def obtener_agenda_dia_json(self, fecha: date) -> bytes:
+        """La agenda de un día ya serializada, desde el cache si sigue vigente"""
+        version = self.repo.version_dia(fecha)
+        agenda = cache_agenda.obtener(fecha, version)
+        if agenda is not None:
+            CACHE_AGENDA.incrementar("acierto")
+            return agenda
+        CACHE_AGENDA.incrementar("fallo")
+        agenda = orjson.dumps(self.repo.listar_por_fecha(fecha))
+        cache_agenda.guardar(fecha, version, agenda)
+        return agenda
+
+    def version_agenda(self, desde: date, hasta: Optional[date] = None) -> str:
+        """Versión de la agenda de un día o rango, cambia con cualquier turno de esos días"""
+        return self.repo.version_agenda(desde, hasta)
+
+    def obtener_agenda_rango(self, desde: date, hasta: date,
+                             estado: Optional[EstadoTurno] = None) -> list[dict]:
+        """Obtiene la agenda de un rango de fechas agrupada por día (incluye días vacíos)"""
+        turnos = self.repo.listar_por_rango(desde, hasta, estado)
+        dias = {desde + timedelta(days=i): [] for i in range((hasta - desde).days + 1)}
+        for turno in turnos:
+            dias[turno["fecha"]].append(turno)
+        return [{"fecha": fecha, "turnos": lista} for fecha, lista in dias.items()]
+
+    def obtener_disponibilidad(self, fecha: date, servicio_id: int) -> list[dict]:
+        """Obtiene los horarios libres de un día para un servicio"""
+        return self.repo.disponibilidad(fecha, servicio_id)
+
+    def obtener_historial_cliente(self, cliente_id: int, limite: int = LIMITE_DEFECTO,
+                                  cursor: Optional[str] = None) -> dict:
+        """Obtiene una página del historial de turnos de un cliente (más reciente primero)"""
+        return self.repo.listar_por_cliente(cliente_id, limite, cursor)
+
+    def obtener_resumen_cliente(self, cliente_id: int) -> dict:
+        """Obtiene visitas, última visita, ausencias y total gastado de un cliente"""
+        return self.repo.resumen_cliente(cliente_id)
 
     def obtener_turno(self, id: int) -> TurnoDB:
         """Obtiene un turno por ID"""
@@ -27,24 +102,57 @@ class TurnoService:
 
     def actualizar_turno(self, id: int, data: TurnoUpdate) -> TurnoDB:
         """Actualiza un turno"""
-        return self.repo.actualizar(id, data)
+        # Si cambia de día, la agenda del día anterior tiene que enterarse
+        turno, anterior = self.repo.actualizar(id, data)
+        if anterior != turno.fecha:
+            broker_agenda.publicar(anterior, {"tipo": "eliminado", "id": id})
+            self._avisar("creado", [turno])
+        else:
+            self._avisar("actualizado", [turno])
+        return turno
 
     def confirmar_turno(self, id: int) -> TurnoDB:
         """Marca un turno como confirmado"""
-        return self.repo.cambiar_estado(id, EstadoTurno.CONFIRMADO)
+        return self._cambiar_estado(id, EstadoTurno.CONFIRMADO)
 
     def completar_turno(self, id: int) -> TurnoDB:
         """Marca un turno como completado"""
-        return self.repo.cambiar_estado(id, EstadoTurno.COMPLETADO)
+        return self._cambiar_estado(id, EstadoTurno.COMPLETADO)
 
     def cancelar_turno(self, id: int) -> TurnoDB:
         """Marca un turno como cancelado"""
-        return self.repo.cambiar_estado(id, EstadoTurno.CANCELADO)
+        return self._cambiar_estado(id, EstadoTurno.CANCELADO)
 
     def marcar_no_asistio(self, id: int) -> TurnoDB:
         """Marca que el cliente no asistió"""
-        return self.repo.cambiar_estado(id, EstadoTurno.NO_ASISTIO)
+        return self._cambiar_estado(id, EstadoTurno.NO_ASISTIO)
+
+    def cambiar_estado_lote(self, ids: list[int], estado: EstadoTurno) -> dict:
+        """Cambia el estado de varios turnos a la vez (informa el resultado de cada uno)"""
+        resultado = self.repo.cambiar_estado_lote(ids, estado)
+        self._avisar("estado", resultado.pop("turnos"))
+        return resultado
+
+    def cerrar_dia(self, fecha: date, ausentes: list[int]) -> dict:
+        """Cierra la agenda de un día: completa los turnos abiertos y marca los ausentes"""
+        resultado = self.repo.cerrar_dia(fecha, ausentes)
+        self._avisar("estado", resultado.pop("turnos"))
+        return resultado
 
     def eliminar_turno(self, id: int) -> bool:
         """Elimina un turno"""
-        return self.repo.eliminar(id)
+        fecha = self.repo.eliminar(id)
+        broker_agenda.publicar(fecha, {"tipo": "eliminado", "id": id})
+        return True
+
+    def _cambiar_estado(self, id: int, estado: EstadoTurno) -> TurnoDB:
+        turno = self.repo.cambiar_estado(id, estado)
+        self._avisar("estado", [turno])
+        return turno
+
+    def _avisar(self, tipo: str, turnos: list[TurnoDB]) -> None:
+        """Publica turnos ya guardados en la agenda en vivo de su día (el detalle se lee solo si alguien escucha)"""
+        ids = [t.id for t in turnos if broker_agenda.escuchando(t.fecha)]
+        if ids:
+            for detalle in self.repo.detalles_por_id(ids):
+                broker_agenda.publicar(detalle["fecha"], {"tipo": tipo, "turno": detalle})
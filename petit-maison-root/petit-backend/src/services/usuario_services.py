@@ -8,8 +8,8 @@ class UsuarioService:
     def crear_usuario(self, data: UsuarioCreate):
         return self.repo.crear(data)
 
-    def obtener_usuarios(self):
-        return self.repo.listar()
+    def obtener_usuarios(self, limite: int, cursor: str | None = None):
+        return self.repo.listar(limite, cursor)
 
     def obtener_usuario_por_email(self, email: str):
         return self.repo.por_email(email)
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Fixtures comunes: cada test usa una base SQLite nueva en tmp_path.
+Los motores de src.db.base se reemplazan antes de abrir la app, y el estado
+en memoria por salón (índices de agenda, catálogo, caché) arranca vacío.
+"""
+import asyncio
+import os
+import tempfile
+
+# Antes de importar la app: que nada apunte a db/petit.db
+os.environ.setdefault("PETIT_DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/petit-tests.db")
+os.environ.setdefault("PETIT_LOG_LEVEL", "WARNING")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import salones as api_salones
+from src.db import base, salones
+from src.db.cache_agenda import cache_agenda
+from src.db.catalogo_servicios import catalogo_servicios
+from src.db.idempotencia_repository import purgas_idempotencia
+from src.db.indice_agenda import indices_agenda
+
+
+@pytest.fixture
+def ruta_base(tmp_path):
+    return tmp_path / "petit.db"
+
+
+@pytest.fixture
+def motores(ruta_base, monkeypatch):
+    """Motores sync y async sobre una base vacía (sin migrar)"""
+    engine = base.crear_motor(f"sqlite:///{ruta_base}")
+    async_engine = base.crear_motor_async(f"sqlite+aiosqlite:///{ruta_base}")
+    monkeypatch.setattr(base, "engine", engine)
+    monkeypatch.setattr(base, "SessionLocal", base.crear_sesiones(engine))
+    monkeypatch.setattr(base, "async_engine", async_engine)
+    monkeypatch.setattr(base, "AsyncSessionLocal", base.crear_sesiones_async(async_engine))
+    for registro in (indices_agenda, catalogo_servicios, cache_agenda, purgas_idempotencia):
+        monkeypatch.setattr(registro, "_instancias", {})
+    yield engine
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture
+def salones_tmp(tmp_path, monkeypatch):
+    """Salones 'norte' y 'sur' con sus bases en tmp_path"""
+    monkeypatch.setattr(salones, "SALONES_DIR", tmp_path / "salones")
+    monkeypatch.setattr(salones, "SALONES", frozenset({"norte", "sur"}))
+    registro = salones.RegistroMotores()
+    monkeypatch.setattr(salones, "motores_salon", registro)
+    monkeypatch.setattr(api_salones, "motores_salon", registro)
+    yield registro
+    for salon in registro.abiertos():
+        motores = registro.obtener(salon)
+        motores.engine.dispose()
+        asyncio.run(motores.async_engine.dispose())
+
+
+@pytest.fixture
+def cliente(motores):
+    """Cliente HTTP de la app; el arranque migra la base"""
+    from src.api.app import crear_app
+
+    with TestClient(crear_app()) as http:
+        yield http
+
+
+@pytest.fixture
+def datos(motores):
+    """Base migrada con un cliente y dos servicios (30 y 60 minutos)"""
+    from src.db.cliente_repository import ClienteRepository
+    from src.db.esquema import migrar
+    from src.db.servicio_repository import ServicioRepository
+    from src.dto.cliente import ClienteCreate
+    from src.dto.servicio import ServicioCreate
+
+    migrar(motores)
+    with base.SessionLocal() as db:
+        cliente_id = ClienteRepository(db).crear(ClienteCreate(nombre="Ana", telefono="1111")).id
+        servicios = [
+            ServicioRepository(db).crear(ServicioCreate(nombre=nombre, duracion_min=minutos, precio=precio)).id
+            for nombre, minutos, precio in (("Esmaltado", 30, 1000.0), ("Kapping", 60, 2500.0))
+        ]
+    return {"cliente_id": cliente_id, "servicios": servicios}
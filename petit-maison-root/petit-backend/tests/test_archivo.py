@@ -0,0 +1,73 @@
+"""
+Archivo de turnos: después de archivar, la agenda, el historial y los
+reportes siguen leyendo los turnos movidos (UNION con turnos_archivo).
+"""
+from datetime import date, timedelta
+
+from src.db import archivo_turnos, resumen_diario
+
+DIA = date(2026, 3, 2)
+
+
+def _reservar(cliente, datos, dia: date, hora: str, servicio: int = 0) -> dict:
+    respuesta = cliente.post("/turnos/", json={
+        "cliente_id": datos["cliente_id"], "servicio_id": datos["servicios"][servicio],
+        "fecha": dia.isoformat(), "hora_inicio": hora,
+    })
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+
+def _contar(motores, tabla: str) -> int:
+    with motores.connect() as conn:
+        return conn.exec_driver_sql(f"SELECT count(*) FROM {tabla}").scalar()
+
+
+def test_lecturas_con_archivo(cliente, datos, motores):
+    viejo = _reservar(cliente, datos, DIA, "10:00", servicio=1)
+    cliente.post(f"/turnos/{viejo['id']}/completar")
+    abierto = _reservar(cliente, datos, DIA, "12:00")
+    nuevo = _reservar(cliente, datos, DIA + timedelta(days=30), "10:00")
+    agenda_antes = cliente.get(f"/turnos/agenda/{DIA}").json()
+
+    assert archivo_turnos.archivar(motores, DIA + timedelta(days=1)) == 1
+    assert _contar(motores, "turnos_archivo") == 1
+
+    # El turno abierto se queda en turnos; la agenda del día muestra los dos
+    assert cliente.get(f"/turnos/agenda/{DIA}").json() == agenda_antes
+    historial = cliente.get(f"/turnos/cliente/{datos['cliente_id']}").json()
+    assert [t["id"] for t in historial["items"]] == [nuevo["id"], abierto["id"], viejo["id"]]
+
+    resumen = cliente.get(f"/turnos/cliente/{datos['cliente_id']}/resumen").json()
+    assert resumen["visitas"] == 1 and resumen["total_gastado"] == 2500.0
+    ingresos = cliente.get("/reportes/ingresos", params={"desde": DIA, "hasta": DIA}).json()
+    assert ingresos["total"] == 2500.0
+
+
+def _resumen(motores) -> list[tuple]:
+    with motores.connect() as conn:
+        return [tuple(fila) for fila in conn.exec_driver_sql(
+            "SELECT fecha, servicio_id, estado, cantidad, importe FROM resumen_diario "
+            "WHERE cantidad != 0 ORDER BY 1, 2, 3"
+        )]
+
+
+def test_ids_archivados_no_se_reusan(cliente, datos, motores):
+    """Archivar, reservar, borrar y volver a archivar (antes el ID se repetía)"""
+    viejo = _reservar(cliente, datos, DIA, "10:00")
+    cliente.post(f"/turnos/{viejo['id']}/completar")
+    assert archivo_turnos.archivar(motores, DIA + timedelta(days=1)) == 1
+
+    nuevo = _reservar(cliente, datos, DIA + timedelta(days=1), "10:00")
+    assert nuevo["id"] > viejo["id"]
+    borrado = _reservar(cliente, datos, DIA + timedelta(days=1), "11:00")
+    assert cliente.delete(f"/turnos/{borrado['id']}").status_code == 200
+    cliente.post(f"/turnos/{nuevo['id']}/completar")
+    antes = _resumen(motores)
+
+    assert archivo_turnos.archivar(motores, DIA + timedelta(days=2)) == 1
+    assert _contar(motores, "turnos_archivo") == 2
+    assert _resumen(motores) == antes
+    with motores.begin() as conn:
+        resumen_diario.reconstruir(conn)
+    assert _resumen(motores) == antes
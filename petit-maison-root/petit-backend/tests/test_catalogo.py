@@ -0,0 +1,53 @@
+"""
+Catálogo de servicios en memoria: las reservas ven enseguida los cambios que
+hizo otro proceso (acá, SQL directo contra la base), aunque el TTL del
+listado no haya vencido.
+"""
+from datetime import date, timedelta
+
+from src.db.catalogo_servicios import catalogo_servicios
+
+FECHA = (date.today() + timedelta(days=7)).isoformat()
+
+
+def _otro_proceso(motores, sql: str) -> None:
+    """Un cambio en servicios hecho por otro proceso (con su incremento de versión)"""
+    with motores.begin() as conn:
+        conn.exec_driver_sql(sql)
+        conn.exec_driver_sql("UPDATE versiones SET valor = valor + 1 WHERE clave = 'servicios'")
+
+
+def _reservar(cliente, datos, servicio_id: int, hora: str):
+    return cliente.post("/turnos/", json={
+        "cliente_id": datos["cliente_id"], "servicio_id": servicio_id, "fecha": FECHA, "hora_inicio": hora,
+    })
+
+
+def test_reservas_con_el_catalogo_al_dia(cliente, datos, motores):
+    assert cliente.get("/servicios/").status_code == 200
+    catalogo_servicios.actual().ttl = 3600
+
+    _otro_proceso(motores, "INSERT INTO servicios (id, nombre, duracion_min, precio, activo) "
+                           "VALUES (10, 'Nuevo', 30, 1500, 1)")
+    assert _reservar(cliente, datos, 10, "09:00").status_code == 200
+
+    _otro_proceso(motores, "UPDATE servicios SET precio = 1800 WHERE id = 10")
+    turno = _reservar(cliente, datos, 10, "10:00").json()
+    with motores.connect() as conn:
+        assert conn.exec_driver_sql(f"SELECT precio FROM turnos WHERE id = {turno['id']}").scalar() == 1800
+
+    _otro_proceso(motores, "UPDATE servicios SET activo = 0 WHERE id = 10")
+    assert _reservar(cliente, datos, 10, "11:00").status_code == 400
+    disponibles = cliente.get(f"/turnos/disponibilidad/{FECHA}", params={"servicio_id": 10})
+    assert disponibles.status_code == 200
+
+
+def test_servicio_desactivado_no_se_reserva(cliente, datos):
+    servicio = datos["servicios"][0]
+    assert cliente.delete(f"/servicios/{servicio}").status_code == 200
+    assert _reservar(cliente, datos, servicio, "09:00").status_code == 400
+    serie = cliente.post("/turnos/serie", json={
+        "cliente_id": datos["cliente_id"], "servicio_id": servicio, "fecha_inicio": FECHA,
+        "hora_inicio": "09:00", "frecuencia": "semanal", "cantidad": 2,
+    })
+    assert serie.status_code == 400
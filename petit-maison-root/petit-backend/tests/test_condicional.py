@@ -0,0 +1,52 @@
+"""GET condicionales: el ETag cambia con los datos y con los parámetros de la consulta"""
+from datetime import date, timedelta
+
+from src.db.catalogo_servicios import catalogo_servicios
+
+
+def _etag(cliente, url: str, **params) -> str:
+    respuesta = cliente.get(url, params=params)
+    assert respuesta.status_code == 200
+    return respuesta.headers["ETag"]
+
+
+def _revalidar(cliente, url: str, etag: str, **params) -> int:
+    return cliente.get(url, params=params, headers={"If-None-Match": etag}).status_code
+
+
+def test_etag_por_parametros(cliente, datos):
+    cliente.delete(f"/servicios/{datos['servicios'][0]}")
+    activos = _etag(cliente, "/servicios/")
+    assert _revalidar(cliente, "/servicios/", activos) == 304
+    assert _revalidar(cliente, "/servicios/", activos, solo_activos=False) == 200
+    assert _revalidar(cliente, "/servicios/", activos, limite=1) == 200
+
+    pagina = _etag(cliente, "/clientes/", limite=1)
+    assert _revalidar(cliente, "/clientes/", pagina, limite=1) == 304
+    assert _revalidar(cliente, "/clientes/", pagina, limite=2) == 200
+    assert _revalidar(cliente, "/clientes/", pagina, limite=1, cursor="x") != 304
+
+    hoy = date.today()
+    rango = _etag(cliente, "/turnos/agenda", desde=hoy, hasta=hoy + timedelta(days=1))
+    assert _revalidar(cliente, "/turnos/agenda", rango, desde=hoy, hasta=hoy + timedelta(days=1)) == 304
+    assert _revalidar(cliente, "/turnos/agenda", rango, desde=hoy, hasta=hoy + timedelta(days=1),
+                      estado="cancelado") == 200
+    assert _revalidar(cliente, "/turnos/agenda", rango, desde=hoy + timedelta(days=5),
+                      hasta=hoy + timedelta(days=6)) == 200
+
+
+def test_etag_de_servicios_es_el_del_catalogo(cliente, datos, motores):
+    """Con el catálogo sin recargar, el ETag es el de lo que se devuelve, no el de la base"""
+    viejo = _etag(cliente, "/servicios/")
+    catalogo_servicios.actual().ttl = 3600
+    with motores.begin() as conn:
+        conn.exec_driver_sql("UPDATE servicios SET precio = 9 WHERE id = 1")
+        conn.exec_driver_sql("UPDATE versiones SET valor = valor + 1 WHERE clave = 'servicios'")
+    respuesta = cliente.get("/servicios/")
+    assert respuesta.headers["ETag"] == viejo
+    assert all(s["precio"] != 9 for s in respuesta.json()["items"])
+
+    catalogo_servicios.actual().ttl = 0
+    respuesta = cliente.get("/servicios/", headers={"If-None-Match": viejo})
+    assert respuesta.status_code == 200
+    assert any(s["precio"] == 9 for s in respuesta.json()["items"])
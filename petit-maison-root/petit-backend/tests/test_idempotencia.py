@@ -0,0 +1,49 @@
+"""Idempotency-Key en POST /turnos/ y POST /clientes/"""
+from datetime import date, timedelta
+
+FECHA = (date.today() + timedelta(days=7)).isoformat()
+
+
+def _turno(datos: dict, hora: str = "10:00") -> dict:
+    return {"cliente_id": datos["cliente_id"], "servicio_id": datos["servicios"][0],
+            "fecha": FECHA, "hora_inicio": hora}
+
+
+def test_reintento_devuelve_la_misma_respuesta(cliente, datos):
+    clave = {"Idempotency-Key": "turno-1"}
+    primera = cliente.post("/turnos/", json=_turno(datos), headers=clave)
+    assert primera.status_code == 200
+    assert "Idempotent-Replayed" not in primera.headers
+
+    reintento = cliente.post("/turnos/", json=_turno(datos), headers=clave)
+    assert reintento.status_code == 200
+    assert reintento.headers["Idempotent-Replayed"] == "true"
+    assert reintento.json() == primera.json()
+    assert len(cliente.get(f"/turnos/agenda/{FECHA}").json()) == 1
+
+
+def test_sin_clave_cada_post_se_ejecuta(cliente, datos):
+    assert cliente.post("/clientes/", json={"nombre": "Bea"}).json()["id"] != \
+        cliente.post("/clientes/", json={"nombre": "Bea"}).json()["id"]
+
+
+def test_error_4xx_tambien_se_repite(cliente, datos):
+    cliente.post("/turnos/", json=_turno(datos))
+    clave = {"Idempotency-Key": "choque"}
+    assert cliente.post("/turnos/", json=_turno(datos), headers=clave).status_code == 409
+    repetida = cliente.post("/turnos/", json=_turno(datos), headers=clave)
+    assert repetida.status_code == 409
+    assert repetida.headers["Idempotent-Replayed"] == "true"
+
+
+def test_misma_clave_otro_cuerpo_422(cliente, datos):
+    clave = {"Idempotency-Key": "cliente-1"}
+    assert cliente.post("/clientes/", json={"nombre": "Bea"}, headers=clave).status_code == 200
+    assert cliente.post("/clientes/", json={"nombre": "Caro"}, headers=clave).status_code == 422
+    # Otra ruta con la misma clave también es otro request
+    assert cliente.post("/turnos/", json=_turno(datos), headers=clave).status_code == 422
+
+
+def test_clave_invalida_400(cliente, datos):
+    respuesta = cliente.post("/clientes/", json={"nombre": "Bea"}, headers={"Idempotency-Key": "x" * 256})
+    assert respuesta.status_code == 400
@@ -0,0 +1,164 @@
+"""
+Migraciones: una base creada con el esquema original (v0, sin tabla de
+versiones) se actualiza hasta la última versión sin perder datos.
+"""
+from sqlalchemy import inspect
+
+from src.db.esquema import CLAVE_VERSION, MIGRACIONES, migrar
+from src.db.versiones import leer_version
+
+# Esquema de la primera versión de la app (Base.metadata.create_all del commit inicial)
+ESQUEMA_V0 = """
+CREATE TABLE usuarios (
+    id INTEGER NOT NULL, nombre VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL, telefono VARCHAR(30) NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX ix_usuarios_email ON usuarios (email);
+CREATE INDEX ix_usuarios_id ON usuarios (id);
+CREATE TABLE clientes (
+    id INTEGER NOT NULL, nombre VARCHAR(100) NOT NULL,
+    telefono VARCHAR(30), email VARCHAR(120), notas TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_clientes_id ON clientes (id);
+CREATE TABLE servicios (
+    id INTEGER NOT NULL, nombre VARCHAR(100) NOT NULL,
+    duracion_min INTEGER NOT NULL, precio FLOAT NOT NULL, activo BOOLEAN NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_servicios_id ON servicios (id);
+CREATE TABLE turnos (
+    id INTEGER NOT NULL, cliente_id INTEGER NOT NULL, servicio_id INTEGER NOT NULL,
+    fecha DATE NOT NULL, hora_inicio TIME NOT NULL, estado VARCHAR(20) NOT NULL,
+    notas VARCHAR(500),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(cliente_id) REFERENCES clientes (id),
+    FOREIGN KEY(servicio_id) REFERENCES servicios (id)
+);
+CREATE INDEX ix_turnos_fecha ON turnos (fecha);
+CREATE INDEX ix_turnos_id ON turnos (id);
+INSERT INTO clientes (id, nombre, telefono) VALUES (1, 'Ana', '1111'), (2, 'Bea', NULL);
+INSERT INTO servicios (id, nombre, duracion_min, precio, activo) VALUES
+    (1, 'Esmaltado', 30, 1000, 1), (2, 'Kapping', 60, 2500, 1);
+INSERT INTO turnos (id, cliente_id, servicio_id, fecha, hora_inicio, estado) VALUES
+    (1, 1, 1, '2026-03-02', '10:00:00.000000', 'completado'),
+    (2, 2, 2, '2026-03-02', '11:00:00.000000', 'completado'),
+    (3, 1, 2, '2026-03-03', '10:00:00.000000', 'pendiente');
+"""
+
+
+def _crear_v0(engine) -> None:
+    conexion = engine.raw_connection()
+    try:
+        conexion.driver_connection.executescript(ESQUEMA_V0)
+    finally:
+        conexion.close()
+
+
+def test_migrar_desde_v0(motores):
+    _crear_v0(motores)
+
+    assert migrar(motores) == len(MIGRACIONES)
+
+    inspector = inspect(motores)
+    columnas = {c["name"] for c in inspector.get_columns("turnos")}
+    assert {"precio", "version", "serie_id"} <= columnas
+    for tabla in ("versiones", "resumen_diario", "recordatorios", "turnos_archivo", "idempotencia"):
+        assert inspector.has_table(tabla)
+    indices = {i["name"] for i in inspector.get_indexes("turnos")}
+    assert "ix_turnos_fecha_hora" in indices and "ix_turnos_fecha" not in indices
+
+    with motores.connect() as conn:
+        assert leer_version(conn, CLAVE_VERSION) == len(MIGRACIONES)
+        assert conn.exec_driver_sql("SELECT count(*) FROM turnos").scalar() == 3
+        triggers = {fila[0] for fila in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )}
+        assert {"resumen_turnos_insert", "resumen_turnos_delete", "version_agenda_update"} <= triggers
+        # El resumen se llenó con los turnos existentes (importe del servicio: no tenían precio)
+        resumen = conn.exec_driver_sql(
+            "SELECT servicio_id, cantidad, importe FROM resumen_diario "
+            "WHERE fecha = '2026-03-02' AND estado = 'completado' ORDER BY servicio_id"
+        ).all()
+        assert [tuple(fila) for fila in resumen] == [(1, 1, 1000.0), (2, 1, 2500.0)]
+        # Los turnos viejos quedan con el precio del servicio al migrar
+        precios = conn.exec_driver_sql("SELECT id, precio FROM turnos ORDER BY id").all()
+        assert [tuple(fila) for fila in precios] == [(1, 1000.0), (2, 2500.0), (3, 2500.0)]
+
+
+def test_migrar_dos_veces_no_cambia_nada(motores):
+    _crear_v0(motores)
+    migrar(motores)
+    with motores.connect() as conn:
+        antes = conn.exec_driver_sql("SELECT * FROM resumen_diario ORDER BY 1, 2, 3").all()
+
+    assert migrar(motores) == len(MIGRACIONES)
+    with motores.connect() as conn:
+        assert conn.exec_driver_sql("SELECT * FROM resumen_diario ORDER BY 1, 2, 3").all() == antes
+
+
+def test_app_sobre_base_migrada(motores):
+    """La app arranca sobre la base vieja y respeta sus turnos"""
+    from fastapi.testclient import TestClient
+    from src.api.app import crear_app
+
+    _crear_v0(motores)
+    with TestClient(crear_app()) as http:
+        agenda = http.get("/turnos/agenda/2026-03-02")
+        assert agenda.status_code == 200
+        assert [t["id"] for t in agenda.json()] == [1, 2]
+        choque = http.post("/turnos/", json={
+            "cliente_id": 2, "servicio_id": 1, "fecha": "2026-03-03", "hora_inicio": "10:30"
+        })
+        assert choque.status_code == 409
+        # El total gastado cuenta los turnos completados de antes de turnos.precio
+        assert http.get("/turnos/cliente/2/resumen").json()["total_gastado"] == 2500.0
+        # Y un cambio de precio posterior no cambia lo ya reservado
+        assert http.put("/servicios/2", json={"precio": 3000.0}).status_code == 200
+        assert http.get("/turnos/cliente/2/resumen").json()["total_gastado"] == 2500.0
+        ingresos = http.get("/reportes/ingresos", params={"desde": "2026-03-02", "hasta": "2026-03-02"})
+        assert ingresos.json()["total"] == 3500.0
+
+
+def test_turnos_autoincrement_renumera_ids_repetidos(motores, monkeypatch):
+    """Una base que ya reusó el ID de un turno archivado queda con IDs únicos"""
+    from src.db import esquema
+
+    _crear_v0(motores)
+    version_sin_autoincrement = esquema.MIGRACIONES.index(esquema._turnos_autoincrement)
+    monkeypatch.setattr(esquema, "MIGRACIONES", MIGRACIONES[:version_sin_autoincrement])
+    migrar(motores)
+    with motores.begin() as conn:
+        # El turno 3 se archivó y su ID volvió a usarse en un turno nuevo
+        conn.exec_driver_sql(
+            "INSERT INTO turnos_archivo (id, cliente_id, servicio_id, fecha, hora_inicio, estado, precio, version, "
+            "created_at) SELECT id, cliente_id, servicio_id, fecha, hora_inicio, 'completado', 2500, 1, created_at "
+            "FROM turnos WHERE id = 3"
+        )
+        conn.exec_driver_sql("DELETE FROM turnos WHERE id = 3")
+        conn.exec_driver_sql(
+            "INSERT INTO turnos (id, cliente_id, servicio_id, fecha, hora_inicio, estado, version) "
+            "VALUES (3, 2, 1, '2026-04-01', '09:00:00.000000', 'pendiente', 1)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO recordatorios (turno_id, fecha, estado, intentos, proximo_intento) "
+            "VALUES (3, '2026-04-01', 'pendiente', 0, '2026-03-31 12:00:00')"
+        )
+
+    monkeypatch.setattr(esquema, "MIGRACIONES", MIGRACIONES)
+    assert migrar(motores) == len(MIGRACIONES)
+    with motores.begin() as conn:
+        assert conn.exec_driver_sql("SELECT id FROM turnos ORDER BY id").scalars().all() == [1, 2, 4]
+        assert conn.exec_driver_sql("SELECT turno_id FROM recordatorios").scalar() == 4
+        triggers = conn.exec_driver_sql(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'turnos'"
+        ).scalar()
+        assert triggers == 6
+        conn.exec_driver_sql(
+            "INSERT INTO turnos (cliente_id, servicio_id, fecha, hora_inicio, estado, version) "
+            "VALUES (1, 1, '2026-04-02', '09:00:00.000000', 'pendiente', 1)"
+        )
+        assert conn.exec_driver_sql("SELECT max(id) FROM turnos").scalar() == 5
@@ -0,0 +1,58 @@
+"""Cola de recordatorios: reservas, resultados tardíos y reservas vencidas"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from src.db import base
+from src.db.recordatorio_repository import (
+    RecordatorioRepository, ENVIADO, FALLIDO, REINTENTO, MAX_INTENTOS
+)
+from src.db.turno_repository import TurnoRepository
+from src.dto.turno import TurnoCreate
+
+FECHA = date.today() + timedelta(days=1)
+
+
+@pytest.fixture
+def cola(datos):
+    """Un recordatorio encolado y una sesión con su repositorio"""
+    with base.SessionLocal() as db:
+        TurnoRepository(db).crear(TurnoCreate(
+            cliente_id=datos["cliente_id"], servicio_id=datos["servicios"][0], fecha=FECHA, hora_inicio="10:00"
+        ))
+        repo = RecordatorioRepository(db)
+        assert repo.encolar_dia(FECHA, 100) == 1
+        yield repo
+
+
+def _vencer_reservas(repo) -> None:
+    repo.db.execute(text("UPDATE recordatorios SET proximo_intento = '2000-01-01 00:00:00'"))
+    repo.db.commit()
+
+
+def test_registrar_cuenta_las_filas_que_cambiaron(cola):
+    id = cola.tomar(10)[0]["id"]
+    assert cola.registrar([id, 999], []) == {ENVIADO: 1, REINTENTO: 0, FALLIDO: 0}
+    # Repetido: ya no está reservado
+    assert cola.registrar([id], [(id, 1, "x")]) == {ENVIADO: 0, REINTENTO: 0, FALLIDO: 0}
+    assert cola.contar() == {ENVIADO: 1}
+
+
+def test_resultado_tardio_no_pisa_otra_reserva(cola):
+    primero = cola.tomar(10)[0]
+    _vencer_reservas(cola)
+    segundo = cola.tomar(10)[0]
+    assert segundo["intentos"] == primero["intentos"] + 1
+
+    # El primer despachador informa tarde su falla: la reserva ya es del segundo
+    assert cola.registrar([], [(primero["id"], primero["intentos"], "tarde")])[REINTENTO] == 0
+    assert cola.registrar([], [(segundo["id"], segundo["intentos"], "falla")])[REINTENTO] == 1
+
+
+def test_reservas_vencidas_agotan_los_intentos(cola):
+    for _ in range(MAX_INTENTOS):
+        assert len(cola.tomar(10)) == 1
+        _vencer_reservas(cola)
+    assert cola.tomar(10) == []
+    assert cola.contar() == {FALLIDO: 1}
@@ -0,0 +1,50 @@
+"""Una base por salón: los datos de un salón no se ven desde otro"""
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from src.db.base import ahora
+from src.db.idempotencia_repository import IdempotenciaDB
+
+
+def test_salones_aislados(cliente, salones_tmp):
+    norte, sur = {"X-Salon": "norte"}, {"X-Salon": "sur"}
+    creado = cliente.post("/clientes/", json={"nombre": "Ana"}, headers=norte)
+    assert creado.status_code == 200
+
+    assert [c["nombre"] for c in cliente.get("/clientes/", headers=norte).json()["items"]] == ["Ana"]
+    assert cliente.get("/clientes/", headers=sur).json()["items"] == []
+    assert cliente.get("/clientes/").json()["items"] == []
+    assert cliente.get(f"/clientes/{creado.json()['id']}", headers=sur).status_code == 404
+    assert sorted(salones_tmp.abiertos()) == ["norte", "sur"]
+
+
+def test_misma_clave_de_idempotencia_en_dos_salones(cliente, salones_tmp):
+    clave = "alta-1"
+    for salon in ("norte", "sur"):
+        respuesta = cliente.post("/clientes/", json={"nombre": "Ana"},
+                                 headers={"X-Salon": salon, "Idempotency-Key": clave})
+        assert respuesta.status_code == 200
+        assert "Idempotent-Replayed" not in respuesta.headers
+
+
+def test_purga_de_idempotencia_por_salon(cliente, salones_tmp):
+    # Purga en norte (primera reserva del salón)
+    headers = {"X-Salon": "norte", "Idempotency-Key": "norte-1"}
+    assert cliente.post("/clientes/", json={"nombre": "Ana"}, headers=headers).status_code == 200
+
+    momento = ahora() - timedelta(hours=1)
+    with salones_tmp.obtener("sur").sesiones() as db:
+        db.add(IdempotenciaDB(clave="vieja", huella="x", estado="listo", creado=momento, expira=momento))
+        db.commit()
+
+    # La purga que ya corrió en norte no frena la de sur
+    headers = {"X-Salon": "sur", "Idempotency-Key": "sur-1"}
+    assert cliente.post("/clientes/", json={"nombre": "Bea"}, headers=headers).status_code == 200
+    with salones_tmp.obtener("sur").sesiones() as db:
+        assert db.scalars(select(IdempotenciaDB.clave)).all() == ["sur-1"]
+
+
+def test_salon_desconocido_o_invalido(cliente, salones_tmp):
+    assert cliente.get("/clientes/", headers={"X-Salon": "oeste"}).status_code == 404
+    assert cliente.get("/clientes/", headers={"X-Salon": "No_Valido"}).status_code == 400
@@ -0,0 +1,142 @@
+"""
+Reservas que se superponen y ediciones en carrera (los casos de
+bench.bench_concurrencia, en chico).
+"""
+import asyncio
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from bench import bench_concurrencia
+from src.db import base
+from src.db.turno_repository import TurnoRepository
+from src.dto.turno import TurnoUpdate
+from src.db.indice_agenda import IndiceDia
+
+FECHA = date.today() + timedelta(days=7)
+
+
+def _p(datos: dict) -> dict:
+    """Parámetros como los de bench.datos_salon: la grilla arranca después de fecha_fin"""
+    return {"fecha_fin": (FECHA - timedelta(days=1)).isoformat(), "clientes": 1,
+            "servicios": len(datos["servicios"])}
+
+
+def _turno(cliente, datos, hora: str, servicio: int = 0):
+    return cliente.post("/turnos/", json={
+        "cliente_id": datos["cliente_id"], "servicio_id": datos["servicios"][servicio],
+        "fecha": FECHA.isoformat(), "hora_inicio": hora,
+    })
+
+
+def test_superposicion_409(cliente, datos):
+    assert _turno(cliente, datos, "10:00", servicio=1).status_code == 200   # 10:00 a 11:00
+    assert _turno(cliente, datos, "10:30").status_code == 409
+    assert _turno(cliente, datos, "09:45").status_code == 409
+    assert _turno(cliente, datos, "11:00").status_code == 200
+
+
+def test_indice_con_turnos_ya_superpuestos():
+    # 10:00-11:00 y 10:15-10:45 (turnos viejos, de antes de validar superposiciones)
+    indice = IndiceDia([(600, 660, 1), (615, 645, 2)])
+    assert indice.se_superpone(650, 680)
+    assert not indice.se_superpone(660, 690)
+    assert indice.se_superpone(650, 680, excluir_id=2)
+    assert not indice.se_superpone(650, 680, excluir_id=1)
+    indice.quitar(1)
+    assert not indice.se_superpone(650, 680)
+    indice.agregar(540, 700, 3)
+    assert indice.se_superpone(690, 720) and not indice.se_superpone(700, 720)
+
+
+def test_reserva_contra_turnos_viejos_superpuestos(cliente, datos, motores):
+    with motores.begin() as conn:
+        for id, hora, servicio in ((100, "10:00", 1), (101, "10:15", 0)):
+            conn.exec_driver_sql(
+                "INSERT INTO turnos (id, cliente_id, servicio_id, fecha, hora_inicio, estado, precio, version) "
+                f"VALUES ({id}, ?, ?, ?, '{hora}:00.000000', 'pendiente', 0, 1)",
+                (datos["cliente_id"], datos["servicios"][servicio], FECHA.isoformat())
+            )
+    assert _turno(cliente, datos, "10:50").status_code == 409
+    assert _turno(cliente, datos, "11:00").status_code == 200
+
+
+def test_superposicion_libera_al_cancelar(cliente, datos):
+    turno = _turno(cliente, datos, "10:00").json()
+    assert cliente.post(f"/turnos/{turno['id']}/cancelar").status_code == 200
+    assert _turno(cliente, datos, "10:00").status_code == 200
+
+
+def test_reservas_simultaneas_sin_superposiciones(datos):
+    p = _p(datos)
+    pedidos = bench_concurrencia.reservas(p, 120, random.Random(1))
+
+    respuestas = asyncio.run(bench_concurrencia._enviar(pedidos, time.time()))
+    estados = Counter(codigo for codigo, _ in respuestas)
+    assert set(estados) <= {200, 409}
+    assert estados[200] > 0 and estados[409] > 0
+    assert bench_concurrencia.superposiciones(p) == []
+
+
+def test_reservas_desde_varios_procesos_sin_superposiciones(datos, ruta_base, monkeypatch):
+    monkeypatch.setattr(bench_concurrencia, "ESPERA_LARGADA", 2.0)
+    p = _p(datos)
+    pedidos = bench_concurrencia.reservas(p, 90, random.Random(2))
+
+    respuestas = bench_concurrencia.disparar(ruta_base, [pedidos[i::3] for i in range(3)])
+    assert set(codigo for codigo, _ in respuestas) <= {200, 409}
+    assert bench_concurrencia.superposiciones(p) == []
+
+
+def test_version_vieja_409(cliente, datos):
+    turno = _turno(cliente, datos, "10:00").json()
+    editado = cliente.put(f"/turnos/{turno['id']}", json={"notas": "uno", "version": turno["version"]})
+    assert editado.status_code == 200
+    assert editado.json()["version"] == turno["version"] + 1
+
+    viejo = cliente.put(f"/turnos/{turno['id']}", json={"notas": "dos", "version": turno["version"]})
+    assert viejo.status_code == 409
+    assert cliente.get(f"/turnos/{turno['id']}").json()["notas"] == "uno"
+    assert cliente.put("/turnos/999999", json={"notas": "x", "version": 1}).status_code == 404
+
+
+def test_actualizar_relee_el_turno_con_el_lock(cliente, datos):
+    """Una sesión que ya tenía el turno cargado valida contra lo que hay en la base, no contra su copia"""
+    turno = _turno(cliente, datos, "10:00").json()
+    with base.SessionLocal() as db:
+        repo = TurnoRepository(db)
+        cargado = repo.por_id(turno["id"])
+        assert cargado.hora_inicio.hour == 10
+
+        # Otra conexión lo mueve a las 12:00 y reserva 12:30
+        assert cliente.put(f"/turnos/{turno['id']}", json={"hora_inicio": "12:00"}).status_code == 200
+        assert _turno(cliente, datos, "12:30").status_code == 200
+
+        # Con el servicio de 60 minutos, a las 12:00 choca (a las 10:00 no chocaba)
+        with pytest.raises(HTTPException) as error:
+            repo.actualizar(turno["id"], TurnoUpdate(servicio_id=datos["servicios"][1]))
+        assert error.value.status_code == 409
+
+
+def test_ediciones_simultaneas_pasa_una(datos, ruta_base, monkeypatch):
+    monkeypatch.setattr(bench_concurrencia, "ESPERA_LARGADA", 2.0)
+    id, version = bench_concurrencia.turno_para_editar(_p(datos))
+    ediciones = [("PUT", f"/turnos/{id}", {"notas": f"test {i}", "version": version}) for i in range(20)]
+
+    respuestas = bench_concurrencia.disparar(ruta_base, [ediciones[i::2] for i in range(2)])
+    assert Counter(codigo for codigo, _ in respuestas) == {200: 1, 409: 19}
+
+
+def test_eliminar_cliente_cambia_la_agenda(cliente, datos):
+    _turno(cliente, datos, "10:00")
+    agenda = cliente.get(f"/turnos/agenda/{FECHA}")
+    assert len(agenda.json()) == 1
+
+    assert cliente.delete(f"/clientes/{datos['cliente_id']}").status_code == 200
+    despues = cliente.get(f"/turnos/agenda/{FECHA}", headers={"If-None-Match": agenda.headers["ETag"]})
+    assert despues.status_code == 200
+    assert despues.json() == []